@@ -0,0 +1,160 @@
+"""
+Compare the rollup-backed analytics queries with full scans of the raw logs, and measure
+what the rollup triggers add to inserts.
+
+Usage:
+    python benchmarks/bench_analytics.py [--rows 1000000] [--db /tmp/bench_analytics.db]
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agent import analytics  # noqa: E402
+from agent.database import init_db  # noqa: E402
+
+TOOLS = ["WeatherTool", "StockPrice", "BloodPressureSearch", "InternetSearch", "CustomTool"]
+# Median latency (ms) of each tool; samples are log-normal around it
+MEDIAN_MS = [400, 250, 1800, 3500, 20]
+START = 1_700_000_000
+SPAN = 90 * 86400
+
+
+def synthetic_rows(count, seed=0):
+    """(timestamp TEXT, ts, question, answer, tool_id, latency_ms) rows spread over 90 days."""
+    rng = random.Random(seed)
+    for i in range(count):
+        ts = START + i * SPAN // count
+        tool = rng.randrange(len(TOOLS))
+        text = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+        yield text, ts, f"question {i}", "answer", tool + 1, MEDIAN_MS[tool] * rng.lognormvariate(0, 0.6)
+
+
+def populate(path, rows):
+    init_db(path)
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT OR IGNORE INTO tools (name) VALUES (?)", [(name,) for name in TOOLS])
+        conn.executemany(
+            "INSERT INTO chat_log (timestamp, ts, question, answer, tool_id, latency_ms) VALUES (?, ?, ?, ?, ?, ?)",
+            synthetic_rows(rows),
+        )
+        rng = random.Random(1)
+        conn.executemany(
+            "INSERT INTO error_log (timestamp, ts, error_message, query, tool_id) VALUES (?, ?, 'timeout', 'q', ?)",
+            (
+                (datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"), ts, rng.randint(1, len(TOOLS)))
+                for ts in range(START, START + SPAN, SPAN // (rows // 50))
+            ),
+        )
+
+
+# The same questions answered by scanning the raw rows, as before the rollups
+def scan_usage(conn):
+    return conn.execute(
+        "SELECT strftime('%Y-%m-%d %H:00', timestamp), tool_id, COUNT(*) FROM chat_log GROUP BY 1, 2"
+    ).fetchall()
+
+
+def scan_error_rates(conn):
+    questions = dict(conn.execute("SELECT tool_id, COUNT(*) FROM chat_log GROUP BY tool_id"))
+    errors = dict(conn.execute("SELECT tool_id, COUNT(*) FROM error_log GROUP BY tool_id"))
+    return {tool: errors.get(tool, 0) / (count + errors.get(tool, 0)) for tool, count in questions.items()}
+
+
+def scan_latency(conn):
+    latencies = {}
+    for tool_id, latency in conn.execute("SELECT tool_id, latency_ms FROM chat_log WHERE latency_ms IS NOT NULL"):
+        latencies.setdefault(tool_id, []).append(latency)
+    result = {}
+    for tool_id, values in latencies.items():
+        values.sort()
+        result[tool_id] = (values[len(values) // 2], values[int(len(values) * 0.95)])
+    return result
+
+
+def timed(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def insert_rate(rows, triggers):
+    """Rows per second inserted into a fresh database, with or without the rollup triggers."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "insert.db")
+        init_db(path)
+        with sqlite3.connect(path) as conn:
+            if not triggers:
+                for name in ("chat_log_rollup", "chat_log_latency_rollup"):
+                    conn.execute(f"DROP TRIGGER {name}")
+        data = list(synthetic_rows(rows, seed=2))
+        started = time.perf_counter()
+        with sqlite3.connect(path) as conn:
+            conn.executemany(
+                "INSERT INTO chat_log (timestamp, ts, question, answer, tool_id, latency_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                data,
+            )
+        return rows / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_analytics.db"))
+    parser.add_argument("--insert-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    existing = 0
+    if os.path.exists(args.db):
+        with sqlite3.connect(args.db) as conn:
+            existing = conn.execute("SELECT COUNT(*) FROM chat_log").fetchone()[0]
+    if existing != args.rows:
+        if os.path.exists(args.db):
+            os.remove(args.db)
+        started = time.perf_counter()
+        populate(args.db, args.rows)
+        print(f"generated {args.rows} conversations in {time.perf_counter() - started:.1f} s")
+
+    conn = sqlite3.connect(args.db)
+    rollup_p95 = {}
+    print(f"rows: {args.rows} over 90 days, best of 5")
+    print(f"{'query':<28} {'raw scan ms':>12} {'rollups ms':>11} {'speedup':>8}")
+    for label, scan, rollup in (
+        ("usage per tool and hour", scan_usage, analytics.tool_usage),
+        ("error rate per tool", scan_error_rates, analytics.error_rates),
+        ("p50/p95 latency per tool", scan_latency, analytics.latency_percentiles),
+    ):
+        scan_ms, _ = timed(scan, conn)
+        rollup_ms, result = timed(rollup, args.db)
+        if rollup is analytics.latency_percentiles:
+            rollup_p95 = result
+        print(f"{label:<28} {scan_ms:12.1f} {rollup_ms:11.2f} {scan_ms / rollup_ms:7.0f}x")
+    export_ms, columns = timed(analytics.export_columns, args.db, repeat=1)
+    print(f"{'NumPy export of chat_log':<28} {export_ms:12.1f} ms for {len(columns['id'])} rows")
+
+    print()
+    exact = scan_latency(conn)
+    names = {tool_id: name for tool_id, name in conn.execute("SELECT id, name FROM tools")}
+    print(f"{'tool':<22} {'exact p95':>10} {'rollup p95':>11}")
+    for tool_id, (_, p95) in sorted(exact.items()):
+        print(f"{names[tool_id]:<22} {p95:10.0f} {rollup_p95[names[tool_id]]['p95_ms']:11.0f}")
+    conn.close()
+
+    print()
+    with_triggers = insert_rate(args.insert_rows, True)
+    without = insert_rate(args.insert_rows, False)
+    print(f"inserts: {without:,.0f} rows/s without rollup triggers, {with_triggers:,.0f} rows/s with them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measure the amortized cost per page of the browser pool against a fresh browser per page.
+
+Serves a directory of static pages on localhost and renders each page with headless Chrome.
+Requires Chrome and a chromedriver (see `tools.browser_pool.find_chromedriver`).
+
+Usage:
+    python benchmarks/bench_browser_pool.py [pages] [pool_size]
+"""
+import functools
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from tools.browser_pool import BrowserPool, create_chrome_driver  # noqa: E402
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_static_pages(directory, count):
+    """Write `count` pages into `directory` and serve them; return the server and URLs."""
+    for i in range(count):
+        with open(os.path.join(directory, f"page{i}.html"), "w", encoding="utf-8") as page:
+            page.write(f"<html><body><p>Static page {i}</p><script>document.title = 'page {i}';</script></body></html>")
+
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    return server, [f"http://127.0.0.1:{port}/page{i}.html" for i in range(count)]
+
+
+def fresh_browser(url):
+    """The previous behaviour: launch, load one page, quit."""
+    driver = create_chrome_driver()
+    try:
+        driver.get(url)
+        return driver.page_source
+    finally:
+        driver.quit()
+
+
+def pooled_browser(pool, url):
+    with pool.lease() as driver:
+        driver.get(url)
+        return driver.page_source
+
+
+def timed(func, urls, workers):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(func, urls))
+    return time.perf_counter() - started
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    with tempfile.TemporaryDirectory() as directory:
+        server, urls = serve_static_pages(directory, pages)
+        try:
+            fresh = timed(fresh_browser, urls, pool_size)
+
+            pool = BrowserPool(size=pool_size)
+            pooled = timed(functools.partial(pooled_browser, pool), urls, pool_size)
+            launched = pool.launched
+            pool.close()
+        finally:
+            server.shutdown()
+
+    print(f"pages: {pages}, concurrency: {pool_size}")
+    print(f"fresh browser per page: {fresh * 1000 / pages:8.1f} ms/page")
+    print(f"pooled browsers:        {pooled * 1000 / pages:8.1f} ms/page ({launched} launches)")
+    print(f"speedup:                {fresh / pooled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Throughput of tool work (HTML paragraph extraction) declared I/O-bound, which runs on the
+calling threads, versus declared CPU-bound, which runs in the tool process pool, for growing
+worker counts.
+
+Threads share the GIL, so their throughput stays flat; worker processes scale with the
+number of cores.
+
+Usage:
+    python benchmarks/bench_executors.py [--pages 64] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from tools import executors  # noqa: E402
+from tools.html_extract import extract_paragraph_text  # noqa: E402
+
+
+def synthetic_page(paragraphs=3000):
+    """About 400 KB of HTML with scripts, links and nested markup between paragraphs."""
+    parts = ["<html><head><script>var x = 1;</script><style>p { color: red; }</style></head><body>"]
+    for i in range(paragraphs):
+        parts.append(f'<div class="c{i % 7}"><p>Paragraph {i} with <a href="/l/{i}">a link</a> and '
+                     f'<b>bold &amp; escaped</b> text about topic {i % 50}.</p></div>')
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+@executors.tool_work("BenchmarkParse")
+def parse(page):
+    return len(extract_paragraph_text([page]))
+
+
+def run(pages, workers, kind):
+    """Parse `pages` from `workers` threads with the benchmark tool declared as `kind`."""
+    executors.register_workload("BenchmarkParse", kind)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse, pages))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=64)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= max(4, os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    page = synthetic_page()
+    pages = [page] * args.pages
+    print(f"cores: {os.cpu_count()}, pages: {args.pages} x {len(page) // 1024} KB")
+    print(f"{'workers':>7} {'threads pages/s':>16} {'processes pages/s':>18} {'pool start s':>13}")
+    for workers in (int(n) for n in args.workers.split(",")):
+        started = time.perf_counter()
+        run(pages, workers, executors.IO_BOUND)
+        threads = args.pages / (time.perf_counter() - started)
+
+        executors.shutdown()
+        executors.CPU_WORKERS = workers
+        started = time.perf_counter()
+        executors.start(wait=True)
+        pool_start = time.perf_counter() - started
+        started = time.perf_counter()
+        run(pages, workers, executors.CPU_BOUND)
+        processes = args.pages / (time.perf_counter() - started)
+        print(f"{workers:7} {threads:16.1f} {processes:18.1f} {pool_start:13.2f}")
+    executors.shutdown()
+
+
+if __name__ == "__main__":
+    main()
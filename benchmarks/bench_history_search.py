@@ -0,0 +1,113 @@
+"""
+Time ranked full-text search over a synthetic chat history of one million conversations.
+
+The database is generated once (through the same triggers the live log uses) and reused on
+later runs.
+
+Usage:
+    python benchmarks/bench_history_search.py [--rows 1000000] [--db /tmp/bench_history.db]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agent.database import init_db  # noqa: E402
+from agent.history_search import search_history  # noqa: E402
+
+TOOLS = ["WeatherTool", "StockPrice", "BloodPressureSearch", "InternetSearch", "CustomTool"]
+CITIES = ["Berlin", "Cairo", "Paris", "Tokyo", "Riyadh", "Madrid", "Toronto", "Nairobi", "Lima", "Oslo"]
+TICKERS = ["AAPL", "MSFT", "GOOG", "AMZN", "TSLA", "NVDA", "META", "IBM"]
+FILLER = ("please could you tell me about the latest news history science football music travel "
+          "recipe health sleep exercise diet market economy energy policy climate").split()
+START = 1_700_000_000
+
+SEARCHES = [
+    ("weather berlin", {}),
+    ("blood pressure", {}),
+    ("aapl", {"tool": "StockPrice"}),
+    ("climate policy", {"since": START + 300 * 86400}),
+    ("rain tok*", {}),
+    ("hypertension diet", {"tool": "BloodPressureSearch"}),
+]
+
+
+def conversation(rng):
+    """A synthetic (tool_id, question, answer) triple resembling the real log."""
+    tool = rng.randrange(len(TOOLS))
+    noise = " ".join(rng.choices(FILLER, k=rng.randint(2, 8)))
+    if tool == 0:
+        city = rng.choice(CITIES)
+        sky = rng.choice(["clear sky", "light rain", "snow", "overcast clouds"])
+        return tool + 1, f"what's the weather in {city} {noise}", f"Weather in {city}: {sky}, {rng.randint(-10, 40)}°C."
+    if tool == 1:
+        ticker = rng.choice(TICKERS)
+        return tool + 1, f"{ticker} stock price", f"The current price of {ticker} is {rng.uniform(10, 900):.2f} USD."
+    if tool == 2:
+        topic = rng.choice(["blood pressure", "hypertension", "hypotension"])
+        return tool + 1, f"{topic} {noise}", f"Information about {topic} and {noise}."
+    return tool + 1, noise, f"Here is what I found about {noise}."
+
+
+def populate(path, rows):
+    """Create the database and insert `rows` conversations in large transactions."""
+    init_db(path)
+    rng = random.Random(0)
+    started = time.perf_counter()
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT OR IGNORE INTO tools (name) VALUES (?)", [(name,) for name in TOOLS])
+        batch = 50_000
+        for offset in range(0, rows, batch):
+            conn.executemany(
+                "INSERT INTO chat_log (ts, question, answer, tool_id) VALUES (?, ?, ?, ?)",
+                (
+                    (START + (offset + i) * 30, question, answer, tool_id)
+                    for i, (tool_id, question, answer) in (
+                        (i, conversation(rng)) for i in range(min(batch, rows - offset))
+                    )
+                ),
+            )
+            conn.commit()
+        conn.execute("INSERT INTO chat_fts (chat_fts) VALUES ('optimize')")
+    print(f"generated {rows} conversations in {time.perf_counter() - started:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default=os.path.join("/tmp", "bench_history.db"))
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    existing = 0
+    if os.path.exists(args.db):
+        with sqlite3.connect(args.db) as conn:
+            existing = conn.execute("SELECT COUNT(*) FROM chat_log").fetchone()[0]
+    if existing != args.rows:
+        if os.path.exists(args.db):
+            os.remove(args.db)
+        populate(args.db, args.rows)
+
+    conn = sqlite3.connect(args.db)
+    print(f"rows: {args.rows}, searches: {len(SEARCHES)} x {args.repeat}, limit 10")
+    print(f"{'query':<40} {'p50 ms':>8} {'p95 ms':>8} {'hits':>5}")
+    for text, filters in SEARCHES:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            hits = search_history(text=text, conn=conn, **filters)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        label = text + (f" {filters}" if filters else "")
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{label[:40]:<40} {statistics.median(timings):8.2f} {p95:8.2f} {len(hits):5}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare full BeautifulSoup parsing with streaming paragraph extraction on large pages.
+
+Usage:
+    python benchmarks/bench_html_extract.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from tools.html_extract import CHUNK_SIZE, extract_paragraph_text  # noqa: E402
+
+REPEAT = 3
+
+
+def make_page(paragraphs):
+    """Build a page with navigation noise, scripts and `paragraphs` paragraphs."""
+    body = "".join(
+        f"<div class='nav'><a href='/{i}'>link {i}</a></div>"
+        f"<p>Paragraph {i}: <b>lorem</b> ipsum dolor sit amet, consectetur adipiscing elit.</p>"
+        f"<script>var tracking{i} = {i};</script>"
+        for i in range(paragraphs)
+    )
+    return f"<html><head><title>Bench</title></head><body>{body}</body></html>"
+
+
+def soup_extract(html, max_chars):
+    soup = BeautifulSoup(html, "html.parser")
+    text = "\n".join([p.get_text() for p in soup.find_all("p") if p.get_text()])
+    return text[:max_chars] + "..." if len(text) > max_chars else text
+
+
+def stream_extract(html, max_chars):
+    chunks = (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+    text = extract_paragraph_text(chunks, max_chars)
+    return text[:max_chars] + "..." if len(text) > max_chars else text
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(*args)
+    return (time.perf_counter() - started) / REPEAT, result
+
+
+def main():
+    print(f"{'page size':>10} {'budget':>7} {'soup ms':>9} {'stream ms':>10} {'speedup':>8}")
+    for paragraphs in (50, 1000, 10000):
+        html = make_page(paragraphs)
+        for max_chars in (1000, 5000):
+            soup_time, expected = timed(soup_extract, html, max_chars)
+            stream_time, actual = timed(stream_extract, html, max_chars)
+            assert actual == expected, "streaming output differs from BeautifulSoup"
+            print(
+                f"{len(html) // 1024:>8}KB {max_chars:>7} {soup_time * 1000:>9.2f} "
+                f"{stream_time * 1000:>10.2f} {soup_time / stream_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare the compiled keyword matcher with the per-keyword scans and TextBlob greeting check it replaced.
+
+Usage:
+    python benchmarks/bench_keyword_matcher.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from tools.keyword_matcher import KeywordMatcher, is_greeting  # noqa: E402
+
+WEATHER = ["weather", "temperature", "forecast"]
+STOCK = ["stock", "price", "share"]
+BLOOD_PRESSURE = ["blood pressure", "hypertension", "hypotension", "ضغط الدم", "ارتفاع الضغط", "انخفاض الضغط"]
+
+QUERIES = [
+    "hello",
+    "What's the weather in Berlin?",
+    "temperature forecast for Cairo tomorrow",
+    "AAPL stock price",
+    "how much is one share of MSFT",
+    "symptoms of high blood pressure in adults",
+    "ما هي أسباب ارتفاع الضغط",
+    "ضغط الدم الطبيعي",
+    "who won the football match yesterday",
+    "summarize https://example.com/article about renewable energy policy in Europe",
+    "explain the difference between hypertension and hypotension",
+    "hi, can you tell me something interesting",
+]
+
+
+def baseline(query, textblob):
+    """The routing checks from custom_tool and blood_pressure_tool before the matcher."""
+    query_lower = query.lower().strip()
+    if textblob is not None:
+        analysis = textblob(query_lower)
+        words = tokenize(analysis)
+        greeting = "hello" in words or "hi" in words or "hallo" in words or analysis.sentiment.polarity > 0.5
+    else:
+        greeting = False
+    intents = set()
+    if any(keyword in query_lower for keyword in BLOOD_PRESSURE):
+        intents.add("blood_pressure")
+    if any(keyword in query_lower for keyword in WEATHER):
+        intents.add("weather")
+    if any(keyword in query_lower for keyword in STOCK):
+        intents.add("stock")
+    return greeting, intents
+
+
+def compiled(query, matcher):
+    return is_greeting(query), matcher.match(query)
+
+
+def tokenize(analysis):
+    """TextBlob words, or a plain split when the NLTK tokenizer data is not installed."""
+    try:
+        return analysis.words.lower()
+    except Exception:
+        return analysis.raw.lower().split()
+
+
+def load_textblob():
+    """Return TextBlob if it is installed."""
+    try:
+        from textblob import TextBlob
+        return TextBlob
+    except ImportError:
+        return None
+
+
+def timed(func, corpus, *args):
+    started = time.perf_counter()
+    for query in corpus:
+        func(query, *args)
+    return (time.perf_counter() - started) / len(corpus) * 1e6
+
+
+def main():
+    random.seed(0)
+    corpus = [random.choice(QUERIES) for _ in range(20000)]
+
+    started = time.perf_counter()
+    matcher = KeywordMatcher({"weather": WEATHER, "stock": STOCK, "blood_pressure": BLOOD_PRESSURE})
+    build = (time.perf_counter() - started) * 1e6
+
+    textblob = load_textblob()
+    scan = timed(baseline, corpus, None)
+    matcher_only = timed(lambda query: matcher.match(query), corpus)
+    single_pass = timed(compiled, corpus, matcher)
+
+    print(f"queries: {len(corpus)}, matcher build: {build:.0f} us")
+    if textblob is not None:
+        with_textblob = timed(baseline, corpus[:2000], textblob)
+        print(f"before: keyword scans + TextBlob greeting  {with_textblob:9.2f} us/query")
+    else:
+        print("before: keyword scans + TextBlob greeting  skipped (TextBlob not installed)")
+    print(f"after:  compiled matcher + greeting lexicon {single_pass:9.2f} us/query")
+    print()
+    print(f"keyword scans alone                         {scan:9.2f} us/query")
+    print(f"compiled matcher alone                      {matcher_only:9.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare cold start time of eager tool loading with manifest-based lazy loading.
+
+Each run is a fresh interpreter that imports `main` and calls `load_tools`.
+
+Usage:
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+SCRIPT = (
+    "import logging, main; logging.disable(logging.CRITICAL); "
+    "tools = main.load_tools(lazy={lazy}); assert tools"
+)
+
+
+def cold_start(lazy):
+    """Seconds for a fresh interpreter to import `main` and load the tools."""
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(lazy=lazy)],
+        cwd=SRC_DIR,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # Warm the OS file cache and the tool manifest once
+    cold_start(False)
+    cold_start(True)
+
+    eager = [cold_start(False) for _ in range(runs)]
+    lazy = [cold_start(True) for _ in range(runs)]
+
+    print(f"runs: {runs}")
+    print(f"eager load_tools: {statistics.median(eager):.2f}s (median)")
+    print(f"lazy load_tools:  {statistics.median(lazy):.2f}s (median)")
+    print(f"saved:            {statistics.median(eager) - statistics.median(lazy):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
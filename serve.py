@@ -0,0 +1,22 @@
+import subprocess
+import sys
+import os
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Define the correct path to server.py
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Project directory
+SERVER_PATH = os.path.join(BASE_DIR, "src", "server.py")  # Full path to server.py
+
+try:
+    logging.info(f"Running {SERVER_PATH}...")
+    # Forward options such as --port and --max-concurrency to the server
+    subprocess.run(["python", SERVER_PATH, *sys.argv[1:]], check=True)
+except subprocess.CalledProcessError as e:
+    logging.error(f"Failed to run server.py: {e}")
+except KeyboardInterrupt:
+    logging.info("Server stopped.")
@@ -1,152 +1,636 @@
-import sqlite3
-import datetime
+import asyncio
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from agent import profiling
+from agent.budget import MAX_STEPS, QUERY_TIMEOUT, Budget, BudgetCallbackHandler, BudgetExceeded
+from agent.budget import use as use_budget
+from agent.database import DB_PATH, init_db
+from agent.history_search import search_history
+from agent.log_writer import LogWriter
+from agent.memory import MEMORY_LLM_SUMMARY, ConversationMemory, llm_summarizer
+from agent.response_cache import ResponseCache
+from agent.router import RuleRouter
+from agent.streaming import StreamEvent, StreamingCallbackHandler
+from agent.tool_calls import MAX_INPUT_CHARS, NO_TOOL, ToolCall, ToolCallRecorder
+from model.llm_router import router_from_env
 from model.ollama_model import OllamaHandler
+from tools import executors
+from tools.batching import get_batch_handler
+from tools.tool_cache import is_cacheable
 from langchain.agents import initialize_agent, AgentType
 
 
+# Start of the output the agent executor returns when it hits its own iteration or time limit
+_EXECUTOR_STOPPED = "Agent stopped due to"
+
+
+class RouteFailed(Exception):
+    """Raised when a fast-path tool answers with an error message instead of a result."""
+
+
+def _check_route_output(output):
+    """Raise `RouteFailed` for a fast-path tool output that describes a failure, so the agent takes over."""
+    if not is_cacheable(output):
+        raise RouteFailed(output)
+    return output
+
+
+def _elapsed_ms(started):
+    """Milliseconds since the `time.perf_counter()` reading `started`."""
+    return (time.perf_counter() - started) * 1000
+
+
 class Agent:
     """Intelligent agent utilizing multiple tools via LangChain."""
 
-    def __init__(self, tools=None):
-        """Initialize the agent with optional dynamic tools."""
+    def __init__(self, tools=None, db_path=DB_PATH, log_writer=None, response_cache=None, cache_responses=True,
+                 use_router=True, llm=None, timeout=QUERY_TIMEOUT, max_steps=MAX_STEPS, memory=None):
+        """
+        Initialize the agent with optional dynamic tools, a response cache and a fast-path router.
+
+        The LLM is `llm` if given, else a multi-backend router when `LLM_BACKENDS` is configured,
+        else the local Ollama model. `timeout` and `max_steps` are the default budget of a query.
+        `memory` keeps the context of conversations that pass a `session_id`.
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self.max_steps = max_steps
         self.handler = OllamaHandler()
-        self.tools = tools if tools else []
+        self.tools = profiling.instrument_tools(tools if tools else [])
+
+        self.llm_router = None
+        if llm is None:
+            self.llm_router = router_from_env()
+            # With prompt-context reuse the handler talks to Ollama itself; otherwise use the plain model
+            llm = self.llm_router or (self.handler if self.handler.reuse_context else self.handler.llm)
+        self.llm = llm
 
         self.agent = initialize_agent(
             tools=self.tools,
-            llm=self.handler.llm,
+            llm=self.llm,
             agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
             verbose=True,
             allowed_tools=[tool.name for tool in self.tools],
             handle_parsing_errors=True,
+            return_intermediate_steps=True,
+            # Backstop for runs without a budget handler; queries are normally stopped by their budget first
+            max_iterations=max_steps,
+            max_execution_time=timeout,
+            early_stopping_method="force",
         )
+        # Passed with every run, since callbacks given to the executor do not reach its LLM calls
+        self.callbacks = profiling.callbacks()
 
-        # Initialize the database
+        # Initialize the database and the background log writer
         self.init_db()
+        self.log_writer = log_writer if log_writer else LogWriter(db_path)
+
+        # Earlier turns of a session are replayed, summarized, in front of its follow-up questions
+        self.memory = memory if memory else ConversationMemory(
+            db_path, self.log_writer, summarizer=llm_summarizer(self.llm) if MEMORY_LLM_SUMMARY else None
+        )
+
+        # Answers to repeated questions skip the agent loop entirely
+        self.response_cache = None
+        if cache_responses:
+            self.response_cache = response_cache if response_cache else ResponseCache(db_path)
+
+        # Obvious intents (greetings, weather in a city, tickers) go straight to a tool
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+        self.router = RuleRouter(self.tools_by_name) if use_router else None
+
+        # Servers can start the worker processes of CPU-bound tools now rather than on their first call
+        if executors.CPU_PRESTART and any(executors.get_workload(tool) == executors.CPU_BOUND for tool in self.tools):
+            executors.start()
 
     def init_db(self):
         """Create necessary tables in the database if they do not exist."""
-        with sqlite3.connect("chat_history.db") as conn:
-            cursor = conn.cursor()
-
-            # Tools table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tools (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    description TEXT
-                )
-                """
-            )
-
-            # Chat log table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS chat_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    question TEXT,
-                    answer TEXT,
-                    tool_id INTEGER,
-                    FOREIGN KEY (tool_id) REFERENCES tools(id)
-                )
-                """
-            )
-
-            # Error log table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS error_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    error_message TEXT,
-                    query TEXT,
-                    tool_id INTEGER,
-                    FOREIGN KEY (tool_id) REFERENCES tools(id)
+        init_db(self.db_path)
+
+    def log_interaction(self, query, response, tool_name, latency_ms=None, tool_calls=(), session_id=None):
+        """Log conversations with tool identification, the time taken to answer and the tool calls made."""
+        self.log_writer.log_interaction(query, response, tool_name, latency_ms, tool_calls, session_id)
+
+    def log_error(self, query, error_message, tool_name=None):
+        """Log errors occurring during processing."""
+        self.log_writer.log_error(query, error_message, tool_name)
+
+    def search_history(self, text, tool=None, since=None, until=None, limit=10):
+        """
+        Search past questions and answers, best matches first.
+
+        Args:
+            text (str): Words to look for.
+            tool (str): Only conversations answered by this tool.
+            since: Only conversations at or after this time (epoch, datetime or ISO string).
+            until: Only conversations before this time.
+            limit (int): Maximum number of hits.
+
+        Returns:
+            list[SearchHit]: Matches with highlighted snippets.
+        """
+        # Include conversations still queued in the log writer
+        self.log_writer.flush()
+        return search_history(self.db_path, text, tool=tool, since=since, until=until, limit=limit)
+
+    def close(self):
+        """Flush pending log rows, stop background threads and write profiling reports."""
+        self.log_writer.close()
+        if self.llm_router is not None:
+            self.llm_router.close()
+        profiling.write_reports()
+
+    @profiling.profiled("agent.process", "agent", payload=True, cprofile=True)
+    def process(self, query, timeout=None, max_steps=None, session_id=None):
+        """
+        Pass the query to the agent to determine the appropriate tool.
+
+        When the query runs out of time or steps, the best partial answer is returned.
+
+        Args:
+            query (str): User query.
+            timeout (float): Seconds the query may take; defaults to the agent's `timeout`.
+            max_steps (int): Tool calls the agent may make; defaults to the agent's `max_steps`.
+            session_id (str): Conversation the query belongs to, so it can refer to earlier turns.
+
+        Returns:
+            str: Agent response.
+        """
+        started = time.perf_counter()
+        cached = self._cached_response(query, session_id)
+        if cached is not None:
+            return cached
+
+        return self._process_routed(query, self._route(query), started, self.budget(timeout, max_steps), session_id)
+
+    def budget(self, timeout=None, max_steps=None):
+        """Return a new query budget, the agent's defaults for anything not given."""
+        return Budget(self.timeout if timeout is None else timeout, self.max_steps if max_steps is None else max_steps)
+
+    def _process_routed(self, query, route, started=None, budget=None, session_id=None):
+        """Answer an uncached query through its fast-path `route`, or the agent loop, within `budget`."""
+        started = started if started is not None else time.perf_counter()
+        budget = budget if budget is not None else self.budget()
+        recorder = ToolCallRecorder()
+        limiter = BudgetCallbackHandler(budget)
+        with use_budget(budget):
+            if route is not None:
+                try:
+                    if route.tool_name is None:
+                        return self._finish(query, route.response, route.rule, started, session_id=session_id)
+                    tool = self.tools_by_name[route.tool_name]
+                    output = _check_route_output(tool.run(route.tool_input, callbacks=[recorder, limiter]))
+                    return self._finish(query, output, tool.name, started, recorder.calls, session_id=session_id)
+                except Exception as e:
+                    logging.warning(f"Fast-path route {route.rule} failed, falling back to the agent: {e}")
+
+            try:
+                result = self.agent.invoke(
+                    self._agent_input(query, session_id), config={"callbacks": [recorder, limiter, *self.callbacks]}
                 )
-                """
-            )
+                return self._handle_result(query, result, started, recorder, limiter, session_id)
 
-            conn.commit()
+            except BudgetExceeded as e:
+                return self._handle_exhausted(query, e, started, recorder, limiter, session_id)
 
-    def log_interaction(self, query, response, tool_name):
-        """Log conversations with tool identification."""
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with sqlite3.connect("chat_history.db") as conn:
-            cursor = conn.cursor()
+            except Exception as e:
+                return self._handle_error(query, e)
 
-            # Retrieve or insert tool_id
-            cursor.execute("SELECT id FROM tools WHERE name = ?", (tool_name,))
-            tool_id = cursor.fetchone()
+    def process_batch(self, queries, max_concurrency=8, ordered=True):
+        """
+        Process many queries, yielding `(index, response)` pairs as results become available.
+
+        Identical queries run once. Fast-path routes to a tool with a batch handler are grouped
+        into one call per tool (e.g. one price download for many tickers); the remaining
+        queries run their agent loops concurrently. Failures are logged per item with
+        `log_error` and do not stop the batch.
+
+        Args:
+            queries (Iterable[str]): User queries.
+            max_concurrency (int): Agent loops running at the same time.
+            ordered (bool): Yield in input order (True) or as soon as each result completes.
+
+        Yields:
+            tuple: `(index, response)` for every input query.
+        """
+        indexes = {}
+        for index, query in enumerate(queries):
+            indexes.setdefault(query.strip(), []).append(index)
+
+        pending = {}
+        next_index = 0
+        total = sum(len(positions) for positions in indexes.values())
+
+        def deliver(query, response):
+            nonlocal next_index
+            results = []
+            for index in indexes[query]:
+                pending[index] = response
+            if not ordered:
+                for index in indexes[query]:
+                    results.append((index, pending.pop(index)))
+                return results
+            while next_index in pending:
+                results.append((next_index, pending.pop(next_index)))
+                next_index += 1
+            return results
 
-            if tool_id is None:
-                cursor.execute("INSERT INTO tools (name, description) VALUES (?, ?)",
-                               (tool_name, "Undefined description"))
-                tool_id = cursor.lastrowid
+        routes = {}
+        for query in indexes:
+            try:
+                cached = self._cached_response(query)
+            except Exception as e:
+                cached = self._handle_error(query, e)
+            if cached is not None:
+                yield from deliver(query, cached)
             else:
-                tool_id = tool_id[0]
+                routes[query] = self._route(query)
 
-            # Log the conversation
-            cursor.execute(
-                "INSERT INTO chat_log (timestamp, question, answer, tool_id) VALUES (?, ?, ?, ?)",
-                (timestamp, query, response, tool_id),
-            )
-            conn.commit()
+        for query, response in self._run_grouped(routes).items():
+            del routes[query]
+            yield from deliver(query, response)
 
-    def log_error(self, query, error_message, tool_name=None):
-        """Log errors occurring during processing."""
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with sqlite3.connect("chat_history.db") as conn:
-            cursor = conn.cursor()
-
-            # Retrieve tool_id if error is related to a specific tool
-            tool_id = None
-            if tool_name:
-                cursor.execute("SELECT id FROM tools WHERE name = ?", (tool_name,))
-                tool_id = cursor.fetchone()
-                if tool_id:
-                    tool_id = tool_id[0]
-
-            # Insert error log
-            cursor.execute(
-                "INSERT INTO error_log (timestamp, error_message, query, tool_id) VALUES (?, ?, ?, ?)",
-                (timestamp, error_message, query, tool_id),
-            )
-            conn.commit()
-
-    def process(self, query):
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="agent-batch") as executor:
+            futures = {
+                executor.submit(self._process_routed, query, route): query for query, route in routes.items()
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    response = self._handle_error(query, e)
+                yield from deliver(query, response)
+
+        logging.info(f"Batch of {total} queries processed ({len(indexes)} unique).")
+
+    def _run_grouped(self, routes):
         """
-        Pass the query to the agent to determine the appropriate tool.
+        Run fast-path tool calls that share a tool with a batch handler as one call per tool.
+
+        Queries whose batched result is an error lose their route, so the agent answers them.
+
+        Returns:
+            dict: Response of every query answered this way.
+        """
+        groups = {}
+        for query, route in routes.items():
+            if route is not None and route.tool_name is not None:
+                groups.setdefault(route.tool_name, []).append(query)
+
+        responses = {}
+        for tool_name, group in groups.items():
+            tool = self.tools_by_name[tool_name]
+            handler = get_batch_handler(tool) if len(group) > 1 else None
+            if handler is None:
+                continue
+            started = time.perf_counter()
+            try:
+                results = handler([routes[query].tool_input for query in group])
+            except Exception as e:
+                logging.warning(f"Batched {tool_name} call failed, running queries one by one: {e}")
+                continue
+            latency_ms = _elapsed_ms(started)
+            for query in group:
+                tool_input = routes[query].tool_input
+                result = results.get(tool_input)
+                if result is not None and is_cacheable(result):
+                    call = ToolCall(0, tool_name, tool_input[:MAX_INPUT_CHARS], len(str(result)), latency_ms)
+                    responses[query] = self._finish(query, result, tool_name, started, [call])
+                elif result is not None:
+                    # The tool failed for this input; the agent answers the query instead
+                    routes[query] = None
+            logging.info(f"Grouped {len(group)} {tool_name} calls into one batch.")
+        return responses
+
+    @profiling.profiled("agent.aprocess", "agent", payload=True)
+    async def aprocess(self, query, timeout=None, max_steps=None, session_id=None):
+        """
+        Asynchronous counterpart of `process`, suitable for serving many queries concurrently.
+
+        At the deadline the agent run is cancelled, including its pending requests.
 
         Args:
             query (str): User query.
+            timeout (float): Seconds the query may take; defaults to the agent's `timeout`.
+            max_steps (int): Tool calls the agent may make; defaults to the agent's `max_steps`.
+            session_id (str): Conversation the query belongs to, so it can refer to earlier turns.
 
         Returns:
             str: Agent response.
         """
+        started = time.perf_counter()
+        budget = self.budget(timeout, max_steps)
+        recorder = ToolCallRecorder()
+        limiter = BudgetCallbackHandler(budget)
+        # Session memory and the response cache read sqlite, and summaries may call the LLM, so they run off the loop
+        cached = await asyncio.to_thread(self._cached_response, query, session_id)
+        if cached is not None:
+            return cached
+
+        with use_budget(budget):
+            route = self._route(query)
+            if route is not None:
+                try:
+                    if route.tool_name is None:
+                        return await asyncio.to_thread(
+                            self._finish, query, route.response, route.rule, started, session_id=session_id
+                        )
+                    tool = self.tools_by_name[route.tool_name]
+                    output = _check_route_output(await asyncio.wait_for(
+                        tool.arun(route.tool_input, callbacks=[recorder, limiter]), budget.remaining()
+                    ))
+                    return await asyncio.to_thread(
+                        self._finish, query, output, tool.name, started, recorder.calls, session_id=session_id
+                    )
+                except Exception as e:
+                    logging.warning(f"Fast-path route {route.rule} failed, falling back to the agent: {e}")
+
+            try:
+                agent_input = await asyncio.to_thread(self._agent_input, query, session_id)
+                result = await asyncio.wait_for(
+                    self.agent.ainvoke(agent_input, config={"callbacks": [recorder, limiter, *self.callbacks]}),
+                    budget.remaining(),
+                )
+                return await asyncio.to_thread(self._handle_result, query, result, started, recorder, limiter, session_id)
+
+            except (BudgetExceeded, asyncio.TimeoutError) as e:
+                budget.cancel()
+                return await asyncio.to_thread(self._handle_exhausted, query, e, started, recorder, limiter, session_id)
+
+            except Exception as e:
+                return self._handle_error(query, e)
+
+    def stream(self, query, timeout=None, max_steps=None, session_id=None):
+        """
+        Process a query and yield `StreamEvent`s as they happen.
+
+        Intermediate thoughts, tool start/end events and final-answer tokens are yielded while
+        the agent runs, followed by one `final` (or `error`) event with the complete response.
+        At the deadline, or when the consumer stops early, the run is told to stop.
+
+        Args:
+            query (str): User query.
+            timeout (float): Seconds the query may take; defaults to the agent's `timeout`.
+            max_steps (int): Tool calls the agent may make; defaults to the agent's `max_steps`.
+            session_id (str): Conversation the query belongs to, so it can refer to earlier turns.
+
+        Yields:
+            StreamEvent: Incremental events of the run.
+        """
+        started = time.perf_counter()
+        budget = self.budget(timeout, max_steps)
+        recorder = ToolCallRecorder()
+        limiter = BudgetCallbackHandler(budget)
+        cached = self._cached_response(query, session_id)
+        if cached is not None:
+            yield StreamEvent("final", cached)
+            return
+
+        route = self._route(query)
+        if route is not None:
+            try:
+                if route.tool_name is None:
+                    yield StreamEvent("final", self._finish(query, route.response, route.rule, started, session_id=session_id))
+                    return
+                tool = self.tools_by_name[route.tool_name]
+                yield StreamEvent("tool_start", route.tool_input, tool.name)
+                with use_budget(budget):
+                    output = tool.run(route.tool_input, callbacks=[recorder, limiter])
+                yield StreamEvent("tool_end", str(output), tool.name)
+                _check_route_output(output)
+                yield StreamEvent("final", self._finish(query, output, tool.name, started, recorder.calls, session_id=session_id), tool.name)
+                return
+            except Exception as e:
+                logging.warning(f"Fast-path route {route.rule} failed, falling back to the agent: {e}")
+
+        # The agent runs on a worker thread; its callbacks feed the queue drained here
+        events = queue.Queue()
+        outcome = {}
+
+        def run():
+            try:
+                with use_budget(budget):
+                    outcome["result"] = self.agent.invoke(
+                        self._agent_input(query, session_id),
+                        config={"callbacks": [StreamingCallbackHandler(events.put), recorder, limiter, *self.callbacks]},
+                    )
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                events.put(None)
+
+        worker = threading.Thread(target=run, name="agent-stream", daemon=True)
+        worker.start()
         try:
-            result = self.agent.invoke(query)
-            response = result.get("output", "No response")
+            while (event := events.get(timeout=budget.remaining())) is not None:
+                yield event
+        except queue.Empty:
+            # Out of time: the worker stops at its next budget check, without being waited for
+            budget.cancel()
+            yield StreamEvent("final", self._handle_exhausted(query, "deadline passed", started, recorder, limiter, session_id))
+            return
+        finally:
+            # Also stop the run if the consumer goes away early
+            budget.cancel()
+        worker.join()
+
+        if isinstance(outcome.get("error"), BudgetExceeded):
+            yield StreamEvent("final", self._handle_exhausted(query, outcome["error"], started, recorder, limiter, session_id))
+        elif "error" in outcome:
+            yield StreamEvent("error", self._handle_error(query, outcome["error"]))
+        else:
+            yield StreamEvent("final", self._handle_result(query, outcome["result"], started, recorder, limiter, session_id))
+
+    async def astream(self, query, timeout=None, max_steps=None, session_id=None):
+        """
+        Asynchronous counterpart of `stream`.
+
+        Args:
+            query (str): User query.
+            timeout (float): Seconds the query may take; defaults to the agent's `timeout`.
+            max_steps (int): Tool calls the agent may make; defaults to the agent's `max_steps`.
+            session_id (str): Conversation the query belongs to, so it can refer to earlier turns.
+
+        Yields:
+            StreamEvent: Incremental events of the run.
+        """
+        started = time.perf_counter()
+        budget = self.budget(timeout, max_steps)
+        recorder = ToolCallRecorder()
+        limiter = BudgetCallbackHandler(budget)
+        # Session memory and the response cache read sqlite, and summaries may call the LLM, so they run off the loop
+        cached = await asyncio.to_thread(self._cached_response, query, session_id)
+        if cached is not None:
+            yield StreamEvent("final", cached)
+            return
 
-            # Extract the tool used
-            tool_used = "Unknown"
-            thought_text = result.get("thought", "")
+        route = self._route(query)
+        if route is not None:
+            try:
+                if route.tool_name is None:
+                    response = await asyncio.to_thread(
+                        self._finish, query, route.response, route.rule, started, session_id=session_id
+                    )
+                    yield StreamEvent("final", response)
+                    return
+                tool = self.tools_by_name[route.tool_name]
+                yield StreamEvent("tool_start", route.tool_input, tool.name)
+                with use_budget(budget):
+                    output = await asyncio.wait_for(
+                        tool.arun(route.tool_input, callbacks=[recorder, limiter]), budget.remaining()
+                    )
+                yield StreamEvent("tool_end", str(output), tool.name)
+                _check_route_output(output)
+                response = await asyncio.to_thread(
+                    self._finish, query, output, tool.name, started, recorder.calls, session_id=session_id
+                )
+                yield StreamEvent("final", response, tool.name)
+                return
+            except Exception as e:
+                logging.warning(f"Fast-path route {route.rule} failed, falling back to the agent: {e}")
 
-            if "Action:" in thought_text:
-                thought_lines = thought_text.split("\n")
-                for line in thought_lines:
-                    if "Action:" in line:
-                        tool_used = line.replace("Action:", "").strip()
-                        break
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        handler = StreamingCallbackHandler(lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+        agent_input = await asyncio.to_thread(self._agent_input, query, session_id)
+        # The task copies the current context, budget included, when it is created
+        with use_budget(budget):
+            task = asyncio.ensure_future(self.agent.ainvoke(
+                agent_input, config={"callbacks": [handler, recorder, limiter, *self.callbacks]}
+            ))
+        task.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
 
-            self.log_interaction(query, response, tool_used)
-            return response
+        try:
+            while (event := await asyncio.wait_for(events.get(), budget.remaining())) is not None:
+                yield event
+        except asyncio.TimeoutError:
+            budget.cancel()
+            task.cancel()
+            yield StreamEvent("final", await asyncio.to_thread(
+                self._handle_exhausted, query, "deadline passed", started, recorder, limiter, session_id
+            ))
+            return
+        finally:
+            # Stop the run if the consumer goes away early
+            if not task.done():
+                budget.cancel()
+                task.cancel()
 
+        try:
+            result = await task
+        except BudgetExceeded as e:
+            yield StreamEvent("final", await asyncio.to_thread(self._handle_exhausted, query, e, started, recorder, limiter, session_id))
+            return
         except Exception as e:
-            error_message = str(e)
-            self.log_error(query, error_message)
-            logging.error(f"Error processing query: {error_message}")
-            return "An error occurred while processing your request. Please try again later."
+            yield StreamEvent("error", self._handle_error(query, e))
+            return
+        yield StreamEvent("final", await asyncio.to_thread(self._handle_result, query, result, started, recorder, limiter, session_id))
+
+    def _cached_response(self, query, session_id=None):
+        """
+        Return and log a cached answer for `query`, or None on a miss.
+
+        Follow-up questions of a session may depend on its earlier turns, so they always miss.
+        """
+        if self.response_cache is None or (session_id is not None and self.memory.has_history(session_id)):
+            return None
+
+        started = time.perf_counter()
+        entry = self.response_cache.get(query)
+        if entry is None:
+            return None
+
+        return self._finish(query, entry.response, entry.tool_name, started, cache=False, session_id=session_id)
+
+    def _agent_input(self, query, session_id=None):
+        """The agent's input for `query`: the query itself, after the session's conversation so far if any."""
+        history = self.memory.context(session_id) if session_id is not None else ""
+        if not history:
+            return query
+        return f"{history}\n\nCurrent question (it may refer to the conversation above): {query}"
+
+    def _route(self, query):
+        """Return a confident fast-path route for `query` and record the decision."""
+        if self.router is None:
+            return None
+
+        decision = self.router.classify(query)
+        if decision is None:
+            self.log_writer.log_route(query, None, None, 0.0, False)
+            return None
+
+        routed = self.router.accepts(decision)
+        self.log_writer.log_route(query, decision.rule, decision.tool_name, decision.confidence, routed)
+        if not routed:
+            return None
+
+        logging.info(f"Fast-path route {decision.rule} -> {decision.tool_name or 'direct response'} "
+                     f"(confidence {decision.confidence:.2f})")
+        return decision
+
+    def _handle_result(self, query, result, started=None, recorder=None, limiter=None, session_id=None):
+        """
+        Extract the response and the tools used from an agent result and log them.
+
+        Tool calls come from `recorder`, with their wall time, or else from the result's
+        `intermediate_steps`; the answer is attributed to the last tool called. A run the
+        executor stopped at its own limits gets the partial answer from `limiter`.
+        """
+        response = result.get("output", "No response")
+
+        tool_calls = recorder.calls if recorder is not None else []
+        if not tool_calls:
+            tool_calls = [
+                ToolCall(step, action.tool, str(action.tool_input)[:MAX_INPUT_CHARS], len(str(observation)))
+                for step, (action, observation) in enumerate(result.get("intermediate_steps") or [])
+            ]
+        if limiter is not None and str(response).startswith(_EXECUTOR_STOPPED):
+            return self._handle_exhausted(query, response, started, limiter=limiter, session_id=session_id,
+                                          tool_calls=tool_calls)
+        tool_used = tool_calls[-1].tool if tool_calls else NO_TOOL
+
+        return self._finish(query, response, tool_used, started, tool_calls, session_id=session_id)
+
+    def _handle_exhausted(self, query, reason, started=None, recorder=None, limiter=None, session_id=None,
+                          tool_calls=None):
+        """
+        Log and return the best partial answer of a query that ran out of time or steps.
+
+        The answer is the last tool output the run produced; it is not cached.
+        """
+        response, tool_used = limiter.partial_answer()
+        if tool_calls is None:
+            tool_calls = recorder.calls if recorder is not None else []
+        logging.warning(f"Query stopped early after {limiter.budget.steps} steps, returning a partial answer: {reason}")
+        return self._finish(query, response, tool_used or NO_TOOL, started, tool_calls, cache=False,
+                            session_id=session_id)
+
+    def _finish(self, query, response, tool_used, started=None, tool_calls=(), cache=True, session_id=None):
+        """
+        Log and, with `cache`, cache a successful response, and add it to the conversation of `session_id`.
+
+        `started` is the `perf_counter` time the query arrived; `tool_calls` are the `ToolCall`s behind the answer.
+        Only the first turn of a session is cached, since later answers may depend on the conversation,
+        and answers that describe a failure are never cached.
+        """
+        latency_ms = _elapsed_ms(started) if started is not None else None
+        if session_id is not None:
+            cache = cache and not self.memory.has_history(session_id)
+        self.log_interaction(query, response, tool_used, latency_ms, tool_calls, session_id)
+        if session_id is not None:
+            self.memory.add(session_id, query, response)
+        if cache and self.response_cache is not None and is_cacheable(response):
+            self.response_cache.put(query, response, tool_used)
+        return response
+
+    def _handle_error(self, query, error):
+        """Log a processing error and return the user-facing error message."""
+        error_message = str(error)
+        self.log_error(query, error_message)
+        logging.error(f"Error processing query: {error_message}")
+        return "An error occurred while processing your request. Please try again later."
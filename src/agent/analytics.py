@@ -0,0 +1,282 @@
+"""
+Aggregate queries over the chat history, answered from hourly rollups.
+
+`hourly_tool_stats` and `daily_latency_hist` are kept current by insert triggers (see
+`agent.database`), so usage, error rates and latency percentiles read a few rows per hour
+or day and tool instead of scanning `chat_log` and `error_log`. Time bounds are rounded
+down to the hour, and to the day for latency percentiles. `refresh` recomputes the rollups from the raw rows, e.g. from a periodic job after
+a bulk import; `export_columns` hands raw rows to NumPy for ad-hoc analysis.
+
+    python -m agent.analytics --since 2024-06-01
+"""
+import argparse
+import sqlite3
+
+from agent.database import DB_PATH, init_db, rebuild_rollups, to_epoch
+
+# Columns of `export_columns`: (name, SQL expression, NumPy dtype) per table
+EXPORT_COLUMNS = {
+    "chat_log": (
+        ("id", "id", "int64"),
+        ("ts", "COALESCE(ts, 0)", "int64"),
+        ("tool_id", "COALESCE(tool_id, 0)", "int64"),
+        ("latency_ms", "latency_ms", "float64"),
+        ("question_chars", "COALESCE(length(question), 0)", "int64"),
+        ("answer_chars", "COALESCE(length(answer), 0)", "int64"),
+    ),
+    "error_log": (
+        ("id", "id", "int64"),
+        ("ts", "COALESCE(ts, 0)", "int64"),
+        ("tool_id", "COALESCE(tool_id, 0)", "int64"),
+    ),
+    "routing_log": (
+        ("id", "id", "int64"),
+        ("ts", "COALESCE(ts, 0)", "int64"),
+        ("tool_id", "COALESCE(tool_id, 0)", "int64"),
+        ("confidence", "confidence", "float64"),
+        ("routed", "COALESCE(routed, 0)", "int8"),
+    ),
+}
+
+
+def _period_range(since, until, column="hour", period=3600):
+    """SQL condition and parameters selecting rollup periods in `[since, until)`."""
+    conditions, params = [], []
+    if since is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(to_epoch(since) // period * period)
+    if until is not None:
+        conditions.append(f"{column} < ?")
+        params.append(to_epoch(until) // period * period)
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def _query(db_path, sql, params=()):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def tool_usage(db_path=DB_PATH, since=None, until=None, period=3600):
+    """
+    Questions answered per tool and period.
+
+    Args:
+        db_path (str): Chat history database.
+        since: Start of the range (epoch, datetime or ISO string).
+        until: End of the range, exclusive.
+        period (int): Period length in seconds, a multiple of an hour (3600 per hour, 86400 per day).
+
+    Returns:
+        list[tuple]: `(period start epoch, tool name or None, questions)`, oldest first.
+    """
+    if period % 3600:
+        raise ValueError("period must be a multiple of 3600 seconds")
+    where, params = _period_range(since, until, "s.hour")
+    return _query(
+        db_path,
+        f"""
+        SELECT s.hour / ? * ? AS start, t.name, SUM(s.questions)
+        FROM hourly_tool_stats s LEFT JOIN tools t ON t.id = s.tool_id
+        {where}
+        GROUP BY start, s.tool_id
+        HAVING SUM(s.questions) > 0
+        ORDER BY start, t.name
+        """,
+        [period, period, *params],
+    )
+
+
+def error_rates(db_path=DB_PATH, since=None, until=None):
+    """
+    Questions, errors and error rate per tool.
+
+    Errors not attributed to a tool are reported under None.
+
+    Returns:
+        dict: Tool name -> `{"questions", "errors", "error_rate"}`.
+    """
+    where, params = _period_range(since, until, "s.hour")
+    rows = _query(
+        db_path,
+        f"""
+        SELECT t.name, SUM(s.questions), SUM(s.errors)
+        FROM hourly_tool_stats s LEFT JOIN tools t ON t.id = s.tool_id
+        {where}
+        GROUP BY s.tool_id
+        """,
+        params,
+    )
+    return {
+        name: {
+            "questions": questions,
+            "errors": errors,
+            "error_rate": errors / (questions + errors) if questions + errors else 0.0,
+        }
+        for name, questions, errors in rows
+    }
+
+
+def _percentile(histogram, bounds, fraction):
+    """Value below which `fraction` of a `{bucket: count}` histogram lies, interpolated in its bucket."""
+    total = sum(histogram.values())
+    target = fraction * total
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if seen + count >= target:
+            lower = bounds[bucket - 1] if bucket > 0 else 0.0
+            return lower + (bounds[bucket] - lower) * ((target - seen) / count)
+        seen += count
+    return bounds[max(histogram)]
+
+
+def latency_percentiles(db_path=DB_PATH, since=None, until=None, percentiles=(50, 95)):
+    """
+    Answer latency per tool, from the latency histograms.
+
+    Percentiles are accurate to the histogram resolution (buckets 10% wide); the range is
+    rounded down to whole days.
+
+    Returns:
+        dict: Tool name -> `{"count", "mean_ms", "p50_ms", ...}` with one key per percentile.
+    """
+    hours, hour_params = _period_range(since, until, "hour", 86400)
+    days, day_params = _period_range(since, until, "day", 86400)
+    with sqlite3.connect(db_path) as conn:
+        bounds = dict(conn.execute("SELECT bucket, upper_ms FROM latency_buckets"))
+        names = dict(conn.execute("SELECT id, name FROM tools"))
+        totals = conn.execute(
+            f"SELECT tool_id, SUM(latency_count), SUM(latency_sum_ms) FROM hourly_tool_stats {hours} "
+            f"GROUP BY tool_id HAVING SUM(latency_count) > 0",
+            hour_params,
+        ).fetchall()
+        histograms = {}
+        for tool_id, bucket, count in conn.execute(
+            f"SELECT tool_id, bucket, SUM(count) FROM daily_latency_hist {days} GROUP BY tool_id, bucket",
+            day_params,
+        ):
+            histograms.setdefault(tool_id, {})[bucket] = count
+
+    result = {}
+    for tool_id, count, total_ms in totals:
+        histogram = histograms.get(tool_id)
+        if not histogram:
+            # Latencies counted in hours whose day has no histogram in the range
+            continue
+        stats = {"count": count, "mean_ms": total_ms / count}
+        for p in percentiles:
+            stats[f"p{p}_ms"] = _percentile(histogram, bounds, p / 100)
+        result[names.get(tool_id)] = stats
+    return result
+
+
+def tool_call_stats(db_path=DB_PATH, since=None, until=None):
+    """
+    Calls, failures, wall time and output size per tool, from the individual `tool_calls`.
+
+    Unlike the per-answer statistics, every tool an answer needed is counted, not only the last.
+
+    Returns:
+        dict: Tool name -> `{"calls", "errors", "mean_ms", "max_ms", "mean_output_chars"}`.
+    """
+    where, params = _period_range(since, until, "k.ts", 1)
+    rows = _query(
+        db_path,
+        f"""
+        SELECT t.name, COUNT(*), COUNT(k.error), AVG(k.latency_ms), MAX(k.latency_ms), AVG(k.output_chars)
+        FROM tool_calls k LEFT JOIN tools t ON t.id = k.tool_id
+        {where}
+        GROUP BY k.tool_id
+        """,
+        params,
+    )
+    return {
+        name: {"calls": calls, "errors": errors, "mean_ms": mean_ms, "max_ms": max_ms, "mean_output_chars": chars}
+        for name, calls, errors, mean_ms, max_ms, chars in rows
+    }
+
+
+def refresh(db_path=DB_PATH, since=None):
+    """
+    Recompute the rollups from the raw log rows.
+
+    Args:
+        db_path (str): Chat history database.
+        since: Recompute hours from this time on; defaults to the first full hour of the
+            oldest raw row, so rollups of hours already removed by retention are kept.
+    """
+    init_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        if since is None:
+            oldest = conn.execute(
+                "SELECT MIN(ts) FROM (SELECT MIN(ts) AS ts FROM chat_log UNION ALL SELECT MIN(ts) FROM error_log)"
+            ).fetchone()[0]
+            if oldest is None:
+                return
+            since = -(-oldest // 3600) * 3600
+        rebuild_rollups(conn, to_epoch(since))
+
+
+def export_columns(db_path=DB_PATH, table="chat_log", since=None, until=None):
+    """
+    Export raw log rows as one NumPy array per column, for ad-hoc analysis.
+
+    Missing latencies are NaN and a missing tool is `tool_id` 0; `tool_names` maps ids to names.
+
+    Returns:
+        dict: Column name -> `numpy.ndarray`, see `EXPORT_COLUMNS`, plus `tool_names`.
+    """
+    import numpy as np
+
+    columns = EXPORT_COLUMNS[table]
+    conditions, params = [], []
+    if since is not None:
+        conditions.append("ts >= ?")
+        params.append(to_epoch(since))
+    if until is not None:
+        conditions.append("ts < ?")
+        params.append(to_epoch(until))
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(f"SELECT {', '.join(sql for _, sql, _ in columns)} FROM {table}{where} ORDER BY id",
+                            params).fetchall()
+        tool_names = dict(conn.execute("SELECT id, name FROM tools"))
+
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    exported = {name: np.array(column, dtype=dtype) for (name, _, dtype), column in zip(columns, values)}
+    exported["tool_names"] = tool_names
+    return exported
+
+
+def _format_report(db_path, since, until):
+    """Error rate and latency per tool as a text table."""
+    errors = error_rates(db_path, since, until)
+    latency = latency_percentiles(db_path, since, until)
+    lines = [f"{'tool':<24} {'questions':>9} {'errors':>7} {'err %':>6} {'p50 ms':>9} {'p95 ms':>9}"]
+    for name in sorted(set(errors) | set(latency), key=lambda name: name or ""):
+        e = errors.get(name, {"questions": 0, "errors": 0, "error_rate": 0.0})
+        lat = latency.get(name, {})
+        p50 = f"{lat['p50_ms']:9.0f}" if lat else f"{'-':>9}"
+        p95 = f"{lat['p95_ms']:9.0f}" if lat else f"{'-':>9}"
+        lines.append(f"{(name or '(none)')[:24]:<24} {e['questions']:9} {e['errors']:7} "
+                     f"{e['error_rate'] * 100:6.1f} {p50} {p95}")
+    return "\n".join(lines)
+
+
+def main():
+    """Print tool usage statistics from the command line."""
+    parser = argparse.ArgumentParser(description="Tool usage, error rates and latency from the chat history.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--since", help="ISO date or time, inclusive.")
+    parser.add_argument("--until", help="ISO date or time, exclusive.")
+    parser.add_argument("--refresh", action="store_true", help="Recompute the rollups from the raw logs first.")
+    args = parser.parse_args()
+
+    if args.refresh:
+        refresh(args.db)
+    print(_format_report(args.db, args.since, args.until))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Per-query deadlines and step budgets.
+
+Every query runs under a `Budget`: a deadline and a maximum number of agent steps. The
+budget of the running query is kept in a context variable, so code deep inside a tool can
+shorten its own timeouts to the time that is left (`clip`) or stop early (`check`) without
+the budget being passed through every call. `BudgetCallbackHandler` enforces the budget
+between LLM tokens, agent steps and tool calls, and remembers the tool observations the
+agent uses for a partial answer once the budget runs out.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Load environment variables
+load_dotenv()
+# Seconds a query may take, and the tool calls the agent may make for it
+QUERY_TIMEOUT = float(os.getenv("AGENT_QUERY_TIMEOUT", "60"))
+MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "6"))
+
+# Shortest timeout handed to a network call; a timeout of 0 would mean none for some clients
+MIN_TIMEOUT = 0.1
+
+# Answer when the budget runs out before any tool returned something usable
+EXHAUSTED_MESSAGE = "I could not finish answering in time. Please try again or ask a more specific question."
+
+_current = contextvars.ContextVar("agent_budget", default=None)
+
+
+class BudgetExceeded(TimeoutError):
+    """Raised when a query has used up its time or its steps."""
+
+
+class Budget:
+    """Deadline and step count of one query."""
+
+    def __init__(self, timeout=QUERY_TIMEOUT, max_steps=MAX_STEPS, clock=time.monotonic):
+        """
+        Args:
+            timeout (float): Seconds from now until the deadline; None for no deadline.
+            max_steps (int): Tool calls the agent may make; None for no limit.
+            clock (callable): Monotonic clock in seconds.
+        """
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.clock = clock
+        self.deadline = clock() + timeout if timeout is not None else None
+        self.steps = 0
+        self.cancelled = False
+
+    def remaining(self):
+        """Seconds left until the deadline (never negative), or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.clock())
+
+    @property
+    def expired(self):
+        """Whether the query was cancelled or its deadline has passed."""
+        return self.cancelled or (self.deadline is not None and self.clock() >= self.deadline)
+
+    def cancel(self):
+        """Ask the work still running for this query to stop at its next check."""
+        self.cancelled = True
+
+    def check(self):
+        """Raise `BudgetExceeded` if the query was cancelled or is out of time."""
+        if self.cancelled:
+            raise BudgetExceeded("The query was cancelled.")
+        if self.expired:
+            raise BudgetExceeded(f"The query ran out of its {self.timeout:g}s time budget.")
+
+    def step(self):
+        """Count one agent step; raise `BudgetExceeded` once more than `max_steps` were taken."""
+        self.check()
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise BudgetExceeded(f"The query used up its budget of {self.max_steps} steps.")
+
+    def clip(self, timeout):
+        """
+        Shorten a timeout to the time left, checking the budget first.
+
+        Returns `timeout` unchanged without a deadline, and the time left when `timeout` is None.
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        remaining = max(MIN_TIMEOUT, remaining)
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+def current():
+    """Budget of the query running in this context, or None."""
+    return _current.get()
+
+
+@contextmanager
+def use(budget):
+    """Make `budget` the current budget inside the block."""
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def check():
+    """Raise `BudgetExceeded` if the current query is out of budget; no-op outside a query."""
+    budget = _current.get()
+    if budget is not None:
+        budget.check()
+
+
+def clip(timeout):
+    """Shorten `timeout` to the time left for the current query; unchanged outside a query."""
+    budget = _current.get()
+    return timeout if budget is None else budget.clip(timeout)
+
+
+class BudgetCallbackHandler(BaseCallbackHandler):
+    """
+    Stops an agent run once its budget is used up.
+
+    The budget is checked before every LLM call and tool call and on every streamed token, and
+    each agent action counts as a step. Errors raised here are not swallowed by LangChain, so
+    the run ends with `BudgetExceeded`. Tool outputs are kept in `observations`.
+    """
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.observations = []
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.budget.check()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.budget.check()
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.budget.check()
+
+    def on_agent_action(self, action, **kwargs):
+        self.budget.step()
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self.budget.check()
+
+    def on_tool_end(self, output, **kwargs):
+        self.observations.append((kwargs.get("name"), str(output)))
+
+    def partial_answer(self):
+        """
+        Best answer available when the run stopped early.
+
+        Returns:
+            tuple: `(answer, tool name)`, the last tool output that is not empty, or
+            `EXHAUSTED_MESSAGE` and None.
+        """
+        for name, output in reversed(self.observations):
+            if output.strip():
+                return output, name
+        return EXHAUSTED_MESSAGE, None
@@ -0,0 +1,385 @@
+import datetime
+import logging
+import sqlite3
+
+# Default location of the chat history database (relative to the working directory)
+DB_PATH = "chat_history.db"
+
+# Version stored in `PRAGMA user_version` once every migration has run
+SCHEMA_VERSION = 6
+
+# Log tables that carry an epoch `ts` column and are subject to retention
+LOG_TABLES = ("chat_log", "error_log", "routing_log")
+
+# Tables whose rows are removed by retention: the log tables and the tool calls of each answer
+RETAINED_TABLES = LOG_TABLES + ("tool_calls",)
+
+
+def connect(db_path=DB_PATH, **kwargs):
+    """Open a connection configured for concurrent readers and a single writer."""
+    conn = sqlite3.connect(db_path, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def to_epoch(value):
+    """Epoch seconds of a time bound given as epoch seconds, a datetime/date or an ISO string."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return int(value.timestamp())
+
+
+def init_db(db_path=DB_PATH):
+    """Create necessary tables in the database if they do not exist, then migrate them."""
+    with sqlite3.connect(db_path) as conn:
+        # Let compaction return freed pages to the OS; only applies before the first table exists
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor = conn.cursor()
+
+        # Tools table
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tools (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                description TEXT
+            )
+            """
+        )
+
+        # Chat log table
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                question TEXT,
+                answer TEXT,
+                tool_id INTEGER,
+                FOREIGN KEY (tool_id) REFERENCES tools(id)
+            )
+            """
+        )
+
+        # Error log table
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS error_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                error_message TEXT,
+                query TEXT,
+                tool_id INTEGER,
+                FOREIGN KEY (tool_id) REFERENCES tools(id)
+            )
+            """
+        )
+
+        # Routing decisions of the fast-path router
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS routing_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                query TEXT,
+                rule TEXT,
+                tool_id INTEGER,
+                confidence REAL,
+                routed INTEGER,
+                FOREIGN KEY (tool_id) REFERENCES tools(id)
+            )
+            """
+        )
+
+        conn.commit()
+
+        migrate(conn)
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _migrate_epoch_timestamps(conn):
+    """
+    Version 2: integer epoch `ts` columns with indexes, and per-day per-tool aggregates.
+
+    The TEXT `timestamp` column is kept for existing readers; `ts` is backfilled from it
+    (stored as local time) and is what queries and retention use.
+    """
+    for table in LOG_TABLES:
+        if "ts" not in _columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN ts INTEGER")
+        conn.execute(
+            f"UPDATE {table} SET ts = CAST(strftime('%s', timestamp, 'utc') AS INTEGER) "
+            f"WHERE ts IS NULL AND timestamp IS NOT NULL"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_ts ON {table} (ts)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_tool_ts ON {table} (tool_id, ts)")
+
+    # Rows past the retention window are rolled up here before they are removed
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_tool_stats (
+            day TEXT NOT NULL,
+            tool_id INTEGER NOT NULL,
+            questions INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            routed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, tool_id)
+        )
+        """
+    )
+
+
+def _migrate_full_text_search(conn):
+    """
+    Version 3: `chat_fts`, an FTS5 index over `chat_log` questions and answers.
+
+    The index stores no copy of the text (external content) and is kept in sync by triggers;
+    prefixes of 2 to 4 characters are indexed so prefix searches avoid merging postings.
+    SQLite builds without FTS5 skip it; history search then reports that it is unavailable.
+    """
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS chat_fts USING fts5(
+                question, answer,
+                content='chat_log', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        logging.warning(f"Full-text search is unavailable in this SQLite build: {e}")
+        return
+
+    # Separate statements: `executescript` would commit the migration's transaction
+    for trigger in (
+        """
+        CREATE TRIGGER IF NOT EXISTS chat_log_fts_insert AFTER INSERT ON chat_log BEGIN
+            INSERT INTO chat_fts (rowid, question, answer) VALUES (new.id, new.question, new.answer);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS chat_log_fts_delete AFTER DELETE ON chat_log BEGIN
+            INSERT INTO chat_fts (chat_fts, rowid, question, answer)
+            VALUES ('delete', old.id, old.question, old.answer);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS chat_log_fts_update AFTER UPDATE OF question, answer ON chat_log BEGIN
+            INSERT INTO chat_fts (chat_fts, rowid, question, answer)
+            VALUES ('delete', old.id, old.question, old.answer);
+            INSERT INTO chat_fts (rowid, question, answer) VALUES (new.id, new.question, new.answer);
+        END
+        """,
+    ):
+        conn.execute(trigger)
+    conn.execute("INSERT INTO chat_fts (chat_fts) VALUES ('rebuild')")
+
+
+def _latency_bucket_bounds():
+    """Upper bounds in ms of the latency histogram buckets: 1 ms to 10 min, each 10% wider."""
+    bounds = [1.0]
+    while bounds[-1] < 600_000:
+        bounds.append(round(bounds[-1] * 1.1, 3))
+    return bounds
+
+
+# Bucket of `new.latency_ms`; larger values fall into the last bucket
+_BUCKET_OF_NEW = "COALESCE((SELECT MIN(bucket) FROM latency_buckets WHERE upper_ms >= new.latency_ms), " \
+                 "(SELECT MAX(bucket) FROM latency_buckets))"
+
+
+def _migrate_hourly_rollups(conn):
+    """
+    Version 4: answer latency and hourly per-tool rollups kept current by insert triggers.
+
+    `hourly_tool_stats` counts questions, errors and latency per hour and tool (`tool_id` 0 for
+    none). `daily_latency_hist` holds a latency histogram per UTC day (epoch of midnight) and
+    tool, so percentiles over a range come from a few rows per day instead of the raw log.
+    """
+    if "latency_ms" not in _columns(conn, "chat_log"):
+        conn.execute("ALTER TABLE chat_log ADD COLUMN latency_ms REAL")
+
+    conn.execute("CREATE TABLE IF NOT EXISTS latency_buckets (bucket INTEGER PRIMARY KEY, upper_ms REAL NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_latency_buckets_upper ON latency_buckets (upper_ms)")
+    conn.executemany(
+        "INSERT OR IGNORE INTO latency_buckets (bucket, upper_ms) VALUES (?, ?)",
+        enumerate(_latency_bucket_bounds()),
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS hourly_tool_stats (
+            hour INTEGER NOT NULL,
+            tool_id INTEGER NOT NULL,
+            questions INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            latency_count INTEGER NOT NULL DEFAULT 0,
+            latency_sum_ms REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, tool_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_latency_hist (
+            day INTEGER NOT NULL,
+            tool_id INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, tool_id, bucket)
+        ) WITHOUT ROWID
+        """
+    )
+
+    for trigger in (
+        """
+        CREATE TRIGGER IF NOT EXISTS chat_log_rollup AFTER INSERT ON chat_log WHEN new.ts IS NOT NULL BEGIN
+            INSERT INTO hourly_tool_stats (hour, tool_id, questions, latency_count, latency_sum_ms)
+            VALUES (new.ts / 3600 * 3600, COALESCE(new.tool_id, 0), 1,
+                    new.latency_ms IS NOT NULL, COALESCE(new.latency_ms, 0))
+            ON CONFLICT (hour, tool_id) DO UPDATE SET
+                questions = questions + 1,
+                latency_count = latency_count + excluded.latency_count,
+                latency_sum_ms = latency_sum_ms + excluded.latency_sum_ms;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS chat_log_latency_rollup AFTER INSERT ON chat_log
+        WHEN new.ts IS NOT NULL AND new.latency_ms IS NOT NULL BEGIN
+            INSERT INTO daily_latency_hist (day, tool_id, bucket, count)
+            VALUES (new.ts / 86400 * 86400, COALESCE(new.tool_id, 0), {_BUCKET_OF_NEW}, 1)
+            ON CONFLICT (day, tool_id, bucket) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS error_log_rollup AFTER INSERT ON error_log WHEN new.ts IS NOT NULL BEGIN
+            INSERT INTO hourly_tool_stats (hour, tool_id, errors)
+            VALUES (new.ts / 3600 * 3600, COALESCE(new.tool_id, 0), 1)
+            ON CONFLICT (hour, tool_id) DO UPDATE SET errors = errors + 1;
+        END
+        """,
+    ):
+        conn.execute(trigger)
+    rebuild_rollups(conn, since=0)
+
+
+def rebuild_rollups(conn, since):
+    """
+    Recompute the rollups from the raw log rows: hours from the hour of `since` on, histograms
+    from the first day that starts at or after `since`.
+
+    Rollups of earlier periods are kept, so they survive the retention of their raw rows. A day
+    whose early hours may already be gone keeps its histogram rather than losing their latencies.
+    """
+    since = since // 3600 * 3600
+    day = -(-since // 86400) * 86400
+    conn.execute("DELETE FROM hourly_tool_stats WHERE hour >= ?", (since,))
+    conn.execute("DELETE FROM daily_latency_hist WHERE day >= ?", (day,))
+    conn.execute(
+        """
+        INSERT INTO hourly_tool_stats (hour, tool_id, questions, errors, latency_count, latency_sum_ms)
+        SELECT hour, tool_id, SUM(questions), SUM(errors), SUM(latency_count), SUM(latency_sum_ms) FROM (
+            SELECT ts / 3600 * 3600 AS hour, COALESCE(tool_id, 0) AS tool_id, 1 AS questions, 0 AS errors,
+                   latency_ms IS NOT NULL AS latency_count, COALESCE(latency_ms, 0) AS latency_sum_ms
+            FROM chat_log WHERE ts >= :since
+            UNION ALL
+            SELECT ts / 3600 * 3600, COALESCE(tool_id, 0), 0, 1, 0, 0
+            FROM error_log WHERE ts >= :since
+        )
+        GROUP BY hour, tool_id
+        """,
+        {"since": since},
+    )
+    conn.execute(
+        """
+        INSERT INTO daily_latency_hist (day, tool_id, bucket, count)
+        SELECT ts / 86400 * 86400, COALESCE(tool_id, 0),
+               COALESCE((SELECT MIN(bucket) FROM latency_buckets WHERE upper_ms >= latency_ms),
+                        (SELECT MAX(bucket) FROM latency_buckets)) AS bucket,
+               COUNT(*)
+        FROM chat_log WHERE ts >= :day AND latency_ms IS NOT NULL
+        GROUP BY 1, 2, 3
+        """,
+        {"day": day},
+    )
+
+
+def _migrate_tool_calls(conn):
+    """Version 5: `tool_calls`, every tool invocation behind a `chat_log` answer with its wall time."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tool_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            step INTEGER NOT NULL,
+            ts INTEGER,
+            tool_id INTEGER,
+            input TEXT,
+            output_chars INTEGER,
+            latency_ms REAL,
+            error TEXT,
+            FOREIGN KEY (chat_id) REFERENCES chat_log(id),
+            FOREIGN KEY (tool_id) REFERENCES tools(id)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_calls_chat ON tool_calls (chat_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_calls_ts ON tool_calls (ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_calls_tool_ts ON tool_calls (tool_id, ts)")
+
+
+def _migrate_sessions(conn):
+    """
+    Version 6: `chat_log.session_id` and `session_summaries`, the conversation memory.
+
+    Each summary covers the turns of its session up to `through_id`; the turns after it are
+    replayed verbatim.
+    """
+    if "session_id" not in _columns(conn, "chat_log"):
+        conn.execute("ALTER TABLE chat_log ADD COLUMN session_id TEXT")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chat_log_session ON chat_log (session_id, id) WHERE session_id IS NOT NULL"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            through_id INTEGER NOT NULL,
+            ts INTEGER
+        )
+        """
+    )
+
+
+# Migration that brings the schema to each version; version 1 is the original set of tables
+MIGRATIONS = {
+    2: _migrate_epoch_timestamps,
+    3: _migrate_full_text_search,
+    4: _migrate_hourly_rollups,
+    5: _migrate_tool_calls,
+    6: _migrate_sessions,
+}
+
+
+def migrate(conn):
+    """Apply the migrations newer than the database's `user_version`, each in its own transaction."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target in sorted(target for target in MIGRATIONS if target > version):
+        logging.info(f"Migrating chat history schema to version {target}")
+        with conn:
+            MIGRATIONS[target](conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+
+    # Databases created before auto_vacuum was set need one full VACUUM to switch modes
+    if version < 2 and conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
@@ -0,0 +1,223 @@
+"""
+Ranked full-text search over past questions and answers.
+
+Uses the `chat_fts` FTS5 index maintained by triggers on `chat_log`:
+
+    python -m agent.history_search "blood pressure" --tool BloodPressureSearch --since 2024-01-01
+"""
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+import unicodedata
+
+from dotenv import load_dotenv
+
+from agent.database import DB_PATH, to_epoch
+
+# Load environment variables
+load_dotenv()
+# Newest matching conversations ranked per search
+CANDIDATES = int(os.getenv("CHAT_SEARCH_CANDIDATES", "200"))
+
+_TERMS = re.compile(r"(\w+)(\*?)", re.UNICODE)
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+# Markers around matched terms in snippets
+HIGHLIGHT = ("[", "]")
+
+# Ranking weights: a match in the question counts double; BM25 term saturation and length normalization
+QUESTION_WEIGHT = 2.0
+ANSWER_WEIGHT = 1.0
+K1 = 1.2
+B = 0.75
+
+# Newest matching conversations, the pool that is ranked
+_CANDIDATES = """
+    SELECT c.id, c.ts, t.name, c.question, c.answer
+    FROM chat_fts
+    JOIN chat_log c ON c.id = chat_fts.rowid
+    LEFT JOIN tools t ON t.id = c.tool_id
+    WHERE chat_fts MATCH :query
+    {filters}
+    ORDER BY chat_fts.rowid DESC
+    LIMIT :candidates
+"""
+
+_SNIPPETS = f"""
+    SELECT rowid,
+           snippet(chat_fts, 0, '{HIGHLIGHT[0]}', '{HIGHLIGHT[1]}', '…', 12),
+           snippet(chat_fts, 1, '{HIGHLIGHT[0]}', '{HIGHLIGHT[1]}', '…', 24)
+    FROM chat_fts
+    WHERE chat_fts MATCH ? AND rowid IN ({{ids}})
+"""
+
+
+class SearchHit:
+    """One matching conversation; a higher `score` is more relevant."""
+
+    __slots__ = ("id", "ts", "tool", "question", "answer", "score")
+
+    def __init__(self, id, ts, tool, question, answer, score):
+        self.id = id
+        self.ts = ts
+        self.tool = tool
+        self.question = question
+        self.answer = answer
+        self.score = score
+
+    @property
+    def time(self):
+        """Local time of the conversation."""
+        return datetime.datetime.fromtimestamp(self.ts) if self.ts is not None else None
+
+    def __repr__(self):
+        return f"SearchHit(id={self.id}, tool={self.tool!r}, question={self.question!r})"
+
+
+def to_fts_query(text):
+    """
+    Turn free text into an FTS5 query that matches every word.
+
+    Words are quoted so FTS5 operators and punctuation in user input are taken literally;
+    a word ending in `*` matches as a prefix. Prefixes are opt-in: the index keeps prefixes
+    of up to 4 characters, and longer ones make FTS5 merge the postings of every matching word.
+    """
+    terms = _TERMS.findall(text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"{star}' for term, star in terms)
+
+
+def _tokens(text):
+    """Lower-cased words without diacritics, close to the index's unicode61 tokenizer."""
+    text = unicodedata.normalize("NFKD", text or "")
+    return _WORDS.findall("".join(ch for ch in text if not unicodedata.combining(ch)).casefold())
+
+
+def _score(terms, columns, average_lengths):
+    """BM25 over the candidate pool, summed across the weighted question and answer columns."""
+    score = 0.0
+    for (weight, words), average in zip(columns, average_lengths):
+        if not words:
+            continue
+        norm = K1 * (1 - B + B * len(words) / average)
+        for term, prefix in terms:
+            tf = sum(1 for word in words if word.startswith(term)) if prefix else words.count(term)
+            score += weight * tf * (K1 + 1) / (tf + norm)
+    return score
+
+
+def _rank(terms, rows, limit):
+    """
+    Order candidate rows by relevance, newest first on ties.
+
+    Every candidate contains every query word, so document frequencies would weigh all of them
+    the same; only term frequency and length are scored. This avoids FTS5's `bm25()`, which
+    counts the matches of each word across the whole index on every search.
+    """
+    if not rows:
+        return []
+    tokenized = [(_tokens(row[3]), _tokens(row[4])) for row in rows]
+    average_lengths = [max(1.0, sum(len(words[i]) for words in tokenized) / len(rows)) for i in (0, 1)]
+    scored = [
+        (_score(terms, ((QUESTION_WEIGHT, question), (ANSWER_WEIGHT, answer)), average_lengths), row)
+        for row, (question, answer) in zip(rows, tokenized)
+    ]
+    scored.sort(key=lambda item: (-item[0], -item[1][0]))
+    return scored[:limit]
+
+
+def search_history(db_path=DB_PATH, text="", tool=None, since=None, until=None, limit=10, conn=None,
+                   candidates=None):
+    """
+    Search past conversations, best matches first.
+
+    Only the newest `candidates` matching conversations are ranked, which keeps the cost
+    bounded when a common word matches a large part of the history.
+
+    Args:
+        db_path (str): Chat history database.
+        text (str): Words to look for in questions and answers.
+        tool (str): Only conversations answered by this tool.
+        since: Only conversations at or after this time (epoch, datetime or ISO string).
+        until: Only conversations before this time.
+        limit (int): Maximum number of hits.
+        conn (sqlite3.Connection): Connection to reuse instead of opening `db_path`.
+        candidates (int): Newest matches to rank; defaults to `CANDIDATES`.
+
+    Returns:
+        list[SearchHit]: Hits with highlighted snippets of the question and answer.
+    """
+    query = to_fts_query(text)
+    if query is None:
+        return []
+
+    filters, params = [], {"query": query, "candidates": candidates or CANDIDATES, "limit": limit}
+    if tool is not None:
+        filters.append("AND t.name = :tool")
+        params["tool"] = tool
+    # Rows are logged in time order, so time bounds also become rowid bounds FTS5 can seek to
+    if since is not None:
+        filters.append("AND chat_fts.rowid >= (SELECT id FROM chat_log WHERE ts >= :since ORDER BY ts LIMIT 1) "
+                       "AND c.ts >= :since")
+        params["since"] = to_epoch(since)
+    if until is not None:
+        filters.append("AND chat_fts.rowid <= (SELECT id FROM chat_log WHERE ts < :until ORDER BY ts DESC LIMIT 1) "
+                       "AND c.ts < :until")
+        params["until"] = to_epoch(until)
+    sql = _CANDIDATES.format(filters="\n".join(filters))
+    terms = [(_tokens(term)[0], bool(star)) for term, star in _TERMS.findall(text) if _tokens(term)]
+
+    own = conn is None
+    if own:
+        conn = sqlite3.connect(db_path)
+    try:
+        ranked = _rank(terms, conn.execute(sql, params).fetchall(), limit)
+        # Snippets only for the hits that are returned
+        ids = [row[0] for _, row in ranked]
+        snippets = {
+            row[0]: row[1:]
+            for row in conn.execute(_SNIPPETS.format(ids=", ".join("?" * len(ids))), [query, *ids])
+        } if ids else {}
+    except sqlite3.OperationalError as e:
+        if "no such table" in str(e):
+            raise RuntimeError("Full-text search is not available: the chat_fts index does not exist.") from e
+        raise
+    finally:
+        if own:
+            conn.close()
+    return [
+        SearchHit(id, ts, tool, *snippets.get(id, (question, answer)), score)
+        for score, (id, ts, tool, question, answer) in ranked
+    ]
+
+
+def format_hits(hits):
+    """Render hits as readable text, one block per conversation."""
+    if not hits:
+        return "No matching conversations."
+    blocks = []
+    for hit in hits:
+        when = hit.time.strftime("%Y-%m-%d %H:%M") if hit.time else "unknown time"
+        blocks.append(f"#{hit.id} {when} [{hit.tool or 'no tool'}]\n  Q: {hit.question}\n  A: {hit.answer}")
+    return "\n".join(blocks)
+
+
+def main():
+    """Search the chat history from the command line."""
+    parser = argparse.ArgumentParser(description="Search past questions and answers.")
+    parser.add_argument("text", help="Words to search for.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--tool", help="Only conversations answered by this tool.")
+    parser.add_argument("--since", help="ISO date or time, inclusive.")
+    parser.add_argument("--until", help="ISO date or time, exclusive.")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    print(format_hits(search_history(args.db, args.text, args.tool, args.since, args.until, args.limit)))
+
+
+if __name__ == "__main__":
+    main()
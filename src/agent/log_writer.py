@@ -0,0 +1,196 @@
+import atexit
+import datetime
+import logging
+import queue
+import threading
+import time
+
+from agent.database import DB_PATH, connect
+from agent.profiling import span
+
+_FLUSH = "flush"
+_STOP = "stop"
+
+
+def _now():
+    """Return the current time as `(local TEXT timestamp, epoch seconds)`."""
+    now = time.time()
+    return datetime.datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"), int(now)
+
+
+class LogWriter:
+    """
+    Background writer for `chat_log`, `error_log`, `routing_log` and `session_summaries`.
+
+    Rows are queued by the caller and written by a single thread that keeps one
+    long-lived WAL connection, caches tool ids in memory and commits in batches.
+    """
+
+    def __init__(self, db_path=DB_PATH, flush_interval=1.0, batch_size=50):
+        """
+        Start the writer thread.
+
+        Args:
+            db_path (str): Path to the SQLite database.
+            flush_interval (float): Maximum seconds a queued row waits before commit.
+            batch_size (int): Number of queued rows that triggers an immediate commit.
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue()
+        self._tool_ids = {}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log_interaction(self, query, response, tool_name, latency_ms=None, tool_calls=(), session_id=None):
+        """Queue a conversation row for the given tool, with the time taken and the `ToolCall`s behind it."""
+        self._queue.put(("chat", (*_now(), query, response, tool_name, latency_ms, tuple(tool_calls), session_id)))
+
+    def log_error(self, query, error_message, tool_name=None):
+        """Queue an error row, optionally linked to a tool."""
+        self._queue.put(("error", (*_now(), error_message, query, tool_name)))
+
+    def log_route(self, query, rule, tool_name, confidence, routed):
+        """Queue a routing decision of the fast-path router."""
+        self._queue.put(("route", (*_now(), query, rule, tool_name, confidence, routed)))
+
+    def save_summary(self, session_id, summary, kept):
+        """
+        Queue the summary of a session's turns, all but the newest `kept` ones.
+
+        Turns are queued before the summary, so the writer can find the last summarized turn.
+        """
+        self._queue.put(("summary", (*_now(), session_id, summary, kept)))
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Commit pending rows and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_STOP, None))
+        self._thread.join(timeout)
+
+    def _run(self):
+        """Drain the queue, committing whenever the batch is full or the interval elapses."""
+        conn = connect(self.db_path)
+        pending = []
+        waiters = []
+        deadline = None
+
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                kind, payload = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind, payload = None, None
+
+            if kind in ("chat", "error", "route", "summary"):
+                pending.append((kind, payload))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            elif kind == _FLUSH:
+                waiters.append(payload)
+
+            if kind in (_FLUSH, _STOP) or len(pending) >= self.batch_size or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                self._write(conn, pending)
+                pending = []
+                deadline = None
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+
+            if kind == _STOP:
+                break
+
+        conn.close()
+
+    def _write(self, conn, rows):
+        """Insert a batch of rows in a single transaction."""
+        if not rows:
+            return
+        try:
+            with span("log_writer.write", "sqlite", rows=len(rows)), conn:
+                for kind, payload in rows:
+                    if kind == "chat":
+                        timestamp, ts, query, response, tool_name, latency_ms, tool_calls, session_id = payload
+                        tool_id = self._tool_id(conn, tool_name, create=True)
+                        chat_id = conn.execute(
+                            "INSERT INTO chat_log (timestamp, ts, question, answer, tool_id, latency_ms, session_id) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (timestamp, ts, query, response, tool_id, latency_ms, session_id),
+                        ).lastrowid
+                        if tool_calls:
+                            conn.executemany(
+                                "INSERT INTO tool_calls (chat_id, step, ts, tool_id, input, output_chars, "
+                                "latency_ms, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                [
+                                    (chat_id, call.step, ts, self._tool_id(conn, call.tool, create=True), call.input,
+                                     call.output_chars, call.latency_ms, call.error)
+                                    for call in tool_calls
+                                ],
+                            )
+                    elif kind == "route":
+                        timestamp, ts, query, rule, tool_name, confidence, routed = payload
+                        tool_id = self._tool_id(conn, tool_name, create=True) if tool_name else None
+                        conn.execute(
+                            "INSERT INTO routing_log (timestamp, ts, query, rule, tool_id, confidence, routed) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (timestamp, ts, query, rule, tool_id, confidence, int(routed)),
+                        )
+                    elif kind == "summary":
+                        timestamp, ts, session_id, summary, kept = payload
+                        conn.execute(
+                            """
+                            INSERT INTO session_summaries (session_id, summary, through_id, ts)
+                            SELECT ?, ?, id, ? FROM chat_log WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                            ON CONFLICT (session_id) DO UPDATE SET
+                                summary = excluded.summary, through_id = excluded.through_id, ts = excluded.ts
+                            """,
+                            (session_id, summary, ts, session_id, kept),
+                        )
+                    else:
+                        timestamp, ts, error_message, query, tool_name = payload
+                        tool_id = self._tool_id(conn, tool_name) if tool_name else None
+                        conn.execute(
+                            "INSERT INTO error_log (timestamp, ts, error_message, query, tool_id) VALUES (?, ?, ?, ?, ?)",
+                            (timestamp, ts, error_message, query, tool_id),
+                        )
+        except Exception as e:
+            # Ids cached inside a rolled-back transaction may not exist anymore
+            self._tool_ids.clear()
+            logging.error(f"Error writing {len(rows)} log rows: {e}")
+
+    def _tool_id(self, conn, tool_name, create=False):
+        """Return the id of `tool_name`, using the in-memory cache when possible."""
+        tool_id = self._tool_ids.get(tool_name)
+        if tool_id is not None:
+            return tool_id
+
+        row = conn.execute("SELECT id FROM tools WHERE name = ?", (tool_name,)).fetchone()
+        if row is not None:
+            tool_id = row[0]
+        elif create:
+            cursor = conn.execute(
+                "INSERT INTO tools (name, description) VALUES (?, ?)",
+                (tool_name, "Undefined description"),
+            )
+            tool_id = cursor.lastrowid
+        else:
+            return None
+
+        self._tool_ids[tool_name] = tool_id
+        return tool_id
@@ -0,0 +1,254 @@
+"""
+Per-session conversation memory with a bounded prompt size.
+
+The last `MEMORY_TURNS` turns of a session are replayed verbatim; older turns are folded,
+one at a time, into a running summary. The summary and the replayed turns together stay
+within `MEMORY_TOKENS`, so the context added to a prompt does not grow with the length of
+the conversation. Sessions are loaded from `chat_log` on first use, reading only the turns
+after the stored summary, and the least recently used sessions are dropped from memory.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+
+from dotenv import load_dotenv
+
+from agent.database import DB_PATH
+
+# Load environment variables
+load_dotenv()
+# Turns replayed verbatim, token budget of the whole memory block and of the summary within it
+MEMORY_TURNS = int(os.getenv("AGENT_MEMORY_TURNS", "4"))
+MEMORY_TOKENS = int(os.getenv("AGENT_MEMORY_TOKENS", "600"))
+SUMMARY_TOKENS = int(os.getenv("AGENT_MEMORY_SUMMARY_TOKENS", "200"))
+# Sessions kept in memory
+MEMORY_SESSIONS = int(os.getenv("AGENT_MEMORY_SESSIONS", "256"))
+# Let the agent's LLM write the summaries (one extra call per folded turn) instead of extracting them
+MEMORY_LLM_SUMMARY = os.getenv("AGENT_MEMORY_LLM_SUMMARY", "").lower() in ("1", "true", "yes")
+
+# Rough size of a token in characters, for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Seconds to wait for the log writer to commit a session's latest turns before loading it
+_FLUSH_TIMEOUT = 2.0
+
+# Unsummarized turns read when loading a session; older ones are left out of the summary
+_MAX_CATCH_UP = 20
+
+# Characters of an answer kept in a summary line
+_SUMMARY_ANSWER_CHARS = 160
+
+_SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+_RECENT_HEADER = "Recent turns:\n"
+
+_SUMMARY_PROMPT = """Progressively summarize the conversation, adding the new turn to the summary.
+Keep names, places, tickers and numbers the user may refer back to. Answer with the new summary only.
+
+Current summary:
+{summary}
+
+New turn:
+User: {question}
+Assistant: {answer}
+
+New summary:"""
+
+
+def estimate_tokens(text):
+    """Approximate number of tokens in `text`."""
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def truncate(text, max_tokens):
+    """Cut `text` to about `max_tokens` tokens, marking the cut with an ellipsis."""
+    text = text or ""
+    limit = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:max(0, limit - 1)].rstrip() + "…"
+
+
+def extractive_summary(summary, question, answer, max_tokens=SUMMARY_TOKENS):
+    """
+    Add a turn to a summary without calling a model.
+
+    Each turn becomes one line with the question and the start of the answer; the oldest lines
+    are dropped once the summary exceeds `max_tokens`.
+    """
+    answer = " ".join((answer or "").split())
+    if len(answer) > _SUMMARY_ANSWER_CHARS:
+        answer = answer[:_SUMMARY_ANSWER_CHARS - 1].rstrip() + "…"
+    lines = summary.splitlines() if summary else []
+    lines.append(f"- {' '.join(question.split())} -> {answer}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate("\n".join(lines), max_tokens)
+
+
+def llm_summarizer(llm, max_tokens=SUMMARY_TOKENS):
+    """
+    Return a summarizer that asks `llm` to fold each turn into the summary.
+
+    Costs one model call per folded turn; falls back to `extractive_summary` when the call fails.
+    """
+    def summarize(summary, question, answer):
+        prompt = _SUMMARY_PROMPT.format(summary=summary or "(empty)", question=question, answer=answer)
+        try:
+            result = llm.invoke(prompt)
+            text = getattr(result, "content", result).strip()
+        except Exception as e:
+            logging.warning(f"Summarizing the conversation failed, keeping an extractive summary: {e}")
+            return extractive_summary(summary, question, answer, max_tokens)
+        return truncate(text, max_tokens) if text else extractive_summary(summary, question, answer, max_tokens)
+
+    return summarize
+
+
+class _Session:
+    """Summary and verbatim turns of one session."""
+
+    __slots__ = ("summary", "turns", "lock")
+
+    def __init__(self, summary, turns):
+        self.summary = summary
+        self.turns = turns
+        self.lock = threading.Lock()
+
+
+class ConversationMemory:
+    """
+    Conversation context of each session, for follow-up questions.
+
+    `context` returns the text to put in front of a session's next question; `add` records an
+    answered turn. Summaries are written through the log writer, after the turns they cover.
+    """
+
+    def __init__(self, db_path=DB_PATH, log_writer=None, turns=MEMORY_TURNS, max_tokens=MEMORY_TOKENS,
+                 summary_tokens=SUMMARY_TOKENS, max_sessions=MEMORY_SESSIONS, summarizer=None):
+        """
+        Args:
+            db_path (str): Chat history database the sessions are loaded from.
+            log_writer (LogWriter): Writer of the chat history; flushed (briefly) before a session is loaded,
+                and used to store summaries. Without one, summaries only live in memory.
+            turns (int): Turns replayed verbatim.
+            max_tokens (int): Token budget of the context block.
+            summary_tokens (int): Token budget of the summary within it.
+            max_sessions (int): Sessions kept in memory, least recently used first out.
+            summarizer (callable): `(summary, question, answer) -> summary`; extractive by default.
+        """
+        self.db_path = db_path
+        self.log_writer = log_writer
+        self.turns = turns
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.max_sessions = max_sessions
+        self.summarizer = summarizer or (
+            lambda summary, question, answer: extractive_summary(summary, question, answer, summary_tokens)
+        )
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def context(self, session_id):
+        """
+        Text describing the conversation so far, within the token budget, or "" for a new session.
+
+        The summary comes first, then as many of the newest turns as fit; answers are shortened
+        so that a single long answer cannot use up the budget.
+        """
+        session = self._session(session_id)
+        with session.lock:
+            summary, turns = session.summary, list(session.turns)
+        if not summary and not turns:
+            return ""
+
+        parts = []
+        used = estimate_tokens(_RECENT_HEADER) if turns else 0
+        if summary:
+            parts.append(_SUMMARY_HEADER + truncate(summary, self.summary_tokens))
+            used += estimate_tokens(parts[0]) + 1
+
+        # Each turn may use an equal share of what the summary left
+        share = max(2, (self.max_tokens - used) // max(1, len(turns))) if turns else 0
+        recent = []
+        for question, answer in reversed(turns):
+            turn = f"User: {truncate(question, share // 2 - 2)}\nAssistant: {truncate(answer, share // 2 - 3)}"
+            if used + estimate_tokens(turn) + 1 > self.max_tokens:
+                break
+            recent.append(turn)
+            used += estimate_tokens(turn) + 1
+        if recent:
+            parts.append(_RECENT_HEADER + "\n".join(reversed(recent)))
+        return "\n\n".join(parts)
+
+    def add(self, session_id, question, answer):
+        """Record an answered turn, folding the oldest verbatim turn into the summary when there are too many."""
+        session = self._session(session_id)
+        with session.lock:
+            session.turns.append((question, answer))
+            if len(session.turns) <= self.turns:
+                return
+            old_question, old_answer = session.turns.popleft()
+            session.summary = self.summarizer(session.summary, old_question, old_answer)
+            summary, kept = session.summary, len(session.turns)
+        if self.log_writer is not None:
+            self.log_writer.save_summary(session_id, summary, kept)
+
+    def has_history(self, session_id):
+        """Whether the session has earlier turns."""
+        session = self._session(session_id)
+        with session.lock:
+            return bool(session.summary or session.turns)
+
+    def forget(self, session_id):
+        """Drop a session from memory; it is loaded again from the database on next use."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _session(self, session_id):
+        """Return the state of a session, loading it from the database on first use."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+
+        session = self._load(session_id)
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep the first one
+            session = self._sessions.setdefault(session_id, session)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def _load(self, session_id):
+        """
+        Read a session's summary and the turns after it.
+
+        Turns beyond the verbatim window that the stored summary does not cover yet (e.g. after
+        a crash) are folded in now, up to `_MAX_CATCH_UP` of them.
+        """
+        if self.log_writer is not None and not self.log_writer.flush(_FLUSH_TIMEOUT):
+            logging.warning(f"Loading conversation {session_id} before its latest turns were written.")
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT summary, through_id FROM session_summaries WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                summary, through_id = row if row else ("", 0)
+                rows = conn.execute(
+                    "SELECT question, answer FROM chat_log WHERE session_id = ? AND id > ? ORDER BY id DESC LIMIT ?",
+                    (session_id, through_id, self.turns + _MAX_CATCH_UP),
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            logging.warning(f"Could not load conversation {session_id}: {e}")
+            return _Session("", deque())
+
+        rows.reverse()
+        folded = rows[:-self.turns] if self.turns else rows
+        for question, answer in folded:
+            summary = self.summarizer(summary, question, answer)
+        session = _Session(summary, deque(rows[len(folded):]))
+        if folded and self.log_writer is not None:
+            self.log_writer.save_summary(session_id, summary, len(session.turns))
+        return session
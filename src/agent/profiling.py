@@ -0,0 +1,277 @@
+"""
+Opt-in instrumentation of the agent pipeline.
+
+Set `AGENT_PROFILE=1` to record timed spans for `Agent.process`, LLM calls (with token counts),
+tool calls (with payload sizes) and lazy tool imports into a ring buffer. Reports are written
+to `AGENT_PROFILE_DIR` when the agent closes: a summary table and a Chrome trace-event JSON
+(open in chrome://tracing or Perfetto). `AGENT_PROFILE_CPROFILE=1` also dumps a `cProfile`
+file per query. When profiling is off the decorators return the original functions, so the
+only cost is a flag check at import time.
+"""
+import asyncio
+import cProfile
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Load environment variables
+load_dotenv()
+
+ENABLED = os.getenv("AGENT_PROFILE", "").lower() in ("1", "true", "yes")
+CPROFILE = os.getenv("AGENT_PROFILE_CPROFILE", "").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("AGENT_PROFILE_DIR", "profiles")
+BUFFER_SIZE = int(os.getenv("AGENT_PROFILE_BUFFER", "10000"))
+
+_ORIGIN_NS = time.perf_counter_ns()
+
+
+class SpanRecorder:
+    """Thread-safe ring buffer of finished spans."""
+
+    def __init__(self, maxlen=BUFFER_SIZE):
+        self.spans = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, name, category, start_ns, end_ns, **attrs):
+        """Store a finished span; times are `perf_counter_ns` values."""
+        span = {
+            "name": name,
+            "cat": category,
+            "ts": (start_ns - _ORIGIN_NS) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "tid": threading.get_ident(),
+            "args": attrs,
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    def snapshot(self):
+        """Return a copy of the buffered spans."""
+        with self._lock:
+            return list(self.spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def summary(self):
+        """Aggregate spans by name: count, total/mean/p95/max milliseconds and summed numeric args."""
+        groups = {}
+        for span in self.snapshot():
+            groups.setdefault((span["cat"], span["name"]), []).append(span)
+
+        rows = []
+        for (category, name), spans in sorted(groups.items()):
+            durations = sorted(span["dur"] / 1000 for span in spans)
+            totals = {}
+            for span in spans:
+                for key, value in span["args"].items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        totals[key] = totals.get(key, 0) + value
+            rows.append({
+                "category": category,
+                "name": name,
+                "count": len(durations),
+                "total_ms": sum(durations),
+                "mean_ms": sum(durations) / len(durations),
+                "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                "max_ms": durations[-1],
+                **totals,
+            })
+        return rows
+
+    def summary_table(self):
+        """Render `summary` as a fixed-width text table."""
+        lines = [f"{'category':<10} {'span':<40} {'count':>6} {'total ms':>10} {'mean ms':>9} "
+                 f"{'p95 ms':>9} {'max ms':>9}  extra"]
+        for row in self.summary():
+            extra = ", ".join(
+                f"{key}={value}" for key, value in row.items()
+                if key not in ("category", "name", "count", "total_ms", "mean_ms", "p95_ms", "max_ms")
+            )
+            lines.append(
+                f"{row['category']:<10} {row['name'][:40]:<40} {row['count']:>6} {row['total_ms']:>10.1f} "
+                f"{row['mean_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['max_ms']:>9.1f}  {extra}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Return the spans as a Chrome trace-event document."""
+        pid = os.getpid()
+        events = [
+            {"name": span["name"], "cat": span["cat"], "ph": "X", "ts": span["ts"], "dur": span["dur"],
+             "pid": pid, "tid": span["tid"], "args": span["args"]}
+            for span in self.snapshot()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+RECORDER = SpanRecorder()
+_query_ids = itertools.count(1)
+
+
+class span:
+    """Context manager that records a span; attributes can be added with `set()` before it ends."""
+
+    __slots__ = ("name", "category", "attrs", "_start")
+
+    def __init__(self, name, category="app", **attrs):
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if ENABLED:
+            if exc_type is not None:
+                self.attrs["error"] = exc_type.__name__
+            RECORDER.record(self.name, self.category, self._start, time.perf_counter_ns(), **self.attrs)
+        return False
+
+
+def _payload_size(value):
+    """Size in characters of a call payload."""
+    return len(value) if isinstance(value, (str, bytes)) else len(str(value))
+
+
+def profiled(name, category="app", payload=False, cprofile=False):
+    """
+    Decorate a sync or async function so each call is recorded as a span.
+
+    With `payload`, the sizes of the first argument and of the result are recorded. With
+    `cprofile`, each call is also run under `cProfile` when `AGENT_PROFILE_CPROFILE` is set.
+    Returns the function unchanged when profiling is disabled.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        def start(args):
+            attrs = {}
+            if payload and args:
+                attrs["input_chars"] = _payload_size(args[-1])
+            return span(name, category, **attrs)
+
+        def finish(current, result):
+            if payload:
+                current.set(output_chars=_payload_size(result))
+            return result
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start(args) as current:
+                    return finish(current, await func(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start(args) as current:
+                if cprofile and CPROFILE:
+                    return finish(current, _run_cprofiled(func, args, kwargs))
+                return finish(current, func(*args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+def _run_cprofiled(func, args, kwargs):
+    """Run `func` under cProfile and dump the stats to `PROFILE_DIR`."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"query-{os.getpid()}-{next(_query_ids)}.prof")
+        profiler.dump_stats(path)
+        logging.info(f"cProfile stats written to {path}")
+
+
+def instrument_tools(tools):
+    """Wrap the `func` of each LangChain tool with a payload-recording span."""
+    if not ENABLED:
+        return tools
+    for tool in tools:
+        if not getattr(tool.func, "_profiled", False):
+            tool.func = profiled(f"tool:{tool.name}", "tool", payload=True)(tool.func)
+            tool.func._profiled = True
+    return tools
+
+
+class ProfilingCallbackHandler(BaseCallbackHandler):
+    """Records LLM steps with prompt size and token counts from LangChain callbacks."""
+
+    # Async runs only send `on_llm_start` to non-inline handlers when no handler is inline,
+    # and the budget handler is, so this one must be inline too
+    run_inline = True
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter_ns(), sum(len(prompt) for prompt in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start_ns, prompt_chars = self._starts.pop(run_id, (None, 0))
+        if start_ns is None:
+            return
+
+        attrs = {"prompt_chars": prompt_chars}
+        generations = [generation for batch in response.generations for generation in batch]
+        attrs["output_chars"] = sum(len(generation.text) for generation in generations)
+
+        # Ollama reports token counts per generation; OpenAI-style backends in `llm_output`
+        for generation in generations:
+            info = generation.generation_info or {}
+            for source, target in (("prompt_eval_count", "prompt_tokens"), ("eval_count", "completion_tokens")):
+                if isinstance(info.get(source), int):
+                    attrs[target] = attrs.get(target, 0) + info[source]
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for key in ("prompt_tokens", "completion_tokens"):
+            if isinstance(usage.get(key), int):
+                attrs[key] = usage[key]
+
+        RECORDER.record("llm", "llm", start_ns, time.perf_counter_ns(), **attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start_ns, prompt_chars = self._starts.pop(run_id, (None, 0))
+        if start_ns is not None:
+            RECORDER.record("llm", "llm", start_ns, time.perf_counter_ns(),
+                            prompt_chars=prompt_chars, error=type(error).__name__)
+
+
+def callbacks():
+    """Return the LangChain callback handlers to attach, empty when profiling is disabled."""
+    return [ProfilingCallbackHandler()] if ENABLED else []
+
+
+def write_reports(directory=PROFILE_DIR):
+    """Write the summary table and Chrome trace of the buffered spans; returns their paths."""
+    if not ENABLED:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    summary_path = os.path.join(directory, f"summary-{stamp}.txt")
+    trace_path = os.path.join(directory, f"trace-{stamp}.json")
+
+    with open(summary_path, "w", encoding="utf-8") as summary_file:
+        summary_file.write(RECORDER.summary_table() + "\n")
+    with open(trace_path, "w", encoding="utf-8") as trace_file:
+        json.dump(RECORDER.chrome_trace(), trace_file)
+
+    logging.info(f"Profiling reports written to {summary_path} and {trace_path}")
+    return summary_path, trace_path
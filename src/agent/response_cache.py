@@ -0,0 +1,243 @@
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from agent.database import DB_PATH, connect
+
+# Seconds a cached answer stays valid, by the tool that produced it
+DEFAULT_TTLS = {
+    "StockPrice": 60,
+    "WeatherTool": 600,
+    "InternetSearch": 3600,
+    "BloodPressureSearch": 86400,
+    "WebScraper": 86400,
+    "AdvancedWebScraper": 86400,
+}
+
+# Filler words that do not change the meaning of a question
+STOPWORDS = {
+    "a", "an", "the", "what", "whats", "s", "is", "are", "please", "tell", "me",
+    "can", "could", "you", "show", "give", "current", "currently", "now", "today",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize_query(query):
+    """
+    Reduce a query to a cache key: lowercase, no punctuation, no filler words.
+
+    "What's the weather in Berlin?" and "weather in berlin" share the key "weather in berlin".
+    """
+    text = _PUNCTUATION.sub("", query.lower().replace("'", ""))
+    words = [word for word in text.split() if word not in STOPWORDS]
+    return " ".join(words) if words else " ".join(text.split())
+
+
+def _cosine(a, b):
+    """Cosine similarity of two equal-length vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class CachedResponse:
+    """A cached answer and the tool that produced it."""
+
+    __slots__ = ("key", "query", "response", "tool_name", "embedding", "expires_at", "size")
+
+    def __init__(self, key, query, response, tool_name, embedding, expires_at):
+        self.key = key
+        self.query = query
+        self.response = response
+        self.tool_name = tool_name
+        self.embedding = embedding
+        self.expires_at = expires_at
+        self.size = len(key.encode("utf-8")) + len(query.encode("utf-8")) + len(response.encode("utf-8"))
+
+
+class ResponseCache:
+    """
+    LRU cache of agent answers keyed on the normalized query.
+
+    An optional `embedder` (callable returning a vector for a text) adds a similarity
+    tier that is consulted when the exact key misses. Entries are persisted to the
+    `response_cache` table so they survive restarts.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_entries=1000, max_bytes=16 * 1024 * 1024,
+                 ttls=None, default_ttl=300, embedder=None, similarity_threshold=0.92, persist=True):
+        """
+        Args:
+            db_path (str): SQLite database used for persistence.
+            max_entries (int): Maximum number of cached answers kept in memory.
+            max_bytes (int): Approximate memory bound for cached text.
+            ttls (dict): Per-tool TTLs in seconds, merged over `DEFAULT_TTLS`.
+            default_ttl (float): TTL for tools without an explicit entry.
+            embedder (callable): Optional `text -> list[float]` used for similarity lookups.
+            similarity_threshold (float): Minimum cosine similarity for a similarity hit.
+            persist (bool): Whether to store entries in `db_path`.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if persist:
+            self._conn = connect(db_path, check_same_thread=False)
+            self._init_table()
+            self._load()
+
+    def get(self, query):
+        """Return the `CachedResponse` for `query`, or None on a miss."""
+        key = normalize_query(query)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(entry)
+                entry = None
+
+            if entry is None and self.embedder is not None and self._entries:
+                entry = self._nearest(self._embed(key), now)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry.key)
+            self.hits += 1
+            return entry
+
+    def put(self, query, response, tool_name="Unknown"):
+        """Cache the answer to `query` with the TTL of `tool_name`."""
+        ttl = self.ttls.get(tool_name, self.default_ttl)
+        if ttl <= 0:
+            return
+
+        key = normalize_query(query)
+        embedding = self._embed(key) if self.embedder is not None else None
+        entry = CachedResponse(key, query, response, tool_name, embedding, time.time() + ttl)
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._insert(entry)
+            self._persist(entry)
+
+    def clear(self):
+        """Drop every cached answer, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM response_cache")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _embed(self, text):
+        """Embed `text`, disabling the similarity tier if the embedder fails."""
+        try:
+            return list(self.embedder(text))
+        except Exception as e:
+            logging.error(f"Error embedding query for the response cache: {e}")
+            return None
+
+    def _nearest(self, embedding, now):
+        """Return the most similar live entry above the threshold."""
+        if embedding is None:
+            return None
+
+        best, best_score = None, self.similarity_threshold
+        for entry in self._entries.values():
+            if entry.embedding is None or entry.expires_at <= now:
+                continue
+            score = _cosine(embedding, entry.embedding)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def _insert(self, entry):
+        """Add an entry and evict least recently used ones past the bounds."""
+        previous = self._entries.pop(entry.key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+
+        self._entries[entry.key] = entry
+        self._bytes += entry.size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries.values())))
+
+    def _remove(self, entry):
+        """Remove an entry from memory and disk."""
+        self._entries.pop(entry.key, None)
+        self._bytes -= entry.size
+        if self._conn is not None:
+            with self._conn:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (entry.key,))
+
+    def _init_table(self):
+        """Create the persistence table if it does not exist."""
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    query TEXT,
+                    response TEXT,
+                    tool_name TEXT,
+                    embedding TEXT,
+                    expires_at REAL
+                )
+                """
+            )
+
+    def _persist(self, entry):
+        """Write an entry to the persistence table."""
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache "
+                    "(key, query, response, tool_name, embedding, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (entry.key, entry.query, entry.response, entry.tool_name,
+                     json.dumps(entry.embedding) if entry.embedding is not None else None,
+                     entry.expires_at),
+                )
+        except Exception as e:
+            logging.error(f"Error persisting response cache entry: {e}")
+
+    def _load(self):
+        """Drop expired rows and load the freshest live ones into memory."""
+        now = time.time()
+        with self._conn:
+            self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        rows = self._conn.execute(
+            "SELECT key, query, response, tool_name, embedding, expires_at FROM response_cache "
+            "ORDER BY expires_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+
+        with self._lock:
+            # Insert oldest first so the freshest entries end up most recently used
+            for key, query, response, tool_name, embedding, expires_at in reversed(rows):
+                embedding = json.loads(embedding) if embedding else None
+                self._insert(CachedResponse(key, query, response, tool_name, embedding, expires_at))
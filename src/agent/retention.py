@@ -0,0 +1,113 @@
+"""
+Retention and compaction of the chat history database.
+
+Rows of `chat_log`, `error_log` and `routing_log` older than the retention window are rolled
+up into `daily_tool_stats` (one row per day and tool), optionally copied to an archive
+database together with their `tool_calls`, deleted, and the freed pages are returned with an
+incremental VACUUM.
+
+Run it periodically, e.g. from cron:
+
+    python -m agent.retention --days 90 --archive chat_archive.db
+"""
+import argparse
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+from agent.database import DB_PATH, RETAINED_TABLES, connect, init_db
+
+# Load environment variables
+load_dotenv()
+RETENTION_DAYS = int(os.getenv("CHAT_RETENTION_DAYS", "90"))
+ARCHIVE_PATH = os.getenv("CHAT_ARCHIVE_DB")
+
+_ROLLUP = """
+    INSERT INTO daily_tool_stats (day, tool_id, questions, errors, routed)
+    SELECT day, tool_id, SUM(questions), SUM(errors), SUM(routed) FROM (
+        SELECT date(ts, 'unixepoch') AS day, COALESCE(tool_id, 0) AS tool_id,
+               1 AS questions, 0 AS errors, 0 AS routed
+        FROM chat_log WHERE ts < :cutoff
+        UNION ALL
+        SELECT date(ts, 'unixepoch'), COALESCE(tool_id, 0), 0, 1, 0
+        FROM error_log WHERE ts < :cutoff
+        UNION ALL
+        SELECT date(ts, 'unixepoch'), COALESCE(tool_id, 0), 0, 0, routed
+        FROM routing_log WHERE ts < :cutoff
+    )
+    WHERE true
+    GROUP BY day, tool_id
+    ON CONFLICT (day, tool_id) DO UPDATE SET
+        questions = questions + excluded.questions,
+        errors = errors + excluded.errors,
+        routed = routed + excluded.routed
+"""
+
+
+def _attach_archive(conn, archive_path):
+    """Attach the archive database, creating its tables with the live schema."""
+    init_db(archive_path)
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+
+
+def compact(db_path=DB_PATH, retention_days=RETENTION_DAYS, archive_path=ARCHIVE_PATH, now=None):
+    """
+    Roll up, archive and delete log rows older than `retention_days`, then reclaim space.
+
+    Args:
+        db_path (str): Chat history database.
+        retention_days (int): Days of raw rows to keep.
+        archive_path (str): Optional database receiving a copy of the removed rows.
+        now (float): Current epoch time, for tests.
+
+    Returns:
+        dict: Rows removed per table and pages freed by the VACUUM.
+    """
+    cutoff = int(now if now is not None else time.time()) - retention_days * 86400
+    init_db(db_path)
+    conn = connect(db_path)
+    try:
+        if archive_path:
+            _attach_archive(conn, archive_path)
+
+        removed = {}
+        with conn:
+            conn.execute(_ROLLUP, {"cutoff": cutoff})
+            if archive_path:
+                conn.execute("INSERT OR IGNORE INTO archive.tools SELECT * FROM main.tools")
+            for table in RETAINED_TABLES:
+                if archive_path:
+                    columns = ", ".join(row[1] for row in conn.execute(f"PRAGMA main.table_info({table})"))
+                    conn.execute(
+                        f"INSERT OR IGNORE INTO archive.{table} ({columns}) "
+                        f"SELECT {columns} FROM main.{table} WHERE ts < ?",
+                        (cutoff,),
+                    )
+                removed[table] = conn.execute(f"DELETE FROM main.{table} WHERE ts < ?", (cutoff,)).rowcount
+
+        free_before = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        conn.execute("PRAGMA main.incremental_vacuum").fetchall()
+        freed = free_before - conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+
+    logging.info(f"Compacted chat history older than {retention_days} days: {removed}, {freed} pages freed.")
+    return {"removed": removed, "pages_freed": freed}
+
+
+def main():
+    """Run one compaction pass from the command line."""
+    parser = argparse.ArgumentParser(description="Compact the chat history database.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="Days of raw log rows to keep.")
+    parser.add_argument("--archive", default=ARCHIVE_PATH, help="Database that receives the removed rows.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    print(compact(args.db, args.days, args.archive))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import re
+
+from tools.gazetteer import get_gazetteer
+
+GREETING_RESPONSE = "Hello! How can I assist you today?"
+
+_GREETING = re.compile(
+    r"^\s*(hi|hello|hallo|hey|good (morning|afternoon|evening)|greetings|"
+    r"مرحبا|اهلا|أهلا|السلام عليكم)(\s+there)?\s*[!.؟?]*\s*$",
+    re.IGNORECASE,
+)
+# Time words that may follow the city ("weather in Berlin tomorrow") and are not part of it
+_TIME_SUFFIX = (
+    r"(?:right\s+now|now|today|tonight|tomorrow|this\s+(?:morning|afternoon|evening|week|weekend)|"
+    r"next\s+(?:week|weekend)|(?:on\s+)?(?:mon|tues|wednes|thurs|fri|satur|sun)day)"
+)
+_WEATHER = re.compile(
+    r"\b(weather|temperature|forecast)\b.*?\b(in|for|at)\s+(?P<city>[^\W\d_][\w .'-]*?)"
+    rf"(?:\s*,?\s+{_TIME_SUFFIX})*\s*[?.!؟]*\s*$",
+    re.IGNORECASE,
+)
+_WEATHER_KEYWORD = re.compile(r"\b(weather|temperature|forecast)\b", re.IGNORECASE)
+_TICKER_ONLY = re.compile(r"^\s*(?P<cashtag>\$)?(?P<ticker>[A-Z]{1,5}(\.[A-Z]{1,2})?)\s*[?.!]*\s*$")
+_STOCK = re.compile(r"\b(stock|share|shares|price|quote|ticker)\b", re.IGNORECASE)
+_TICKER_IN_TEXT = re.compile(r"(?:^|\s)\$?(?P<ticker>[A-Z]{1,5}(\.[A-Z]{1,2})?)(?=[\s?.!,]|$)")
+
+# Upper-case words that are not tickers
+_NOT_TICKERS = {"I", "A", "USD", "EUR", "THE", "WHAT", "IS", "OF", "FOR"}
+
+
+class Route:
+    """A routing decision: a tool call, a direct response, or a fall-through to the LLM agent."""
+
+    __slots__ = ("rule", "tool_name", "tool_input", "response", "confidence")
+
+    def __init__(self, rule, confidence, tool_name=None, tool_input=None, response=None):
+        self.rule = rule
+        self.confidence = confidence
+        self.tool_name = tool_name
+        self.tool_input = tool_input
+        self.response = response
+
+    def __repr__(self):
+        return f"Route(rule={self.rule!r}, tool={self.tool_name!r}, confidence={self.confidence})"
+
+
+class RuleRouter:
+    """
+    Pre-dispatch router that answers obvious intents without the ReAct loop.
+
+    Rules are compiled once; `route` returns the best matching `Route` or None when the
+    query is ambiguous and should go to the LLM agent.
+    """
+
+    def __init__(self, tool_names, threshold=0.8):
+        """
+        Args:
+            tool_names (Iterable[str]): Names of the tools the agent has loaded.
+            threshold (float): Minimum confidence for a fast-path route.
+        """
+        self.tool_names = set(tool_names)
+        self.threshold = threshold
+
+    def classify(self, query):
+        """Return the best `Route` for `query` regardless of the threshold, or None."""
+        greeting = _GREETING.match(query)
+        if greeting:
+            return Route("greeting", 0.95, response=GREETING_RESPONSE)
+
+        weather = _WEATHER.search(query)
+        if weather:
+            city = weather.group("city").strip()
+            # "temperature at which water boils" has the shape of a weather question but no place
+            if get_gazetteer().find(city):
+                return Route("weather_city", 0.9, "WeatherTool", city)
+            return Route("weather_unknown_city", 0.5, "WeatherTool", city)
+        if _WEATHER_KEYWORD.search(query):
+            # A weather question without a recognizable city needs the LLM
+            return Route("weather_no_city", 0.3, "WeatherTool")
+
+        ticker = _TICKER_ONLY.match(query)
+        if ticker and ticker.group("ticker") not in _NOT_TICKERS:
+            # "$AAPL" is a cashtag; a bare upper-case word ("HELP", "OK") is often not a ticker
+            confidence = 0.85 if ticker.group("cashtag") else 0.5
+            return Route("ticker_only", confidence, "StockPrice", ticker.group("ticker"))
+
+        if _STOCK.search(query):
+            tickers = [
+                match.group("ticker") for match in _TICKER_IN_TEXT.finditer(query)
+                if match.group("ticker") not in _NOT_TICKERS
+            ]
+            if len(tickers) == 1:
+                return Route("stock_ticker", 0.9, "StockPrice", tickers[0])
+            return Route("stock_ambiguous", 0.3, "StockPrice")
+
+        return None
+
+    def accepts(self, decision):
+        """Whether `decision` is confident enough and served by a loaded tool."""
+        if decision is None or decision.confidence < self.threshold:
+            return False
+        return decision.tool_name is None or decision.tool_name in self.tool_names
+
+    def route(self, query):
+        """Return a confident `Route` that can be served by a loaded tool, or None."""
+        decision = self.classify(query)
+        return decision if self.accepts(decision) else None
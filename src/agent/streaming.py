@@ -0,0 +1,157 @@
+import sys
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Marker the ReAct prompt uses to introduce the answer
+FINAL_ANSWER = "Final Answer:"
+
+
+class StreamEvent:
+    """
+    One incremental piece of an agent run.
+
+    Kinds:
+        thought     -> text delta of the model's intermediate reasoning
+        tool_start  -> `tool` is about to run with input `text`
+        tool_end    -> `tool` returned `text`
+        token       -> text delta of the final answer
+        final       -> the complete response in `text`
+        error       -> the user-facing error message in `text`
+    """
+
+    __slots__ = ("kind", "text", "tool")
+
+    def __init__(self, kind, text="", tool=None):
+        self.kind = kind
+        self.text = text
+        self.tool = tool
+
+    def to_dict(self):
+        """Return the event as a JSON-serializable dict."""
+        event = {"type": self.kind, "text": self.text}
+        if self.tool is not None:
+            event["tool"] = self.tool
+        return event
+
+    def __repr__(self):
+        return f"StreamEvent(kind={self.kind!r}, text={self.text!r}, tool={self.tool!r})"
+
+
+class _StepStream:
+    """Splits the tokens of one LLM step into thought and final-answer deltas."""
+
+    __slots__ = ("buffer", "emitted", "final", "started")
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = 0
+        self.final = False
+        self.started = False
+
+    def feed(self, token):
+        """Return the `(kind, text)` deltas made available by `token`."""
+        self.buffer += token
+        if self.final:
+            return self._answer(token)
+
+        marker = self.buffer.find(FINAL_ANSWER, self.emitted)
+        if marker < 0:
+            # Hold back a tail that could be the start of the marker
+            safe = max(self.emitted, len(self.buffer) - len(FINAL_ANSWER) + 1)
+            return self._thought(safe)
+
+        deltas = self._thought(marker)
+        self.final = True
+        self.emitted = marker + len(FINAL_ANSWER)
+        return deltas + self._answer(self.buffer[self.emitted:])
+
+    def flush(self):
+        """Return whatever thought text is still held back."""
+        return [] if self.final else self._thought(len(self.buffer))
+
+    def _thought(self, end):
+        text = self.buffer[self.emitted:end]
+        self.emitted = max(self.emitted, end)
+        return [("thought", text)] if text else []
+
+    def _answer(self, text):
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        return [("token", text)] if text else []
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callbacks of an agent run into `StreamEvent`s.
+
+    Events are passed to `emit`, which may be `queue.Queue.put` or a thread-safe hand-off to an
+    event loop; callbacks of a synchronous run arrive on the worker thread.
+    """
+
+    # Avoid a thread hop per token in async runs; `emit` must not block
+    run_inline = True
+
+    def __init__(self, emit):
+        self.emit = emit
+        self._steps = {}
+        self._tools = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._steps[run_id] = _StepStream()
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        step = self._steps.setdefault(run_id, _StepStream())
+        for kind, text in step.feed(token):
+            self.emit(StreamEvent(kind, text))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        step = self._steps.pop(run_id, None)
+        if step is not None:
+            for kind, text in step.flush():
+                self.emit(StreamEvent(kind, text))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._steps.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self._tools[run_id] = name
+        self.emit(StreamEvent("tool_start", str(input_str), name))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name = self._tools.pop(run_id, None) or kwargs.get("name")
+        self.emit(StreamEvent("tool_end", str(output), name))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        name = self._tools.pop(run_id, None) or kwargs.get("name")
+        self.emit(StreamEvent("tool_end", f"Error: {error}", name))
+
+
+def render(events, out=None, show_thoughts=False):
+    """
+    Print agent events as they arrive and return the final response.
+
+    Final-answer tokens are written without buffering; tool calls are shown on their own lines.
+    If the answer was not streamed token by token (cached, routed or non-streaming model), the
+    `final` event is printed instead.
+    """
+    out = out or sys.stdout
+    streamed = False
+    response = None
+    for event in events:
+        if event.kind == "token":
+            out.write(event.text)
+            streamed = True
+        elif event.kind == "thought" and show_thoughts:
+            out.write(event.text)
+        elif event.kind == "tool_start":
+            out.write(f"\n[{event.tool}] {event.text}\n")
+        elif event.kind in ("final", "error"):
+            response = event.text
+            if not streamed:
+                out.write(event.text)
+        out.flush()
+    out.write("\n")
+    out.flush()
+    return response
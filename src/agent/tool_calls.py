@@ -0,0 +1,71 @@
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Tool inputs longer than this are truncated in `tool_calls`
+MAX_INPUT_CHARS = 1000
+
+# Tool name logged for answers the model gave without calling a tool
+NO_TOOL = "LLM"
+
+
+class ToolCall:
+    """One tool invocation of an agent run, as stored in `tool_calls`."""
+
+    __slots__ = ("step", "tool", "input", "output_chars", "latency_ms", "error")
+
+    def __init__(self, step, tool, input, output_chars=0, latency_ms=None, error=None):
+        self.step = step
+        self.tool = tool
+        self.input = input
+        self.output_chars = output_chars
+        self.latency_ms = latency_ms
+        self.error = error
+
+    def __repr__(self):
+        return f"ToolCall(step={self.step}, tool={self.tool!r}, latency_ms={self.latency_ms!r})"
+
+
+class ToolCallRecorder(BaseCallbackHandler):
+    """
+    Records every tool the agent calls during one query, with its input, output size and wall time.
+
+    Pass a fresh recorder in the `callbacks` of each `invoke`/`run`; `calls` lists the finished
+    calls in the order they started.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.calls = []
+        self._running = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tool_used(self):
+        """Name of the last tool called, whose observation the answer is based on, or `NO_TOOL`."""
+        return self.calls[-1].tool if self.calls else NO_TOOL
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        with self._lock:
+            call = ToolCall(len(self.calls) + len(self._running), name, str(input_str)[:MAX_INPUT_CHARS])
+            self._running[run_id] = (call, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=f"{type(error).__name__}: {error}")
+
+    def _finish(self, run_id, output_chars=0, error=None):
+        with self._lock:
+            call, started = self._running.pop(run_id, (None, None))
+            if call is None:
+                return
+            call.latency_ms = (time.perf_counter() - started) * 1000
+            call.output_chars = output_chars
+            call.error = error
+            self.calls.append(call)
+            self.calls.sort(key=lambda finished: finished.step)
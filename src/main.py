@@ -3,7 +3,10 @@ import os
 import importlib
 import pkgutil
 import logging
+import uuid
 from agent.agent import Agent
+from agent.history_search import format_hits
+from agent.streaming import render
 
 # Add `src/` to `sys.path` to ensure `tools` can be imported
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
@@ -12,10 +15,16 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-def load_tools():
-    """Load all tools from the `tools` directory using `os.listdir()`."""
+def load_tools(lazy=True):
+    """
+    Load all tools from the `tools` directory.
+
+    With `lazy`, tools are built from the cached tool manifest and their modules (and heavy
+    dependencies) are only imported when a tool is first invoked.
+    """
     try:
         import tools
+        from tools.manifest import build_manifest, lazy_tool
     except ModuleNotFoundError:
         logging.error("Cannot import `tools/`. Ensure `src/` is added to `sys.path`.")
         return []
@@ -25,23 +34,33 @@ def load_tools():
 
     logging.info(f"Searching for tools in: {tools_dir}")
 
-    for file in os.listdir(tools_dir):
-        if file.endswith("_tool.py") and file != "__init__.py":
-            module_name = file[:-3]  # Remove `.py` extension
-            try:
-                logging.info(f"Attempting to load tool: {module_name}")
-                module = importlib.import_module(f"tools.{module_name}")
-                tool = getattr(module, module_name, None)
+    for file, entry in build_manifest(tools_dir).items():
+        module_name = file[:-3]  # Remove `.py` extension
+        try:
+            if lazy and entry["lazy"]:
+                tool = lazy_tool(entry)
+                loaded_tools.append(tool)
+                logging.info(f"Tool registered (imported on first use): {tool.name}")
+                continue
+
+            logging.info(f"Attempting to load tool: {module_name}")
+            module = importlib.import_module(f"tools.{module_name}")
+            tool = getattr(module, module_name, None)
 
-                if tool:
-                    loaded_tools.append(tool)
-                    logging.info(f"Tool loaded: {tool.name}")
-            except Exception as e:
-                logging.error(f"Error loading tool {module_name}: {e}")
+            if tool:
+                loaded_tools.append(tool)
+                logging.info(f"Tool loaded: {tool.name}")
+        except Exception as e:
+            logging.error(f"Error loading tool {module_name}: {e}")
 
     if not loaded_tools:
         logging.error("No tools were loaded. Ensure tools are correctly defined in `tools/`.")
 
+    if not lazy:
+        # Compile the routing keywords declared by the loaded tools once, up front
+        from tools.keyword_matcher import get_matcher
+        get_matcher()
+
     return loaded_tools
 
 def main():
@@ -53,6 +72,8 @@ def main():
         return
 
     agent = Agent(tools=tools)  # Pass loaded tools to `Agent`
+    # One conversation per run, so follow-up questions can refer to earlier answers
+    session_id = uuid.uuid4().hex
 
     while True:
         try:
@@ -62,8 +83,14 @@ def main():
                 logging.info("Program terminated. Goodbye!")
                 break
 
-            response = agent.process(user_query)
-            print(f"Response: {response}")
+            # "/search <words>" looks through earlier conversations instead of asking the agent
+            if user_query.lower().startswith("/search"):
+                print(format_hits(agent.search_history(user_query[len("/search"):])))
+                continue
+
+            # Print the answer as it is generated instead of waiting for the whole run
+            print("Response: ", end="", flush=True)
+            render(agent.stream(user_query, session_id=session_id))
 
         except KeyboardInterrupt:
             logging.warning("Program interrupted by user.")
@@ -71,5 +98,7 @@ def main():
         except Exception as e:
             logging.error(f"An error occurred: {e}")
 
+    agent.close()
+
 if __name__ == "__main__":
     main()
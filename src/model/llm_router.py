@@ -0,0 +1,355 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from dotenv import load_dotenv
+from langchain.llms.base import LLM
+from pydantic import Field
+
+from agent.budget import BudgetExceeded
+
+# Load environment variables
+load_dotenv()
+# JSON list of backends, e.g. [{"type": "ollama", "model": "llama3.2", "base_url": "http://gpu1:11434",
+# "roles": ["tool"]}, {"type": "openai", "model": "gpt-4o-mini", "roles": ["final"]}]
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "")
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))
+
+# Configure logging for error tracking
+logging.basicConfig(level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s")
+LOGGER = logging.getLogger(__name__)
+
+ROLES = ("tool", "final")
+
+
+class NoBackendAvailable(RuntimeError):
+    """Raised when every backend able to serve a step is failing or has its circuit open."""
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and the backend receives no
+    requests. Once `reset_timeout` seconds have passed a single probe request is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def available(self):
+        """Whether a request may be sent now; does not claim the half-open probe."""
+        if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            return not self._probing
+        return self.state == self.CLOSED
+
+    def acquire(self):
+        """Claim the probe slot when half-open."""
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+
+    def success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self):
+        """Open the circuit now."""
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self._probing = False
+
+
+class Backend:
+    """One LLM endpoint the router can send steps to."""
+
+    def __init__(self, name, llm, roles=ROLES, health_check=None, breaker=None):
+        """
+        Args:
+            name (str): Identifier used in logs and stats.
+            llm: LangChain LLM or chat model exposing `stream` and `astream`.
+            roles (Iterable[str]): Step types this backend serves ("tool", "final").
+            health_check (Callable[[], Any]): Raises when the backend is unhealthy.
+            breaker (CircuitBreaker): Circuit breaker, a default one if omitted.
+        """
+        self.name = name
+        self.llm = llm
+        self.roles = frozenset(roles)
+        self.health_check = health_check
+        self.breaker = breaker if breaker else CircuitBreaker()
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+
+    def stats(self):
+        return {
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "state": self.breaker.state,
+            "roles": sorted(self.roles),
+        }
+
+
+def classify_step(prompt):
+    """
+    Return the step type of a ReAct prompt.
+
+    Until the scratchpad holds an observation the model is choosing a tool ("tool"); once a
+    tool has answered, the step is most likely writing the final answer ("final"). The format
+    instructions of the prompt also mention "Observation:", so only the text after the
+    question is inspected.
+    """
+    scratchpad = prompt.rpartition("\nQuestion:")[2]
+    return "final" if "\nObservation:" in scratchpad else "tool"
+
+
+def _text(chunk):
+    """Text of a streamed chunk from an LLM (str) or a chat model (message chunk)."""
+    return chunk if isinstance(chunk, str) else getattr(chunk, "content", str(chunk))
+
+
+class RouterLLM(LLM):
+    """
+    LLM that spreads requests over several backends.
+
+    Each step goes to the backend serving its step type with the fewest outstanding requests.
+    Failing backends are skipped by their circuit breaker and the step is retried on another
+    backend as long as no token has been streamed yet.
+    """
+
+    backends: List[Any] = Field(default_factory=list)
+    step_classifier: Optional[Callable[[str], str]] = None
+    max_attempts: int = 2
+    lock: Any = None
+    health_thread: Any = None
+    stop_event: Any = None
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        object.__setattr__(self, "lock", threading.Lock())
+        object.__setattr__(self, "stop_event", threading.Event())
+
+    @property
+    def _llm_type(self) -> str:
+        return "backend_router"
+
+    def classify(self, prompt):
+        return (self.step_classifier or classify_step)(prompt)
+
+    def _acquire(self, role, tried):
+        """Reserve the least loaded available backend for `role`, or any available one."""
+        with self.lock:
+            candidates = [
+                backend for backend in self.backends
+                if backend.name not in tried and backend.breaker.available()
+            ]
+            preferred = [backend for backend in candidates if role in backend.roles] or candidates
+            if not preferred:
+                return None
+            backend = min(preferred, key=lambda item: (item.outstanding, item.requests))
+            backend.breaker.acquire()
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def _release(self, backend, ok):
+        with self.lock:
+            backend.outstanding -= 1
+            if ok:
+                backend.breaker.success()
+            else:
+                backend.errors += 1
+                backend.breaker.failure()
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        """
+        Send the step to a backend, streaming its tokens to the callbacks.
+        """
+        role = self.classify(prompt)
+        tried, last_error = set(), None
+        for _ in range(self.max_attempts):
+            backend = self._acquire(role, tried)
+            if backend is None:
+                break
+            tried.add(backend.name)
+
+            parts = []
+            try:
+                for chunk in backend.llm.stream(prompt, stop=stop):
+                    text = _text(chunk)
+                    parts.append(text)
+                    if run_manager:
+                        run_manager.on_llm_new_token(text)
+            except BudgetExceeded:
+                # The query is out of time; the backend did nothing wrong
+                self._release(backend, ok=True)
+                raise
+            except Exception as e:
+                self._release(backend, ok=False)
+                LOGGER.warning(f"LLM backend {backend.name} failed: {e}")
+                if parts:
+                    raise
+                last_error = e
+                continue
+
+            self._release(backend, ok=True)
+            return "".join(parts)
+
+        raise NoBackendAvailable(f"No LLM backend available for a {role} step.") from last_error
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        """
+        Asynchronous counterpart of `_call`.
+        """
+        role = self.classify(prompt)
+        tried, last_error = set(), None
+        for _ in range(self.max_attempts):
+            backend = self._acquire(role, tried)
+            if backend is None:
+                break
+            tried.add(backend.name)
+
+            parts = []
+            try:
+                async for chunk in backend.llm.astream(prompt, stop=stop):
+                    text = _text(chunk)
+                    parts.append(text)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(text)
+            except BudgetExceeded:
+                # The query is out of time; the backend did nothing wrong
+                self._release(backend, ok=True)
+                raise
+            except Exception as e:
+                self._release(backend, ok=False)
+                LOGGER.warning(f"LLM backend {backend.name} failed: {e}")
+                if parts:
+                    raise
+                last_error = e
+                continue
+
+            self._release(backend, ok=True)
+            return "".join(parts)
+
+        raise NoBackendAvailable(f"No LLM backend available for a {role} step.") from last_error
+
+    def check_health(self):
+        """Run every backend's health check, opening or closing its circuit accordingly."""
+        for backend in self.backends:
+            if backend.health_check is None:
+                continue
+            try:
+                backend.health_check()
+            except Exception as e:
+                LOGGER.warning(f"LLM backend {backend.name} failed its health check: {e}")
+                with self.lock:
+                    backend.breaker.trip()
+            else:
+                with self.lock:
+                    if backend.breaker.state != CircuitBreaker.CLOSED:
+                        LOGGER.info(f"LLM backend {backend.name} recovered.")
+                        backend.breaker.success()
+
+    def start_health_checks(self, interval=LLM_HEALTH_INTERVAL):
+        """Run `check_health` every `interval` seconds on a daemon thread."""
+        if self.health_thread is not None:
+            return
+
+        def loop():
+            while not self.stop_event.wait(interval):
+                self.check_health()
+
+        thread = threading.Thread(target=loop, name="llm-health", daemon=True)
+        object.__setattr__(self, "health_thread", thread)
+        thread.start()
+
+    def close(self):
+        """Stop the health-check thread."""
+        self.stop_event.set()
+
+    def stats(self):
+        """Return the per-backend counters and circuit states."""
+        with self.lock:
+            return {backend.name: backend.stats() for backend in self.backends}
+
+
+def build_backend(spec):
+    """
+    Create a `Backend` from a config dict.
+
+    Keys: type ("ollama" or "openai"), model, base_url (Ollama), roles, name,
+    failure_threshold, reset_timeout.
+    """
+    kind = spec.get("type", "ollama")
+    breaker = CircuitBreaker(spec.get("failure_threshold", 3), spec.get("reset_timeout", 30.0))
+    roles = spec.get("roles", ROLES)
+
+    if kind == "ollama":
+        from model.ollama_model import OllamaHandler
+
+        handler = OllamaHandler(model=spec.get("model", "llama3.2"), base_url=spec.get("base_url"))
+        name = spec.get("name") or f"ollama:{handler.model}@{handler.base_url or 'default'}"
+        return Backend(name, handler.llm, roles, health_check=handler.client.list, breaker=breaker)
+
+    if kind == "openai":
+        from model.chatgpt_model import ChatGPTHandler
+
+        handler = ChatGPTHandler(**({"model": spec["model"]} if "model" in spec else {}))
+        if handler.llm is None:
+            raise ValueError("OpenAI backend needs OPENAI_API_KEY.")
+        name = spec.get("name") or f"openai:{handler.model}"
+        return Backend(name, handler.llm, roles, breaker=breaker)
+
+    raise ValueError(f"Unknown LLM backend type: {kind}")
+
+
+def router_from_env(config=LLM_BACKENDS):
+    """
+    Build a `RouterLLM` from the `LLM_BACKENDS` JSON list.
+
+    Returns:
+        RouterLLM | None: None when no backends are configured or none could be created.
+    """
+    if not config.strip():
+        return None
+
+    try:
+        specs = json.loads(config)
+    except ValueError as e:
+        LOGGER.error(f"Invalid LLM_BACKENDS: {e}")
+        return None
+
+    backends = []
+    for spec in specs:
+        try:
+            backends.append(build_backend(spec))
+        except Exception as e:
+            LOGGER.error(f"Error creating LLM backend {spec}: {e}")
+    if not backends:
+        return None
+
+    router = RouterLLM(backends=backends)
+    if any(backend.health_check for backend in backends):
+        router.start_health_checks()
+    return router
@@ -1,12 +1,40 @@
 import logging
 import json
+import os
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
+from dotenv import load_dotenv
 from langchain.llms.base import LLM
+from langchain_core.outputs import GenerationChunk
 from pydantic import BaseModel, Field
 from langchain_ollama import OllamaLLM
+import ollama
 
+from agent import budget
+from agent.budget import BudgetExceeded
+from agent.profiling import profiled, span
+from model.prompt_context import PromptContextCache, PromptEvalStats
+
+# Load environment variables
+load_dotenv()
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL") or None
+# How long Ollama keeps the model loaded after a request ("30m", "-1" to keep it resident)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX")) if os.getenv("OLLAMA_NUM_CTX") else None
+OLLAMA_PRELOAD = os.getenv("OLLAMA_PRELOAD", "").lower() in ("1", "true", "yes")
+OLLAMA_REUSE_CONTEXT = os.getenv("OLLAMA_REUSE_CONTEXT", "").lower() in ("1", "true", "yes")
+
+
+def _keep_alive(value):
+    """Ollama accepts durations ("30m") or seconds; pass plain numbers as ints."""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
 
 
 # Configure logging for error tracking
@@ -22,14 +50,34 @@ class OllamaHandler(LLM):
     """
 
     model: str = Field(default="llama3.2")
+    base_url: Optional[str] = Field(default=OLLAMA_BASE_URL)
+    keep_alive: Optional[str] = Field(default=OLLAMA_KEEP_ALIVE)
+    num_ctx: Optional[int] = Field(default=OLLAMA_NUM_CTX)
+    preload: bool = Field(default=OLLAMA_PRELOAD)
+    reuse_context: bool = Field(default=OLLAMA_REUSE_CONTEXT)
     llm: Optional[OllamaLLM] = None
+    client: Any = None
+    async_client: Any = None
+    context_cache: Any = None
+    prompt_stats: Any = None
 
     def __init__(self, **data):
         """
         Initialize the object and bind the model.
+
+        With `preload`, the model is loaded into Ollama in the background so the first query
+        does not pay for it. With `reuse_context`, each step sends only the text added since the
+        previous step of the same query, together with Ollama's `context` handle of that step.
         """
         super().__init__(**data)
         object.__setattr__(self, "llm", self.get_llm())
+        object.__setattr__(self, "client", ollama.Client(host=self.base_url))
+        object.__setattr__(self, "async_client", ollama.AsyncClient(host=self.base_url))
+        object.__setattr__(self, "context_cache", PromptContextCache())
+        object.__setattr__(self, "prompt_stats", PromptEvalStats())
+
+        if self.preload:
+            threading.Thread(target=self.warm_up, name="ollama-preload", daemon=True).start()
 
     def get_llm(self) -> Optional[OllamaLLM]:
         """
@@ -38,6 +86,9 @@ class OllamaHandler(LLM):
         try:
             return OllamaLLM(
                 model=self.model,
+                base_url=self.base_url,
+                keep_alive=_keep_alive(self.keep_alive),
+                num_ctx=self.num_ctx,
                 system_message="Analyze the text and provide a response.",
                 return_direct=True,
             )
@@ -45,12 +96,153 @@ class OllamaHandler(LLM):
             LOGGER.error(f"Error initializing the model: {e}")
             return None
 
-    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs) -> str:
+    def warm_up(self) -> bool:
+        """
+        Load the model into Ollama and keep it resident for `keep_alive`.
+
+        Returns:
+            bool: Whether the model was loaded.
+        """
+        try:
+            with span("ollama.preload", "llm", model=self.model):
+                # A request without a prompt only loads the model
+                self.client.generate(model=self.model, keep_alive=_keep_alive(self.keep_alive))
+            LOGGER.info(f"Model {self.model} preloaded (keep_alive={self.keep_alive}).")
+            return True
+        except Exception as e:
+            LOGGER.error(f"Error preloading the model: {e}")
+            return False
+
+    @profiled("ollama._call", "llm", payload=True)
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
         """
         Invoke the model using LangChain.
         """
+        if self.reuse_context:
+            on_token = (lambda token: run_manager.on_llm_new_token(token)) if run_manager else None
+            return self.generate_with_context(prompt, stop=stop, on_token=on_token)
         return self.explain_question_mark(prompt)
 
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        """
+        Invoke the model asynchronously using LangChain.
+        """
+        if self.reuse_context:
+            return await self.agenerate_with_context(prompt, stop=stop, run_manager=run_manager)
+        return await self.aexplain_question_mark(prompt)
+
+    def _context_request(self, prompt: str, stop: Optional[List[str]]) -> Dict[str, Any]:
+        """Build a streaming generate request that reuses the longest cached prefix of `prompt`."""
+        prefix, context = self.context_cache.lookup(prompt)
+        options = {"stop": stop} if stop else {}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+
+        request = {
+            "model": self.model,
+            "prompt": prompt[len(prefix):],
+            "stream": True,
+            "keep_alive": _keep_alive(self.keep_alive),
+            "options": options or None,
+        }
+        if context:
+            # The context already carries the prompt template; continue it verbatim
+            request.update(context=context, raw=True)
+        return request
+
+    def _finish_context(self, prompt: str, request: Dict[str, Any], completion: str, final: Any) -> None:
+        """Cache the context of a finished step and record its prompt-eval measurements."""
+        reused_tokens = len(request.get("context") or ())
+        if final is None:
+            return
+        self.context_cache.store(prompt + completion, final.context)
+        self.prompt_stats.record(reused_tokens, final.prompt_eval_count, final.prompt_eval_duration)
+        LOGGER.info(
+            f"Ollama step: {final.prompt_eval_count} prompt tokens evaluated in "
+            f"{(final.prompt_eval_duration or 0) / 1e6:.1f} ms, {reused_tokens} reused from context"
+        )
+
+    def generate_with_context(self, prompt: str, stop: Optional[List[str]] = None, on_token=None) -> str:
+        """
+        Generate a completion, reusing the Ollama context of an earlier step whose prompt and
+        completion are a prefix of `prompt`.
+
+        Args:
+            prompt (str): Full prompt of this step.
+            stop (List[str]): Stop sequences.
+            on_token (Callable[[str], None]): Called with each generated token.
+
+        Returns:
+            str: The completion.
+        """
+        request = self._context_request(prompt, stop)
+        parts, final = [], None
+        try:
+            with span("ollama.generate", "llm", sent_chars=len(request["prompt"]),
+                      reused=bool(request.get("context"))):
+                for chunk in self.client.generate(**request):
+                    if chunk.response:
+                        parts.append(chunk.response)
+                        if on_token:
+                            on_token(chunk.response)
+                    if chunk.done:
+                        final = chunk
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            LOGGER.error(f"Error executing the model: {e}")
+            return f"Error retrieving response: {e}"
+
+        completion = "".join(parts)
+        self._finish_context(prompt, request, completion, final)
+        return completion
+
+    async def agenerate_with_context(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None) -> str:
+        """
+        Asynchronous counterpart of `generate_with_context`; tokens go to `run_manager`.
+        """
+        request = self._context_request(prompt, stop)
+        parts, final = [], None
+        try:
+            async for chunk in await self.async_client.generate(**request):
+                if chunk.response:
+                    parts.append(chunk.response)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.response)
+                if chunk.done:
+                    final = chunk
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            LOGGER.error(f"Error executing the model: {e}")
+            return f"Error retrieving response: {e}"
+
+        completion = "".join(parts)
+        self._finish_context(prompt, request, completion, final)
+        return completion
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs) -> Iterator[GenerationChunk]:
+        """
+        Stream the completion token by token, reporting each token to the callbacks.
+        """
+        for token in self.stream_question_mark(prompt, stop=stop):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None,
+                       **kwargs) -> AsyncIterator[GenerationChunk]:
+        """
+        Stream the completion asynchronously, reporting each token to the callbacks.
+        """
+        async for token in self.astream_question_mark(prompt, stop=stop):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
     def explain_question_mark(self, question: str) -> str:
         """
         Execute a query and return the result.
@@ -59,12 +251,73 @@ class OllamaHandler(LLM):
             return "Error: Model initialization failed."
 
         try:
-            response = self.llm.invoke(question)
-            return response
+            current = budget.current()
+            if current is None:
+                return self.llm.invoke(question)
+            # Stream, so the request to Ollama is closed as soon as the query runs out of time
+            parts = []
+            for token in self.llm.stream(question):
+                current.check()
+                parts.append(token)
+            return "".join(parts)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            LOGGER.error(f"Error executing the model: {e}")
+            return f"Error retrieving response: {e}"
+
+    async def aexplain_question_mark(self, question: str) -> str:
+        """
+        Execute a query asynchronously and return the result.
+        """
+        if self.llm is None:
+            return "Error: Model initialization failed."
+
+        try:
+            current = budget.current()
+            if current is None:
+                return await self.llm.ainvoke(question)
+            parts = []
+            async for token in self.llm.astream(question):
+                current.check()
+                parts.append(token)
+            return "".join(parts)
+        except BudgetExceeded:
+            raise
         except Exception as e:
             LOGGER.error(f"Error executing the model: {e}")
             return f"Error retrieving response: {e}"
 
+    def stream_question_mark(self, question: str, stop: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Execute a query and yield the response tokens as the model produces them.
+        """
+        if self.llm is None:
+            yield "Error: Model initialization failed."
+            return
+
+        try:
+            for token in self.llm.stream(question, stop=stop):
+                yield token
+        except Exception as e:
+            LOGGER.error(f"Error executing the model: {e}")
+            yield f"Error retrieving response: {e}"
+
+    async def astream_question_mark(self, question: str, stop: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """
+        Execute a query asynchronously and yield the response tokens as they arrive.
+        """
+        if self.llm is None:
+            yield "Error: Model initialization failed."
+            return
+
+        try:
+            async for token in self.llm.astream(question, stop=stop):
+                yield token
+        except Exception as e:
+            LOGGER.error(f"Error executing the model: {e}")
+            yield f"Error retrieving response: {e}"
+
     @property
     def _llm_type(self) -> str:
         """
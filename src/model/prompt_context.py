@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+
+
+class PromptContextCache:
+    """
+    Ollama `context` handles of recent completions, keyed by the text they encode.
+
+    Each ReAct step resends the previous prompt and completion followed by the new observation.
+    When a new prompt starts with a cached text, only the remaining suffix has to be sent along
+    with the cached context, so Ollama does not evaluate the tool preamble again.
+    """
+
+    def __init__(self, max_entries=32):
+        """
+        Args:
+            max_entries (int): Number of contexts kept, least recently used first out.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt):
+        """Return `(prefix, context)` for the longest cached prefix of `prompt`, or `("", None)`."""
+        with self._lock:
+            best = None
+            for text in self._entries:
+                if len(text) < len(prompt) and prompt.startswith(text) and (best is None or len(text) > len(best)):
+                    best = text
+            if best is None:
+                return "", None
+            self._entries.move_to_end(best)
+            return best, self._entries[best]
+
+    def store(self, text, context):
+        """Remember the context that encodes `text` (a prompt followed by its completion)."""
+        if not context:
+            return
+        with self._lock:
+            self._entries[text] = list(context)
+            self._entries.move_to_end(text)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PromptEvalStats:
+    """
+    Prompt-evaluation measurements reported by Ollama, split by whether a context was reused.
+
+    The time saved by a reused step is estimated from the tokens it did not resend, priced at
+    the mean per-token prompt-eval time of the steps that sent their full prompt.
+    Only running totals are kept, so the statistics use constant memory however many steps run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.steps = 0
+        self.reused_steps = 0
+        self.prompt_eval_tokens = 0
+        self.prompt_eval_ns = 0
+        self.reused_tokens = 0
+        self.full_tokens = 0    # Prompt-eval tokens and time of the steps that sent their full prompt
+        self.full_ns = 0
+
+    def record(self, reused_tokens, prompt_eval_count, prompt_eval_duration):
+        """
+        Args:
+            reused_tokens (int): Tokens covered by the reused context (0 for a full prompt).
+            prompt_eval_count (int): Tokens Ollama evaluated for the prompt.
+            prompt_eval_duration (int): Prompt evaluation time in nanoseconds.
+        """
+        count, duration = prompt_eval_count or 0, prompt_eval_duration or 0
+        with self._lock:
+            self.steps += 1
+            self.prompt_eval_tokens += count
+            self.prompt_eval_ns += duration
+            if reused_tokens:
+                self.reused_steps += 1
+                self.reused_tokens += reused_tokens
+            else:
+                self.full_tokens += count
+                self.full_ns += duration
+
+    def summary(self):
+        """Return step counts, prompt-eval totals and the estimated time saved."""
+        with self._lock:
+            ns_per_token = self.full_ns / self.full_tokens if self.full_tokens else 0.0
+            return {
+                "steps": self.steps,
+                "reused_steps": self.reused_steps,
+                "prompt_eval_tokens": self.prompt_eval_tokens,
+                "prompt_eval_ms": self.prompt_eval_ns / 1e6,
+                "reused_tokens": self.reused_tokens,
+                "estimated_saved_ms": self.reused_tokens * ns_per_token / 1e6,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._reset()
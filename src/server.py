@@ -0,0 +1,345 @@
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.agent import Agent
+from main import load_tools
+from tools.tool_cache import render_metrics
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+    503: "Service Unavailable",
+}
+
+
+# Largest request body accepted; larger ones are rejected with 413 before they are read
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class Overloaded(Exception):
+    """Raised when the server has more pending queries than it accepts."""
+
+
+class BadRequest(Exception):
+    """Raised for a request that cannot be parsed or is too large; carries the response status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AgentServer:
+    """
+    Minimal HTTP/JSON-lines server that runs concurrent queries against one `Agent`.
+
+    Routes:
+        GET  /health  -> {"status": "ok", "in_flight": int, "pending": int}
+        GET  /metrics -> tool cache counters in the Prometheus text format
+        POST /query   -> body {"query": str, "session_id": str (optional)}, returns {"response": str}
+        POST /batch   -> body of JSON lines {"query": str}, streams back one JSON
+                         line {"index": int, "response": str} per query as it completes
+        POST /stream  -> body {"query": str, "session_id": str (optional)}, streams back one JSON line per agent event
+                         ({"type": "thought" | "tool_start" | "tool_end" | "token" | "final" | "error",
+                         "text": str, "tool": str}) as the answer is generated
+    """
+
+    def __init__(self, agent, host="127.0.0.1", port=8000, max_concurrency=32, max_pending=256,
+                 max_body_bytes=MAX_BODY_BYTES):
+        """
+        Args:
+            agent: Object exposing `async aprocess(query)` (and `astream(query)` for /stream); both also
+                get a `session_id` keyword for requests that name a conversation.
+            host (str): Interface to bind.
+            port (int): Port to bind (0 picks a free port).
+            max_concurrency (int): Queries processed by the agent at the same time.
+            max_pending (int): Queries admitted (running + waiting) before new ones are rejected with 503.
+            max_body_bytes (int): Largest request body accepted; larger ones are rejected with 413.
+        """
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.max_body_bytes = max_body_bytes
+        self.in_flight = 0
+        self.pending = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._server = None
+
+    async def start(self):
+        """Bind the listening socket and return the bound port."""
+        # Synchronous tools run in the default executor; size it to the concurrency limit
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.max_concurrency))
+
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Agent server listening on http://{self.host}:{self.port}")
+        return self.port
+
+    async def serve_forever(self):
+        """Start the server if needed and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """Stop accepting connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _admit(self, count=1):
+        """Reserve `count` pending slots or raise `Overloaded`."""
+        if self.pending + count > self.max_pending:
+            raise Overloaded(f"Server is at capacity ({self.pending}/{self.max_pending} pending queries).")
+        self.pending += count
+
+    async def _run(self, query, session_id=None):
+        """Run an admitted query once a concurrency slot is free."""
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    return await self.agent.aprocess(query, **self._session_options(session_id))
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self.pending -= 1
+
+    async def submit(self, query, session_id=None):
+        """Admit and run a single query, as part of the conversation `session_id` if given."""
+        self._admit()
+        return await self._run(query, session_id)
+
+    async def _handle_connection(self, reader, writer):
+        """Serve one request per connection."""
+        try:
+            try:
+                request = await self._read_request(reader)
+            except BadRequest as e:
+                await self._send_json(writer, e.status, {"error": str(e)})
+                return
+            if request is None:
+                return
+            method, path, body = request
+
+            if path == "/health":
+                await self._send_json(writer, 200, {
+                    "status": "ok",
+                    "in_flight": self.in_flight,
+                    "pending": self.pending,
+                })
+            elif path == "/metrics":
+                metrics = render_metrics().encode("utf-8")
+                writer.write(self._head(200, "text/plain; version=0.0.4", len(metrics)) + metrics)
+                await writer.drain()
+            elif path == "/query":
+                if method != "POST":
+                    await self._send_json(writer, 405, {"error": "Use POST."})
+                    return
+                query = self._parse_query(body)
+                if query is None:
+                    await self._send_json(writer, 400, {"error": "Body must be JSON with a 'query' string."})
+                    return
+                try:
+                    response = await self.submit(query, self._parse_session(body))
+                except Overloaded as e:
+                    await self._send_json(writer, 503, {"error": str(e)}, retry_after=1)
+                    return
+                await self._send_json(writer, 200, {"response": response})
+            elif path == "/stream":
+                if method != "POST":
+                    await self._send_json(writer, 405, {"error": "Use POST."})
+                    return
+                await self._handle_stream(writer, body)
+            elif path == "/batch":
+                if method != "POST":
+                    await self._send_json(writer, 405, {"error": "Use POST."})
+                    return
+                await self._handle_batch(writer, body)
+            else:
+                await self._send_json(writer, 404, {"error": f"Unknown path: {path}"})
+
+        except Exception as e:
+            logging.error(f"Error handling request: {e}")
+        finally:
+            writer.close()
+
+    async def _handle_stream(self, writer, body):
+        """Run one query and stream its events as JSON lines while it is generated."""
+        query = self._parse_query(body)
+        if query is None:
+            await self._send_json(writer, 400, {"error": "Body must be JSON with a 'query' string."})
+            return
+        try:
+            self._admit()
+        except Overloaded as e:
+            await self._send_json(writer, 503, {"error": str(e)}, retry_after=1)
+            return
+
+        writer.write(self._head(200, "application/x-ndjson"))
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    async for event in self.agent.astream(query, **self._session_options(self._parse_session(body))):
+                        writer.write((json.dumps(event.to_dict()) + "\n").encode("utf-8"))
+                        await writer.drain()
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self.pending -= 1
+
+    async def _handle_batch(self, writer, body):
+        """Run JSON-lines queries concurrently and stream results as they complete."""
+        try:
+            lines = body.decode("utf-8").splitlines()
+        except UnicodeDecodeError:
+            await self._send_json(writer, 400, {"error": "Body must be UTF-8 encoded JSON lines."})
+            return
+        queries = []
+        for line in lines:
+            if not line.strip():
+                continue
+            query = self._parse_query(line.encode("utf-8"))
+            if query is None:
+                await self._send_json(writer, 400, {"error": "Each line must be JSON with a 'query' string."})
+                return
+            queries.append(query)
+
+        try:
+            self._admit(len(queries))
+        except Overloaded as e:
+            await self._send_json(writer, 503, {"error": str(e)}, retry_after=1)
+            return
+
+        writer.write(self._head(200, "application/x-ndjson"))
+
+        async def run(index, query):
+            return index, await self._run(query)
+
+        for task in asyncio.as_completed([run(i, q) for i, q in enumerate(queries)]):
+            index, response = await task
+            writer.write((json.dumps({"index": index, "response": response}) + "\n").encode("utf-8"))
+            # Apply backpressure from slow clients
+            await writer.drain()
+
+    @staticmethod
+    def _parse_query(body):
+        """Return the `query` field of a JSON body, or None if it is invalid."""
+        try:
+            query = json.loads(body.decode("utf-8")).get("query")
+        except (ValueError, AttributeError):
+            return None
+        return query if isinstance(query, str) and query.strip() else None
+
+    @staticmethod
+    def _parse_session(body):
+        """Return the optional `session_id` field of a JSON body."""
+        try:
+            session_id = json.loads(body.decode("utf-8")).get("session_id")
+        except (ValueError, AttributeError):
+            return None
+        return str(session_id) if session_id not in (None, "") else None
+
+    @staticmethod
+    def _session_options(session_id):
+        """Keyword arguments passing `session_id` to the agent, none for stateless queries."""
+        return {"session_id": session_id} if session_id is not None else {}
+
+    async def _read_request(self, reader):
+        """
+        Parse the request line, headers and body of an HTTP/1.1 request.
+
+        Raises `BadRequest` for a malformed request line or Content-Length, and for a body larger
+        than `max_body_bytes`, which is then not read.
+        """
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split(" ", 2)
+        if len(parts) != 3 or not parts[0] or not parts[1]:
+            raise BadRequest(400, "Malformed request line.")
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise BadRequest(400, "Content-Length must be an integer.") from None
+        if length < 0:
+            raise BadRequest(400, "Content-Length must not be negative.")
+        if length > self.max_body_bytes:
+            raise BadRequest(413, f"Request body exceeds {self.max_body_bytes} bytes.")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], body
+
+    @staticmethod
+    def _head(status, content_type, length=None, retry_after=None):
+        """Build the status line and headers of a response."""
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+            f"Content-Type: {content_type}",
+            "Connection: close",
+        ]
+        if length is not None:
+            lines.append(f"Content-Length: {length}")
+        if retry_after is not None:
+            lines.append(f"Retry-After: {retry_after}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_json(self, writer, status, payload, retry_after=None):
+        """Write a complete JSON response."""
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(self._head(status, "application/json", len(body), retry_after) + body)
+        await writer.drain()
+
+
+def main():
+    """Serve the agent with dynamically loaded tools over HTTP."""
+    parser = argparse.ArgumentParser(description="Serve concurrent queries against a single agent.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrency", type=int, default=32,
+                        help="Queries processed by the agent at the same time.")
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="Queries admitted before new ones are rejected with 503.")
+    parser.add_argument("--max-body-bytes", type=int, default=MAX_BODY_BYTES,
+                        help="Largest request body accepted; larger ones are rejected with 413.")
+    args = parser.parse_args()
+
+    tools = load_tools()
+    if not tools:
+        logging.error("No tools were loaded. Check `tools/` and ensure tools are correctly defined.")
+        return
+
+    agent = Agent(tools=tools)
+    server = AgentServer(agent, args.host, args.port, args.max_concurrency, args.max_pending, args.max_body_bytes)
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logging.warning("Server interrupted by user.")
+    finally:
+        agent.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import logging
+import threading
+
+# Batch implementations declared by the tool modules, by tool name
+_HANDLERS = {}
+_lock = threading.Lock()
+
+
+def register_batch(tool_name, func):
+    """
+    Declare a function that runs many calls of a tool at once.
+
+    Args:
+        tool_name (str): Name of the LangChain tool.
+        func (Callable[[List[str]], Dict[str, str]]): Takes the tool inputs and returns the
+            result of each input; inputs missing from the result are run one by one.
+    """
+    with _lock:
+        _HANDLERS[tool_name] = func
+    logging.info(f"Batch handler registered for {tool_name}.")
+
+
+def get_batch_handler(tool):
+    """
+    Return the batch function of a tool, or None.
+
+    Lazily loaded tools are imported first, since their module registers the handler.
+    """
+    handler = _HANDLERS.get(tool.name)
+    if handler is None and hasattr(tool.func, "load"):
+        tool.func.load()
+        handler = _HANDLERS.get(tool.name)
+    return handler
@@ -1,9 +1,10 @@
 import os
 import logging
 from langchain.tools import Tool
-from serpapi import GoogleSearch
+from tools.keyword_matcher import match_intents, register_intent
+from tools.tool_cache import ttl_cache
 from dotenv import load_dotenv
-from tools2.internet_search_tool import search_internet  # Import general search tool
+from tools.internet_search_tool import google_search, search_internet  # Import general search tool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,6 +15,11 @@ load_dotenv()
 # Retrieve SerpAPI API key from environment variables
 API_KEY = os.getenv("SERPAPI_API_KEY")
 
+# Keywords that route a query to this tool
+TRIGGER_KEYWORDS = ["blood pressure", "hypertension", "hypotension", "ضغط الدم", "ارتفاع الضغط", "انخفاض الضغط"]
+register_intent("blood_pressure", TRIGGER_KEYWORDS)
+
+@ttl_cache("BloodPressureSearch", ttl=86400)
 def search_blood_pressure_diseases(query: str) -> str:
     """Search the internet for blood pressure-related diseases using SerpAPI."""
     if not API_KEY:
@@ -29,8 +35,7 @@ def search_blood_pressure_diseases(query: str) -> str:
     }
     
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict().get("organic_results", [])
+        results = google_search(params).get("organic_results", [])
         
         if not results:
             logging.warning("No relevant results found.")
@@ -57,7 +62,7 @@ def custom_response_tool(query: str) -> str:
     words = query_lower.split()
 
     # Check for blood pressure disease queries
-    if any(keyword in query_lower for keyword in ["blood pressure", "hypertension", "hypotension", "ضغط الدم", "ارتفاع الضغط", "انخفاض الضغط"]):
+    if "blood_pressure" in match_intents(query_lower):
         logging.info("Redirecting to blood pressure search tool.")
         return search_blood_pressure_diseases(query)
     
@@ -0,0 +1,232 @@
+import atexit
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+from agent import budget
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Load environment variables
+load_dotenv()
+
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+MAX_PAGES_PER_BROWSER = int(os.getenv("BROWSER_MAX_PAGES", "50"))
+LEASE_TIMEOUT = float(os.getenv("BROWSER_LEASE_TIMEOUT", "30"))
+PAGE_LOAD_TIMEOUT = float(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", "15"))
+
+# Places where Linux distributions install chromedriver
+LINUX_DRIVER_PATHS = (
+    "/usr/bin/chromedriver",
+    "/usr/lib/chromium/chromedriver",
+    "/usr/lib/chromium-browser/chromedriver",
+    "/snap/bin/chromium.chromedriver",
+)
+
+CHROME_ARGUMENTS = (
+    "--headless=new",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-accelerated-2d-canvas",
+    "--disable-extensions",
+    "--disable-webgl",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-popup-blocking",
+    "--disable-usb-keyboard-detect",
+)
+
+
+class LeaseTimeout(TimeoutError):
+    """Raised when no browser becomes available within the lease timeout."""
+
+
+def find_chromedriver():
+    """
+    Locate a chromedriver binary.
+
+    Checks `CHROMEDRIVER_PATH`, then `PATH`, then common Linux install locations. Returns
+    None when nothing is found, in which case Selenium Manager resolves a driver itself.
+    """
+    configured = os.getenv("CHROMEDRIVER_PATH")
+    if configured and os.path.isfile(configured):
+        return configured
+
+    on_path = shutil.which("chromedriver")
+    if on_path:
+        return on_path
+
+    for path in LINUX_DRIVER_PATHS:
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def create_chrome_driver():
+    """Launch a headless Chrome suitable for pooling (no fixed debugging port)."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    chrome_options = Options()
+    for argument in CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
+
+    driver_path = find_chromedriver()
+    service = Service(driver_path) if driver_path else Service()
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    logging.info(f"Chrome WebDriver launched ({driver_path or 'Selenium Manager'}).")
+    return driver
+
+
+class _PooledBrowser:
+    """A driver and the number of pages it has served."""
+
+    __slots__ = ("driver", "pages")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    Warm pool of headless browsers shared by concurrent scrapes.
+
+    Browsers are started lazily up to `size`, reused tab by tab between leases and
+    recycled after `max_pages` pages or after an error.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_BROWSER,
+                 lease_timeout=LEASE_TIMEOUT, factory=create_chrome_driver):
+        """
+        Args:
+            size (int): Maximum number of browsers running at once.
+            max_pages (int): Pages a browser serves before it is replaced.
+            lease_timeout (float): Default seconds to wait for a free browser.
+            factory (callable): Returns a new WebDriver-like object.
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.lease_timeout = lease_timeout
+        self.factory = factory
+        self.launched = 0
+        self.recycled = 0
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Borrow a driver for one page.
+
+        Raises `LeaseTimeout` if all browsers stay busy for `timeout` seconds, or for the time
+        the current query has left. A browser whose lease ends with an exception is discarded
+        rather than returned to the pool.
+        """
+        browser = self._acquire(budget.clip(self.lease_timeout if timeout is None else timeout))
+        healthy = False
+        try:
+            yield browser.driver
+            healthy = True
+        finally:
+            browser.pages += 1
+            self._release(browser, healthy)
+
+    def close(self):
+        """Quit every idle browser and refuse new leases."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for browser in idle:
+            self._quit(browser)
+
+    def stats(self) -> dict:
+        """Return pool counters."""
+        return {
+            "size": self.size,
+            "running": self._created,
+            "idle": len(self._idle),
+            "launched": self.launched,
+            "recycled": self.recycled,
+        }
+
+    def _acquire(self, timeout):
+        """Return an idle browser, launch a new one, or wait for one to be released."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LeaseTimeout(f"No browser became available within {timeout}s.")
+                self._condition.wait(remaining)
+
+        try:
+            driver = self.factory()
+        except Exception:
+            self._free_slot()
+            raise
+        self.launched += 1
+        return _PooledBrowser(driver)
+
+    def _release(self, browser, healthy):
+        """Reset the tab and return the browser, or recycle it."""
+        if healthy and not self._closed and browser.pages < self.max_pages:
+            try:
+                # Stop scripts of the previous page while the browser is idle
+                browser.driver.get("about:blank")
+                with self._condition:
+                    self._idle.append(browser)
+                    self._condition.notify()
+                return
+            except Exception as e:
+                logging.warning(f"Browser failed to reset, recycling it: {e}")
+
+        self.recycled += 1
+        self._quit(browser)
+
+    def _quit(self, browser):
+        """Quit a browser and free its slot."""
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logging.warning(f"Error quitting browser: {e}")
+        self._free_slot()
+
+    def _free_slot(self):
+        """Let a waiting lease launch a replacement browser."""
+        with self._condition:
+            self._created -= 1
+            self._condition.notify()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+                atexit.register(_pool.close)
+    return _pool
@@ -1,25 +1,34 @@
 import logging
-from textblob import TextBlob
 from langchain.tools import Tool
 from model.ollama_model import OllamaHandler
-from tools2.weather_tool import get_weather
-from tools2.stock_tool import get_stock_price
-from tools2.internet_search_tool import search_internet
+from tools.executors import IO_BOUND, register_workload, tool_work
+from tools.keyword_matcher import match_intents, is_greeting as contains_greeting
+from tools.weather_tool import extract_place, get_weather
+from tools.stock_tool import get_stock_price
+from tools.internet_search_tool import search_internet
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Initialize the Ollama model for direct conversation
-ollama_handler = OllamaHandler()
+# Ollama model for direct conversation, created on the first live chat
+ollama_handler = None
 
+def get_ollama_handler() -> OllamaHandler:
+    """Return the live chat model, initializing it on first use."""
+    global ollama_handler
+    if ollama_handler is None:
+        ollama_handler = OllamaHandler()
+    return ollama_handler
+
+# The greeting check is a word lookup, far cheaper than a round trip to a worker process
+register_workload("GeneralResponse", IO_BOUND)
+
+@tool_work("GeneralResponse")
 def is_greeting(query: str) -> bool:
     """
-    Detects if the input query is a greeting by analyzing the sentence structure and meaning.
+    Detects if the input query is a greeting by looking up its words in `GREETING_WORDS`.
     """
-    analysis = TextBlob(query)
-    words = analysis.words.lower()
-    
-    if "hello" in words or "hi" in words or "hallo" in words or analysis.sentiment.polarity > 0.5:
+    if contains_greeting(query):
         logging.info("Detected a greeting.")
         return True
     return False
@@ -37,15 +46,18 @@ def custom_response_tool(query: str) -> str:
         return "Hello! How can I assist you today?"
 
     words = query_lower.split()
+    intents = match_intents(query_lower)
 
     # Check for weather queries
-    if any(keyword in query_lower for keyword in ["weather", "temperature", "forecast"]):
-        city = words[-1] if words else "unknown location"
+    if "weather" in intents:
+        city = extract_place(query)
+        if city is None:
+            return "Which city would you like the weather for?"
         logging.info(f"Redirecting to weather tool for city: {city}")
         return get_weather(city)
 
     # Check for stock price queries
-    if any(keyword in query_lower for keyword in ["stock", "price", "share"]) or query.isupper():
+    if "stock" in intents or query.isupper():
         logging.info(f"Redirecting to stock tool for ticker: {query}")
         return get_stock_price(query)
 
@@ -66,7 +78,7 @@ def custom_response_tool(query: str) -> str:
             print("Exiting live chat mode.")
             return "Live chat session ended."
 
-        response = ollama_handler.get_response(user_input)
+        response = get_ollama_handler().explain_question_mark(user_input)
         print(f"AI: {response}")
         logging.info(f"Live chat response: {response}")
 
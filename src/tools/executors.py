@@ -0,0 +1,226 @@
+"""
+Where tool work runs: I/O-bound tools on the caller's threads, CPU-bound work in a process pool.
+
+Each tool declares its kind with `register_workload`, and its module wraps the module-level
+function that does the tool's heavy local work (parsing, not downloading) in `tool_work`.
+That function then runs where the declaration says: inline for I/O-bound tools, and for
+CPU-bound tools in a pool of worker processes, all started together and having imported
+`WARM_IMPORTS` before taking work, so they run in parallel instead of contending for the GIL
+with the agent's threads. `TOOL_WORKLOADS` overrides the declarations, e.g.
+`StockPrice=cpu,WebScraper=io`. `cpu_bound` always uses the pool. The pool starts on the
+first call, or with an agent that has a CPU-bound tool when `TOOL_CPU_PRESTART` is set.
+"""
+import atexit
+import functools
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from dotenv import load_dotenv
+
+from agent import budget
+
+# Load environment variables
+load_dotenv()
+# Worker processes for CPU-bound work; 0 runs it on the calling thread instead
+CPU_WORKERS = int(os.getenv("TOOL_CPU_WORKERS", str(os.cpu_count() or 1)))
+# Modules every worker process imports before taking work
+WARM_IMPORTS = [name.strip() for name in os.getenv("TOOL_WARM_IMPORTS", "tools.html_extract").split(",") if name.strip()]
+# Start the process pool with the agent instead of on the first CPU-bound call
+CPU_PRESTART = os.getenv("TOOL_CPU_PRESTART", "false").lower() in ("1", "true", "yes")
+
+IO_BOUND = "io"
+CPU_BOUND = "cpu"
+
+
+def _parse_workloads(value):
+    """Parse `TOOL_WORKLOADS`, a comma-separated list of `tool=io|cpu`, skipping bad entries."""
+    workloads = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        name, _, kind = entry.partition("=")
+        if kind.strip() not in (IO_BOUND, CPU_BOUND):
+            logging.warning(f"Ignoring TOOL_WORKLOADS entry {entry!r}; expected tool=io or tool=cpu.")
+            continue
+        workloads[name.strip()] = kind.strip()
+    return workloads
+
+
+# Workload kinds set by configuration, which win over the tools' own declarations
+WORKLOAD_OVERRIDES = _parse_workloads(os.getenv("TOOL_WORKLOADS", ""))
+
+# Declared kind of each tool, by tool name
+_WORKLOADS = {}
+_lock = threading.Lock()
+_cpu_pool = None
+# Set in worker processes, where `cpu_bound` functions run inline
+_in_worker = False
+
+
+def register_workload(tool_name, kind):
+    """Declare whether a tool is I/O-bound (the default) or CPU-bound."""
+    if kind not in (IO_BOUND, CPU_BOUND):
+        raise ValueError(f"Unknown workload kind: {kind}")
+    with _lock:
+        _WORKLOADS[tool_name] = kind
+    logging.info(f"{tool_name} declared {'CPU' if kind == CPU_BOUND else 'I/O'}-bound.")
+
+
+def get_workload(tool):
+    """
+    Return the kind of a tool (a `Tool` or its name), `IO_BOUND` when it declares none.
+
+    Lazily loaded tools are imported first, since their module makes the declaration.
+    """
+    name = getattr(tool, "name", tool)
+    kind = WORKLOAD_OVERRIDES.get(name) or _WORKLOADS.get(name)
+    if kind is None and hasattr(getattr(tool, "func", None), "load"):
+        tool.func.load()
+        kind = _WORKLOADS.get(name)
+    return kind or IO_BOUND
+
+
+def _init_worker(modules):
+    """Process pool initializer: mark the process as a worker and import the warm modules."""
+    global _in_worker
+    _in_worker = True
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logging.warning(f"Worker could not pre-import {name}: {e}")
+
+
+def _ready(delay):
+    # Hold the worker briefly so the other start-up tasks go to other workers
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _context():
+    """Start workers from a clean server process where available; forking a threaded process is unsafe."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def get_cpu_pool():
+    """Return the shared process pool, starting every worker on first use. None when disabled."""
+    global _cpu_pool
+    if CPU_WORKERS <= 0:
+        return None
+    if _cpu_pool is None:
+        with _lock:
+            if _cpu_pool is None:
+                pool = ProcessPoolExecutor(
+                    max_workers=CPU_WORKERS,
+                    mp_context=_context(),
+                    initializer=_init_worker,
+                    initargs=(WARM_IMPORTS,),
+                )
+                # Workers are spawned on demand; wait until every one of them has answered once
+                pids = set()
+                for _ in range(20):
+                    pids.update(future.result() for future in [pool.submit(_ready, 0.05) for _ in range(CPU_WORKERS)])
+                    if len(pids) >= CPU_WORKERS:
+                        break
+                logging.info(f"Started {len(pids)} tool worker processes.")
+                _cpu_pool = pool
+    return _cpu_pool
+
+
+def start(wait=False):
+    """Start the process pool in the background (or synchronously with `wait`) if it is enabled."""
+    if CPU_WORKERS <= 0 or _in_worker or _cpu_pool is not None:
+        return
+    if wait:
+        get_cpu_pool()
+    else:
+        threading.Thread(target=get_cpu_pool, name="tool-pool-start", daemon=True).start()
+
+
+def shutdown():
+    """Stop the worker processes."""
+    global _cpu_pool
+    with _lock:
+        pool, _cpu_pool = _cpu_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown)
+
+
+def _reset_broken(pool):
+    """Drop a pool whose worker died, so the next call starts a fresh one."""
+    global _cpu_pool
+    with _lock:
+        if _cpu_pool is pool:
+            _cpu_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _call_in_worker(module, qualname, args, kwargs):
+    """Look up a decorated module-level function by name and call it; inside a worker it runs inline."""
+    target = importlib.import_module(module)
+    for name in qualname.split("."):
+        target = getattr(target, name)
+    return target(*args, **kwargs)
+
+
+def _run_in_pool(func, args, kwargs):
+    """Run `func` in the process pool, or inline when the pool is disabled or this is a worker."""
+    pool = None if _in_worker else get_cpu_pool()
+    if pool is None:
+        return func(*args, **kwargs)
+    timeout = budget.clip(None)
+    future = pool.submit(_call_in_worker, func.__module__, func.__qualname__, args, kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise budget.BudgetExceeded(f"The query ran out of time waiting for {func.__qualname__}.")
+    except BrokenProcessPool as e:
+        logging.error(f"Tool worker process died running {func.__qualname__}, running it inline: {e}")
+        _reset_broken(pool)
+        return func(*args, **kwargs)
+
+
+def cpu_bound(func):
+    """
+    Run a module-level function in the tool process pool.
+
+    Only pure computation belongs here: a worker blocked on the network holds one of the few
+    pool slots. Arguments and results are pickled, so they should be plain data. The function
+    runs on the calling thread when the pool is disabled, inside workers, and once more after
+    a worker crash. The caller stops waiting when its query runs out of time.
+    """
+    @functools.wraps(func)
+    def dispatch(*args, **kwargs):
+        return _run_in_pool(func, args, kwargs)
+
+    return dispatch
+
+
+def tool_work(tool_name):
+    """
+    Run a module-level function where the workload of `tool_name` says.
+
+    The function runs on the calling thread while the tool is I/O-bound, and as a `cpu_bound`
+    function while it is CPU-bound. The kind is looked up on every call, so declarations made
+    after decoration and overrides both apply.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def dispatch(*args, **kwargs):
+            if get_workload(tool_name) == CPU_BOUND:
+                return _run_in_pool(func, args, kwargs)
+            return func(*args, **kwargs)
+
+        return dispatch
+
+    return decorate
@@ -0,0 +1,136 @@
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+from dotenv import load_dotenv
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Load environment variables
+load_dotenv()
+
+# Bundled city list, plus an optional extra file in the same tab-separated format
+CITIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv")
+EXTRA_CITIES_PATH = os.getenv("GAZETTEER_PATH")
+
+# Locations closer than this many degrees share a weather observation (~11 km)
+BUCKET_DEGREES = 0.1
+
+_NOT_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_name(name: str) -> str:
+    """Case-fold, strip accents and diacritics, and collapse punctuation and spaces."""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_NOT_WORD.sub(" ", stripped).split())
+
+
+class Location:
+    """A city from the gazetteer."""
+
+    __slots__ = ("name", "country", "lat", "lon")
+
+    def __init__(self, name, country, lat, lon):
+        self.name = name
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+
+    @property
+    def bucket(self) -> str:
+        """Grid cell of the location; nearby places share cached observations."""
+        return f"{round(self.lat / BUCKET_DEGREES)}:{round(self.lon / BUCKET_DEGREES)}"
+
+    def __eq__(self, other):
+        return isinstance(other, Location) and (self.name, self.country) == (other.name, other.country)
+
+    def __hash__(self):
+        return hash((self.name, self.country))
+
+    def __repr__(self):
+        return f"Location({self.name!r}, {self.country!r})"
+
+
+class Gazetteer:
+    """Index of city names and aliases, normalized, for exact lookups and scans of free text."""
+
+    def __init__(self, locations_with_aliases=()):
+        """
+        Args:
+            locations_with_aliases (Iterable[tuple]): `(Location, [alias, ...])` pairs; the first
+                location registered for a name wins.
+        """
+        self._index = {}
+        self._max_words = 1
+        for location, aliases in locations_with_aliases:
+            self.add(location, aliases)
+
+    def add(self, location, aliases=()):
+        """Index a location under its name, its aliases and "name country"."""
+        for alias in (location.name, *aliases, f"{location.name} {location.country}"):
+            key = normalize_name(alias)
+            if key and key not in self._index:
+                self._index[key] = location
+                self._max_words = max(self._max_words, len(key.split()))
+
+    def lookup(self, name):
+        """Return the location called `name` ("Paris", "paris, fr", "باريس"), or None."""
+        return self._index.get(normalize_name(name))
+
+    def find(self, text):
+        """Return the distinct locations mentioned in `text`, in order, longest names first."""
+        words = normalize_name(text).split()
+        found = []
+        position = 0
+        while position < len(words):
+            for size in range(min(self._max_words, len(words) - position), 0, -1):
+                location = self._index.get(" ".join(words[position:position + size]))
+                if location is not None:
+                    if location not in found:
+                        found.append(location)
+                    position += size
+                    break
+            else:
+                position += 1
+        return found
+
+    def __len__(self):
+        return len(set(self._index.values()))
+
+
+def read_cities(path):
+    """Yield `(Location, aliases)` from a tab-separated file: name, country, lat, lon, aliases."""
+    with open(path, encoding="utf-8") as cities:
+        for line in cities:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            name, country, lat, lon = fields[:4]
+            aliases = [alias.strip() for alias in fields[4].split(",")] if len(fields) > 4 else []
+            yield Location(name, country, float(lat), float(lon)), [alias for alias in aliases if alias]
+
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Return the shared gazetteer, loading the city files on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _lock:
+            if _gazetteer is None:
+                gazetteer = Gazetteer(read_cities(CITIES_PATH))
+                if EXTRA_CITIES_PATH:
+                    try:
+                        for location, aliases in read_cities(EXTRA_CITIES_PATH):
+                            gazetteer.add(location, aliases)
+                    except (OSError, ValueError) as e:
+                        logging.error(f"Error loading gazetteer file {EXTRA_CITIES_PATH}: {e}")
+                logging.info(f"Gazetteer loaded with {len(gazetteer)} cities.")
+                _gazetteer = gazetteer
+    return _gazetteer
@@ -0,0 +1,273 @@
+import codecs
+import logging
+import os
+import time
+from html.parser import HTMLParser
+
+from dotenv import load_dotenv
+
+from agent import budget
+from agent.profiling import span
+from tools import http_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Load environment variables
+load_dotenv()
+
+# Bytes downloaded per page before the body is abandoned
+MAX_DOWNLOAD_BYTES = int(os.getenv("MAX_DOWNLOAD_BYTES", str(2 * 1024 * 1024)))
+CHUNK_SIZE = 16 * 1024
+# Bytes read per character of paragraph text a caller wants, and the least read of any page;
+# scripts, styles and markup make up most of a page, much of it before the first paragraph
+BYTES_PER_CHAR = int(os.getenv("PAGE_BYTES_PER_CHAR", "64"))
+MIN_PAGE_BYTES = 256 * 1024
+
+# Elements whose text is never part of a paragraph's visible text
+_SKIPPED_TAGS = {"script", "style", "template"}
+
+# Elements inside which whitespace-only text is kept as it is
+_PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Void elements, which never contain anything and are never left open
+_VOID_TAGS = {
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image",
+    "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source",
+    "spacer", "track", "wbr",
+}
+
+
+class ParagraphExtractor(HTMLParser):
+    """
+    Incremental parser that collects the text of `<p>` elements.
+
+    Builds the same element nesting as BeautifulSoup's `html.parser` tree builder: an end tag
+    closes the most recent open element of that name and everything opened after it (so
+    `</div>` also closes a `<p>` left open inside the div), and end tags without an open element
+    are ignored. Whitespace-only text between two tags collapses to a newline or a space
+    outside `<pre>` and `<textarea>`, as BeautifulSoup does. The text is therefore that of
+    `"\\n".join(p.get_text() for p in soup.find_all("p"))`, and `done` is reported as soon
+    as more than `max_chars` characters of it are final.
+    """
+
+    def __init__(self, max_chars=None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._paragraphs = []   # Text parts of every paragraph, in document order
+        self._lengths = []      # Text length of every paragraph
+        self._elements = []     # Open elements as (tag, paragraph index or None), outermost first
+        self._open = []         # Indexes of paragraphs that are still open
+        self._skipped = 0       # Depth inside script/style/template elements
+        self._preserved = 0     # Depth inside pre/textarea elements
+        self._blank = ""        # Whitespace-only text since the last tag, collapsed before it is added
+        self._in_text = False   # Whether text other than whitespace was added since the last tag
+        self._closed_voids = [] # Void elements closed at their start tag, whose next end tag is ignored
+        self._final_length = 0  # Length of the joined text of closed leading paragraphs
+        self._final_count = 0   # Number of leading paragraphs that are closed
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_blank()
+        if tag in _VOID_TAGS:
+            self._closed_voids.append(tag)
+            return
+        self._open_element(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags open an element and close it through the usual end tag handling
+        self._flush_blank()
+        self._open_element(tag)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_voids:
+            self._closed_voids.remove(tag)
+            return
+        self._flush_blank()
+        self._close_element(tag)
+
+    def handle_data(self, data):
+        if not self._open or self._skipped:
+            return
+        if not self._preserved and not self._in_text and not data.strip(_SPACES):
+            # Only known to be blank once the next tag arrives
+            self._blank += data
+            return
+        self._append(self._blank + data)
+        self._blank = ""
+        self._in_text = True
+
+    def handle_comment(self, data):
+        self._flush_blank()
+
+    def handle_decl(self, decl):
+        self._flush_blank()
+
+    def handle_pi(self, data):
+        self._flush_blank()
+
+    def unknown_decl(self, data):
+        self._flush_blank()
+
+    def close(self):
+        super().close()
+        self._flush_blank()
+
+    def text(self) -> str:
+        """Return the joined text of all non-empty paragraphs seen so far."""
+        texts = ("".join(parts) for parts in self._paragraphs)
+        return "\n".join(text for text in texts if text)
+
+    def _open_element(self, tag):
+        """Push an element, starting a paragraph for `<p>`."""
+        index = None
+        if tag == "p":
+            index = len(self._paragraphs)
+            self._open.append(index)
+            self._paragraphs.append([])
+            self._lengths.append(0)
+        elif tag in _SKIPPED_TAGS:
+            self._skipped += 1
+        elif tag in _PRESERVE_WHITESPACE_TAGS:
+            self._preserved += 1
+        self._elements.append((tag, index))
+
+    def _close_element(self, tag):
+        """Close the most recent open element named `tag` and every element opened after it."""
+        for position in range(len(self._elements) - 1, -1, -1):
+            if self._elements[position][0] == tag:
+                break
+        else:
+            return
+
+        closed_paragraph = False
+        for name, index in reversed(self._elements[position:]):
+            if index is not None:
+                self._open.pop()
+                closed_paragraph = True
+            elif name in _SKIPPED_TAGS:
+                self._skipped -= 1
+            elif name in _PRESERVE_WHITESPACE_TAGS:
+                self._preserved -= 1
+        del self._elements[position:]
+        if closed_paragraph:
+            self._advance()
+
+    def _append(self, data):
+        """Add text to every open paragraph."""
+        for index in self._open:
+            self._paragraphs[index].append(data)
+            self._lengths[index] += len(data)
+        self._check_budget()
+
+    def _flush_blank(self):
+        """Add pending whitespace-only text, collapsed to a single newline or space."""
+        self._in_text = False
+        if self._blank:
+            self._append("\n" if "\n" in self._blank else " ")
+            self._blank = ""
+
+    def _advance(self):
+        """Account for leading paragraphs that can no longer change."""
+        open_indexes = set(self._open)
+        while self._final_count < len(self._paragraphs) and self._final_count not in open_indexes:
+            length = self._lengths[self._final_count]
+            if length:
+                self._final_length += length + (1 if self._final_length else 0)
+            self._final_count += 1
+        self._check_budget()
+
+    def _check_budget(self):
+        """Set `done` once the final prefix of the text is longer than `max_chars`."""
+        if self.max_chars is None or self.done:
+            return
+        length = self._final_length
+        if self._final_count < len(self._paragraphs):
+            # The first open paragraph only grows at its end, so its current text is final too
+            partial = self._lengths[self._final_count]
+            if partial:
+                length += partial + (1 if length else 0)
+        self.done = length > self.max_chars
+
+
+def extract_paragraph_text(chunks, max_chars=None) -> str:
+    """
+    Extract paragraph text from an iterable of HTML string chunks.
+
+    Stops consuming chunks once more than `max_chars` characters are known, so callers can
+    truncate to `max_chars` and know there was more.
+    """
+    parser = ParagraphExtractor(max_chars)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            return parser.text()
+    parser.close()
+    return parser.text()
+
+
+def byte_budget(max_chars) -> int:
+    """Bytes to download for about `max_chars` characters of paragraph text, capped at `MAX_DOWNLOAD_BYTES`."""
+    return min(MAX_DOWNLOAD_BYTES, max(MIN_PAGE_BYTES, max_chars * BYTES_PER_CHAR))
+
+
+def _decoded_chunks(response, max_bytes, deadline=None):
+    """
+    Yield decoded text from a streamed response, stopping after `max_bytes`.
+
+    Reading also stops once the `time.monotonic()` value `deadline` has passed, so a page
+    nobody waits for any more does not keep its worker busy.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    received = 0
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        # Stop reading a slow page once the query is out of time
+        budget.check()
+        if deadline is not None and time.monotonic() >= deadline:
+            logging.warning(f"Stopped reading {response.url} at its deadline after {received} bytes.")
+            break
+        received += len(chunk)
+        if received > max_bytes:
+            logging.warning(f"Stopped reading {response.url} after {max_bytes} bytes.")
+            yield decoder.decode(chunk[: max_bytes - (received - len(chunk))], final=True)
+            return
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def fetch_html(url, tool=None, timeout=None, max_bytes=MAX_DOWNLOAD_BYTES, deadline=None) -> str:
+    """
+    Download a webpage as text, reading at most `max_bytes` and nothing after `deadline`.
+
+    Raises `requests.exceptions.RequestException` on network or HTTP errors.
+    """
+    with span("html_extract", "download", tool=tool) as current:
+        response = http_client.get(url, tool=tool, timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+            html = "".join(_decoded_chunks(response, max_bytes, deadline))
+            current.set(output_chars=len(html))
+            return html
+        finally:
+            response.close()
+
+
+def fetch_paragraph_text(url, max_chars, tool=None, timeout=None, max_bytes=MAX_DOWNLOAD_BYTES, deadline=None) -> str:
+    """
+    Stream a webpage and return its paragraph text, reading only as much as `max_chars` needs.
+
+    Reading stops early at `deadline`, a `time.monotonic()` value, with the text read so far.
+
+    Raises `requests.exceptions.RequestException` on network or HTTP errors.
+    """
+    with span("html_extract", "parse", tool=tool) as current:
+        response = http_client.get(url, tool=tool, timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+            text = extract_paragraph_text(_decoded_chunks(response, max_bytes, deadline), max_chars)
+            current.set(output_chars=len(text))
+            return text
+        finally:
+            response.close()
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from agent import budget
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Load environment variables
+load_dotenv()
+
+# Connections kept alive per host, and the number of hosts with a pool
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+
+# Retries for connection errors and transient status codes, with jittered exponential backoff
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+BACKOFF_FACTOR = 0.3
+BACKOFF_JITTER = 0.2
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Timeouts in seconds: a default and per-tool overrides
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+TOOL_TIMEOUTS = {
+    "WeatherTool": 5,
+    "InternetSearch": 5,
+    "WebScraper": 10,
+}
+
+
+def _supports_brotli() -> bool:
+    """Brotli responses are only decoded when an optional brotli package is installed."""
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": "gzip, deflate, br" if _supports_brotli() else "gzip, deflate",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def timeout_for(tool=None, timeout=None) -> float:
+    """
+    Return the explicit timeout, else the tool's timeout, else the default, cut to the time
+    the current query has left.
+
+    Raises `agent.budget.BudgetExceeded` when the query is already out of time.
+    """
+    if timeout is None:
+        timeout = TOOL_TIMEOUTS.get(tool, DEFAULT_TIMEOUT)
+    return budget.clip(timeout)
+
+
+def _backoff(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` (starting at 1)."""
+    return BACKOFF_FACTOR * (2 ** (attempt - 1)) + random.uniform(0, BACKOFF_JITTER)
+
+
+def create_session(pool_size=POOL_SIZE, max_retries=MAX_RETRIES) -> requests.Session:
+    """
+    Build a session keeping up to `pool_size` connections alive per host.
+
+    The pools do not block: a request beyond `pool_size` opens an extra connection that is
+    closed afterwards, so no request waits for a free slot outside its own timeout.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=pool_size,
+        pool_block=False,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get(url, tool=None, timeout=None, **kwargs) -> requests.Response:
+    """
+    Send a GET request through the shared session.
+
+    Args:
+        url (str): Target URL.
+        tool (str): Name of the calling tool, used to pick its timeout.
+        timeout (float): Explicit timeout overriding the tool's one.
+        **kwargs: Passed to `requests.Session.get` (params, headers, stream, ...).
+    """
+    return get_session().get(url, timeout=timeout_for(tool, timeout), **kwargs)
+
+
+class AsyncHttpClient:
+    """
+    Async counterpart of the shared session for concurrent fetching.
+
+    Connections are pooled by `httpx`; a semaphore per host keeps the same per-host limit
+    as the synchronous session, and retries use the same jittered backoff.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self._client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=pool_size * POOL_HOSTS,
+                max_keepalive_connections=pool_size * POOL_HOSTS,
+            ),
+        )
+        self._host_limits = {}
+
+    async def get(self, url, tool=None, timeout=None, **kwargs) -> httpx.Response:
+        """Send a GET request, retrying connection errors and transient statuses."""
+        host = urlsplit(url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.pool_size))
+
+        attempt = 0
+        while True:
+            try:
+                async with limit:
+                    response = await self._client.get(url, timeout=timeout_for(tool, timeout), **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+            attempt += 1
+            await asyncio.sleep(_backoff(attempt))
+
+    async def aclose(self):
+        """Close all pooled connections."""
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+# One async client per event loop, since `httpx` connections are bound to the loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncHttpClient:
+    """Return the shared async client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncHttpClient()
+    return client
+
+
+async def async_get(url, tool=None, timeout=None, **kwargs) -> httpx.Response:
+    """Send a GET request through the shared async client of the running loop."""
+    return await get_async_client().get(url, tool=tool, timeout=timeout, **kwargs)
@@ -1,8 +1,13 @@
+import contextvars
 import os
+import time
 import logging
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, wait
 from langchain.tools import Tool
+from agent import budget
+from tools.executors import CPU_BOUND, register_workload, tool_work
+from tools.html_extract import byte_budget, extract_paragraph_text, fetch_html
+from tools.tool_cache import ttl_cache
 from serpapi import GoogleSearch
 from dotenv import load_dotenv
 
@@ -13,25 +18,83 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 load_dotenv()
 API_KEY = os.getenv("SERPAPI_API_KEY")
 
-def extract_text_from_url(url: str) -> str:
-    """Fetches and extracts text content from a webpage."""
+# Number of organic results to fetch, and the time budget for downloading their pages
+NUM_RESULTS = int(os.getenv("SEARCH_NUM_RESULTS", "3"))
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "4"))
+
+# Seconds to wait for SerpAPI, whose own default is 60000
+SERPAPI_TIMEOUT = float(os.getenv("SERPAPI_TIMEOUT", "10"))
+
+# Characters of text kept from each result page
+PAGE_CHARS = 1000
+
+# Downloads wait on the network, but parsing the result pages is CPU work
+register_workload("InternetSearch", CPU_BOUND)
+
+# Shared workers for page downloads, so concurrent searches do not spawn threads per call
+_fetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_FETCH_WORKERS", "16")),
+    thread_name_prefix="search-fetch",
+)
+
+def google_search(params: dict) -> dict:
+    """Run a SerpAPI search, waiting no longer than the current query has left."""
+    search = GoogleSearch(params)
+    search.timeout = budget.clip(SERPAPI_TIMEOUT)
+    results = search.get_dict()
+    # The timeout applies per read, so a slow response can still outlast the budget
+    budget.check()
+    return results
+
+@tool_work("InternetSearch")
+def parse_result_text(html: str) -> str:
+    """Return the paragraph text of a downloaded result page, up to `PAGE_CHARS` and a bit."""
+    return extract_paragraph_text([html], PAGE_CHARS)
+
+def extract_text_from_url(url: str, timeout: float = None, deadline: float = None) -> str:
+    """Fetches and extracts text content from a webpage, reading nothing after `deadline`."""
     logging.info(f"Extracting text from URL: {url}")
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()  # Raise an error for bad status codes
-        
-        soup = BeautifulSoup(response.text, "html.parser")
-        paragraphs = soup.find_all("p")  # Extracting paragraphs
-        text = "\n".join([p.get_text() for p in paragraphs if p.get_text()])
-        
+        # Download only as much as the output limit needs, then parse where the workload says
+        html = fetch_html(url, tool="InternetSearch", timeout=timeout, max_bytes=byte_budget(PAGE_CHARS),
+                          deadline=deadline)
+        text = parse_result_text(html)
+
         logging.info("Successfully extracted text from webpage.")
-        return text[:1000] + "..." if len(text) > 1000 else text  # Limit output size
+        return text[:PAGE_CHARS] + "..." if len(text) > PAGE_CHARS else text  # Limit output size
     except Exception as e:
         logging.error(f"Error extracting text: {e}")
         return f"Error extracting text: {e}"
 
-def search_internet(query: str) -> str:
+def fetch_pages(links, deadline: float = SEARCH_DEADLINE) -> dict:
+    """
+    Extract text from all links concurrently and return what finished before the deadline.
+
+    Pages still downloading when the deadline passes are left out of the result, and stop
+    reading at their next chunk so the shared workers are free again. The deadline is cut to
+    the time the current query has left, and downloads run in a copy of the caller's context
+    so they see the query's budget.
+    """
+    deadline = budget.clip(deadline)
+    started = time.monotonic()
+    futures = {
+        _fetch_pool.submit(
+            contextvars.copy_context().run, extract_text_from_url, link, deadline, started + deadline
+        ): link
+        for link in links
+    }
+    done, not_done = wait(futures, timeout=deadline)
+
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        logging.warning(f"Dropped {len(not_done)} of {len(futures)} pages that missed the {deadline}s deadline.")
+
+    logging.info(f"Fetched {len(done)} pages in {time.monotonic() - started:.2f}s.")
+    return {futures[future]: future.result() for future in done}
+
+@ttl_cache("InternetSearch", ttl=3600)
+def search_internet(query: str, num: int = NUM_RESULTS, deadline: float = SEARCH_DEADLINE) -> str:
     """Search the internet using SerpAPI and return the top results along with extracted text."""
     if not API_KEY:
         logging.error("API_KEY for SerpAPI is missing. Please check your .env file.")
@@ -41,25 +104,32 @@ def search_internet(query: str) -> str:
     params = {
         "q": query,
         "api_key": API_KEY,
-        "num": 3,  # Fetch top 3 results
+        "num": num,  # Fetch top results
         "hl": "en",
     }
     
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict().get("organic_results", [])
+        results = google_search(params).get("organic_results", [])
         
         if not results:
             logging.warning("No relevant results found.")
             return "No relevant results found."
         
+        # Download all result pages at once; late pages are dropped
+        links = [r.get("link", "#") for r in results]
+        logging.info(f"Fetching content from {len(links)} pages.")
+        pages = fetch_pages([link for link in links if link != "#"], deadline)
+
         output = []
-        for r in results:
+        for r, link in zip(results, links):
+            if link not in pages:
+                continue
             title = r.get("title", "No Title")
-            link = r.get("link", "#")
-            logging.info(f"Fetching content from: {link}")
-            text_content = extract_text_from_url(link)  # Extract content
-            output.append(f"**{title}**\n{link}\n{text_content}\n")
+            output.append(f"**{title}**\n{link}\n{pages[link]}\n")
+
+        if not output:
+            logging.warning("No result pages could be fetched before the deadline.")
+            return "\n".join(f"**{r.get('title', 'No Title')}**\n{link}\n" for r, link in zip(results, links))
         
         logging.info("Internet search completed successfully.")
         return "\n".join(output)
@@ -0,0 +1,105 @@
+import re
+import threading
+
+# Words that make a query a greeting, in the languages the tools support
+GREETING_WORDS = frozenset({
+    "hello", "hi", "hallo", "hey", "greetings", "howdy", "hola", "bonjour", "salut",
+    "مرحبا", "مرحباً", "اهلا", "أهلا", "اهلاً", "أهلاً", "السلام", "سلام",
+})
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+# Trigger keywords declared by the tool modules, by intent
+_INTENTS = {}
+_matcher = None
+_lock = threading.Lock()
+
+
+class KeywordMatcher:
+    """
+    Single-pass multi-keyword matcher.
+
+    All keywords are compiled into one alternation, longest first. A keyword that contains
+    shorter keywords also reports their intents, so one scan gives the same result as running
+    `keyword in query` for each keyword. The only occurrences a non-overlapping scan can miss
+    are keywords that start inside an earlier match and run past it; those partial overlaps
+    are precomputed per keyword and checked only when that keyword is found.
+    """
+
+    def __init__(self, intents):
+        """
+        Args:
+            intents (dict): Intent name -> iterable of trigger keywords (matched case-insensitively).
+        """
+        keyword_intents = {}
+        for intent, keywords in intents.items():
+            for keyword in keywords:
+                keyword_intents.setdefault(keyword.lower(), set()).add(intent)
+
+        # Every keyword also triggers the intents of the keywords it contains
+        self._intents = {
+            keyword: frozenset().union(*(
+                other_intents for other, other_intents in keyword_intents.items() if other in keyword
+            ))
+            for keyword in keyword_intents
+        }
+
+        # Keywords whose start can hide inside a match of each keyword
+        self._overlaps = {
+            keyword: tuple(other for other in self._intents if _overlaps(keyword, other))
+            for keyword in self._intents
+        }
+
+        alternatives = "|".join(re.escape(keyword) for keyword in sorted(self._intents, key=len, reverse=True))
+        self._pattern = re.compile(f"({alternatives})") if alternatives else None
+
+    def match(self, query):
+        """Return the set of intents whose keywords occur in `query`."""
+        if self._pattern is None:
+            return set()
+
+        query = query.lower()
+        matched = set()
+        for keyword in self._pattern.findall(query):
+            matched |= self._intents[keyword]
+            for other in self._overlaps[keyword]:
+                if not self._intents[other] <= matched and other in query:
+                    matched |= self._intents[other]
+        return matched
+
+
+def _overlaps(first, second):
+    """Whether `second` can start inside `first` and end after it."""
+    if first == second or second in first:
+        return False
+    return any(first.endswith(second[:size]) for size in range(1, min(len(first), len(second) + 1)))
+
+
+def is_greeting(query):
+    """Whether `query` contains a greeting word."""
+    return not GREETING_WORDS.isdisjoint(_WORDS.findall(query.lower()))
+
+
+def register_intent(intent, keywords):
+    """Declare the trigger keywords of a tool; the shared matcher is rebuilt on next use."""
+    global _matcher
+    with _lock:
+        _INTENTS[intent] = tuple(keywords)
+        _matcher = None
+
+
+def get_matcher():
+    """Return the matcher compiled from every registered intent."""
+    global _matcher
+    matcher = _matcher
+    if matcher is None:
+        with _lock:
+            if _matcher is None:
+                _matcher = KeywordMatcher(_INTENTS)
+            matcher = _matcher
+    return matcher
+
+
+def match_intents(query):
+    """Return every registered intent whose keywords occur in `query`."""
+    return get_matcher().match(query)
@@ -0,0 +1,138 @@
+import ast
+import importlib
+import json
+import logging
+import os
+import threading
+
+from langchain.tools import Tool
+
+from agent.profiling import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(TOOLS_DIR, ".tool_manifest.json")
+MANIFEST_VERSION = 1
+
+
+def _tool_kwargs(module_name, tree):
+    """
+    Find `<module_name> = Tool(name=..., description=..., ...)` in a module's AST.
+
+    Returns the constant keyword arguments, or None if the tool is not declared that way.
+    """
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.Call):
+            continue
+        if not any(isinstance(target, ast.Name) and target.id == module_name for target in node.targets):
+            continue
+        call = node.value
+        if not (isinstance(call.func, ast.Name) and call.func.id == "Tool"):
+            return None
+
+        kwargs = {}
+        for keyword in call.keywords:
+            if keyword.arg in ("name", "description", "return_direct"):
+                if not isinstance(keyword.value, ast.Constant):
+                    return None
+                kwargs[keyword.arg] = keyword.value.value
+        if "name" not in kwargs or "description" not in kwargs:
+            return None
+        return kwargs
+    return None
+
+
+def describe_tool_file(path):
+    """Build the manifest entry of one `*_tool.py` file without importing it."""
+    module_name = os.path.basename(path)[:-3]
+    entry = {
+        "module": f"tools.{module_name}",
+        "attribute": module_name,
+        "mtime": os.path.getmtime(path),
+        "size": os.path.getsize(path),
+        "lazy": False,
+    }
+
+    try:
+        with open(path, encoding="utf-8") as source:
+            tree = ast.parse(source.read(), filename=path)
+    except (OSError, SyntaxError) as e:
+        logging.error(f"Error parsing tool {module_name}: {e}")
+        return entry
+
+    kwargs = _tool_kwargs(module_name, tree)
+    if kwargs is not None:
+        entry.update(kwargs, lazy=True)
+    return entry
+
+
+def build_manifest(tools_dir=TOOLS_DIR, manifest_path=MANIFEST_PATH):
+    """
+    Return the manifest of every `*_tool.py` file, reusing cached entries whose file is unchanged.
+
+    The manifest maps file names to `{module, attribute, name, description, return_direct,
+    lazy, mtime, size}` and is written back to `manifest_path` when anything changed.
+    """
+    cached = {}
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            data = json.load(manifest_file)
+        if data.get("version") == MANIFEST_VERSION:
+            cached = data.get("tools", {})
+    except (OSError, ValueError):
+        pass
+
+    manifest = {}
+    for file in sorted(os.listdir(tools_dir)):
+        if not file.endswith("_tool.py"):
+            continue
+        path = os.path.join(tools_dir, file)
+        entry = cached.get(file)
+        if entry is None or entry["mtime"] != os.path.getmtime(path) or entry["size"] != os.path.getsize(path):
+            entry = describe_tool_file(path)
+        manifest[file] = entry
+
+    if manifest != cached:
+        try:
+            with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+                json.dump({"version": MANIFEST_VERSION, "tools": manifest}, manifest_file, indent=2)
+        except OSError as e:
+            logging.warning(f"Could not write tool manifest: {e}")
+
+    return manifest
+
+
+class LazyToolFunc:
+    """Callable that imports the real tool on first use and delegates to its `func`."""
+
+    def __init__(self, module, attribute):
+        self.module = module
+        self.attribute = attribute
+        self._tool = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import the tool module and return the real `Tool`."""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    logging.info(f"Importing tool module on first use: {self.module}")
+                    with span(f"import:{self.module}", "import"):
+                        module = importlib.import_module(self.module)
+                    self._tool = getattr(module, self.attribute)
+        return self._tool
+
+    def __call__(self, *args, **kwargs):
+        return self.load().func(*args, **kwargs)
+
+
+def lazy_tool(entry):
+    """Build a lightweight `Tool` stub from a manifest entry."""
+    return Tool(
+        name=entry["name"],
+        func=LazyToolFunc(entry["module"], entry["attribute"]),
+        description=entry["description"],
+        return_direct=entry.get("return_direct", False),
+    )
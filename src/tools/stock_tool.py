@@ -1,6 +1,16 @@
 import yfinance as yf
 import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, time as clock_time, timedelta, timezone
+from dotenv import load_dotenv
 from langchain.tools import Tool
+from tools.batching import register_batch
+from tools.executors import IO_BOUND, register_workload, tool_work
+from tools.keyword_matcher import register_intent
+from tools.tool_cache import CACHE_REGISTRY, InFlight
 import warnings
 
 # Configure logging
@@ -9,37 +19,285 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Suppress specific warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="langchain")
 
+# Load environment variables
+load_dotenv()
+# Seconds a quote stays fresh while the market is open, and at most while it is closed
+QUOTE_TTL_OPEN = float(os.getenv("STOCK_QUOTE_TTL_OPEN", "60"))
+QUOTE_TTL_CLOSED = float(os.getenv("STOCK_QUOTE_TTL_CLOSED", "3600"))
+# Seconds a symbol without data (invalid or delisted) is answered from the cache
+NO_DATA_TTL = float(os.getenv("STOCK_NO_DATA_TTL", "60"))
+
+try:
+    from zoneinfo import ZoneInfo
+    MARKET_TZ = ZoneInfo("America/New_York")
+except Exception:
+    # No tz database (e.g. Windows without `tzdata`): fall back to Eastern Standard Time
+    MARKET_TZ = timezone(timedelta(hours=-5))
+MARKET_OPEN = clock_time(9, 30)
+MARKET_CLOSE = clock_time(16, 0)
+
+# Keywords that route a query to this tool
+TRIGGER_KEYWORDS = ["stock", "price", "share"]
+register_intent("stock", TRIGGER_KEYWORDS)
+
+_TICKER_SEPARATORS = re.compile(r"[,;\s]+")
+# Shape of a Yahoo Finance symbol: "AAPL", "BRK-B", "SAP.DE", "^GSPC", "EURUSD=X"
+_TICKER_SHAPE = re.compile(r"^\^?[A-Z0-9]{1,6}([.-][A-Z0-9]{1,4})?(=[XF])?$")
+# Words the LLM puts around tickers ("AAPL stock price") that are not symbols themselves
+_NOT_TICKERS = {
+    "STOCK", "STOCKS", "SHARE", "SHARES", "PRICE", "PRICES", "QUOTE", "QUOTES", "TICKER", "TICKERS",
+    "SYMBOL", "VALUE", "CURRENT", "LATEST", "TODAY", "NOW", "OF", "FOR", "AND", "THE", "IS", "WHAT",
+    "PLEASE",
+}
+
+
+def market_is_open(now=None) -> bool:
+    """Whether US equity markets are in regular trading hours (holidays are not considered)."""
+    now = (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def seconds_until_open(now=None) -> float:
+    """Seconds from `now` until the next regular session opens (holidays are not considered)."""
+    now = (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+    day = now.date()
+    while True:
+        opens = datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ)
+        if day.weekday() < 5 and opens > now:
+            return (opens - now).total_seconds()
+        day += timedelta(days=1)
+
+
+def quote_ttl(now=None) -> float:
+    """
+    Seconds a quote fetched at `now` stays valid: short while trading, longer while closed,
+    but never past the next open.
+    """
+    if market_is_open(now):
+        return QUOTE_TTL_OPEN
+    return min(QUOTE_TTL_CLOSED, seconds_until_open(now))
+
+
+class QuoteCache:
+    """
+    In-memory last-price cache with market-hours-aware expiry and request coalescing.
+
+    Symbols without data are remembered for `no_data_ttl` seconds. A symbol that another
+    thread is already downloading is not requested again; the caller waits for that download.
+    """
+
+    def __init__(self, clock=time.time, ttl=quote_ttl, no_data_ttl=NO_DATA_TTL):
+        self.clock = clock
+        self.ttl = ttl
+        self.no_data_ttl = no_data_ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._quotes = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, symbol):
+        """Return `(found, price)`; a symbol cached as having no data is found with a price of None."""
+        with self._lock:
+            return self._lookup(symbol)
+
+    def get(self, symbol):
+        """Return the cached price of `symbol`, or None if it is missing, expired or has no data."""
+        return self.lookup(symbol)[1]
+
+    def put(self, symbol, price):
+        """Cache a price, or None for a symbol without data."""
+        with self._lock:
+            self._store(symbol, price)
+
+    def fetch(self, symbols, download):
+        """
+        Return the price of each symbol, from the cache where possible.
+
+        `download(symbols)` is called once, with the symbols that are neither cached nor being
+        downloaded by another thread, and returns a dict of prices (None for no data).
+        """
+        prices = {}
+        leading = []
+        waiting = {}
+        with self._lock:
+            for symbol in symbols:
+                found, price = self._lookup(symbol)
+                if found:
+                    prices[symbol] = price
+                elif symbol in self._in_flight:
+                    waiting[symbol] = self._in_flight[symbol]
+                    self.coalesced += 1
+                else:
+                    self._in_flight[symbol] = InFlight()
+                    leading.append(symbol)
+
+        if leading:
+            self._download(leading, download, prices)
+
+        for symbol, pending in waiting.items():
+            prices[symbol] = pending.wait(f"a quote of {symbol}")
+        return prices
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters of this cache, like `ToolCache.stats`."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "size": len(self._quotes),
+        }
+
+    def _download(self, symbols, download, prices):
+        """Download the symbols this thread leads and hand the results to the threads waiting on them."""
+        error = None
+        fetched = {}
+        try:
+            fetched = download(symbols)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                if error is not None:
+                    self.errors += 1
+                pending = [self._in_flight.pop(symbol) for symbol in symbols]
+                for symbol, waiter in zip(symbols, pending):
+                    if error is None:
+                        waiter.value = prices[symbol] = fetched.get(symbol)
+                        self._store(symbol, waiter.value)
+                    else:
+                        waiter.error = error
+            for waiter in pending:
+                waiter.event.set()
+
+    def _lookup(self, symbol):
+        """Find a live entry, counting the hit or miss. Caller holds the lock."""
+        entry = self._quotes.get(symbol)
+        if entry is None or entry[1] <= self.clock():
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, entry[0]
+
+    def _store(self, symbol, price):
+        """Cache a price, or a short-lived "no data" entry for None. Caller holds the lock."""
+        ttl = self.ttl() if price is not None else self.no_data_ttl
+        self._quotes[symbol] = (price, self.clock() + ttl)
+
+
+QUOTES = QuoteCache()
+CACHE_REGISTRY["StockPrice"] = QUOTES
+
+
+def normalize_ticker(ticker: str) -> str:
+    """Upper-case a ticker and strip the quotes, cashtag and punctuation the LLM tends to add."""
+    return ticker.strip().upper().replace("'", "").replace('"', "").lstrip("$").rstrip(".?!:")
+
+
+def parse_tickers(text: str):
+    """
+    Split tool input such as "AAPL, MSFT" into unique normalized tickers, in order.
+
+    Words that cannot be symbols ("AAPL stock price" gives only AAPL) are left out.
+    """
+    tickers = [normalize_ticker(part) for part in _TICKER_SEPARATORS.split(text)]
+    return list(dict.fromkeys(
+        ticker for ticker in tickers if _TICKER_SHAPE.match(ticker) and ticker not in _NOT_TICKERS
+    ))
+
+
+def fetch_quotes(symbols):
+    """
+    Return the last closing price of each symbol, or None when Yahoo Finance has no data.
+
+    Cached quotes are reused, symbols already being fetched by another call are waited for,
+    and the rest are fetched with one bulk history request.
+    """
+    return QUOTES.fetch(symbols, _download_quotes)
+
+
+def _download_quotes(symbols):
+    """Fetch the last closing price of each symbol with one bulk history request."""
+    logging.info(f"Fetching stock data for {len(symbols)} tickers in one request: {', '.join(symbols)}")
+    # A few days of daily bars so weekends and holidays still have a last close
+    history = yf.download(symbols, period="5d", interval="1d", group_by="ticker", progress=False, threads=True)
+    return _last_closes(history, symbols)
+
+
+@tool_work("StockPrice")
+def _last_closes(history, symbols):
+    """Return the last closing price of each symbol in a bulk history frame, or None without data."""
+    prices = {}
+    for symbol in symbols:
+        try:
+            # Columns are (ticker, field) pairs unless yfinance flattened a single-ticker download
+            frame = history[symbol] if history.columns.nlevels > 1 else history
+            closes = frame["Close"].dropna()
+        except KeyError:
+            closes = None
+        prices[symbol] = float(closes.iloc[-1]) if closes is not None and not closes.empty else None
+    return prices
+
+
+def _describe(symbol, price):
+    if price is None:
+        logging.warning(f"No available data for {symbol}.")
+        return (f"No available data for {symbol}. The ticker might be invalid or delisted, "
+                f"or the market might be closed.")
+    return f"The current price of {symbol} is {price:.2f} USD."
+
+
 def get_stock_price(ticker: str):
     """
-    Fetch the current closing price of a given stock using Yahoo Finance.
-    
-    :param ticker: The stock ticker symbol (e.g., 'AAPL', 'MSFT').
-    :return: The current stock price or an error message.
-    """
-    ticker = ticker.strip().upper().replace("'", "").replace('"', "")
-    logging.info(f"Fetching stock data for: {ticker}")
-    
-    stock = yf.Ticker(ticker)
-    
-    if stock.info.get("regularMarketPrice") is None:
-        logging.error(f"Stock {ticker} is unavailable or removed from Yahoo Finance.")
-        return f"Stock {ticker} is unavailable or might have been removed from Yahoo Finance."
-    
-    history = stock.history(period="1d")
-    
-    if history.empty:
-        logging.warning(f"No available data for {ticker}. Market might be closed.")
-        return f"No available data for {ticker}. The market might be closed or insufficient data exists."
-    
-    price = history["Close"].iloc[-1]
-    logging.info(f"Stock data retrieved successfully for {ticker}. Price: {price:.2f} USD")
-    return f"The current price of {ticker} is {price:.2f} USD."
+    Fetch the current closing price of one or more stocks using Yahoo Finance.
+
+    :param ticker: A ticker symbol (e.g., 'AAPL') or several separated by commas (e.g., 'AAPL, MSFT').
+    :return: The current stock price(s) or an error message.
+    """
+    symbols = parse_tickers(ticker)
+    if not symbols:
+        return "Please provide a stock ticker symbol (e.g., AAPL)."
+
+    try:
+        prices = fetch_quotes(symbols)
+    except Exception as e:
+        logging.error(f"Error fetching stock data for {', '.join(symbols)}: {e}")
+        return f"Failed to retrieve stock data: {e}"
+
+    return "\n".join(_describe(symbol, prices[symbol]) for symbol in symbols)
+
+
+def get_stock_prices(tickers):
+    """
+    Answer many StockPrice calls with one bulk request.
+
+    :param tickers: Tool inputs, one per call.
+    :return: Dict mapping each input to the tool's answer for it.
+    """
+    symbols = {ticker: parse_tickers(ticker) for ticker in tickers}
+    prices = fetch_quotes(list(dict.fromkeys(symbol for group in symbols.values() for symbol in group)))
+    return {
+        ticker: "\n".join(_describe(symbol, prices[symbol]) for symbol in group)
+        for ticker, group in symbols.items() if group
+    }
+
+register_batch("StockPrice", get_stock_prices)
+# A few days of bars per symbol: pickling the frame to a worker would cost more than reading it
+register_workload("StockPrice", IO_BOUND)
 
 # Create a tool within LangChain using `get_stock_price`
 stock_tool = Tool(
     name="StockPrice",
     func=get_stock_price,
-    description="Fetches the current stock price using Yahoo Finance.",
+    description="Fetches the current stock price using Yahoo Finance. Accepts one ticker or several separated by commas.",
     return_direct=True
 )
 
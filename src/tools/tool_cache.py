@@ -0,0 +1,249 @@
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from agent import budget
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Load environment variables
+load_dotenv()
+
+# Optional SQLite file that backs every tool cache on disk
+DISK_PATH = os.getenv("TOOL_CACHE_DB")
+
+# Prefixes of tool results that describe a failure and must not be cached
+ERROR_PREFIXES = ("error", "an error", "failed", "api_key")
+
+# Every cache created by `ttl_cache` or `cached_tool`, by tool name
+CACHE_REGISTRY = {}
+
+
+def is_cacheable(result) -> bool:
+    """Default policy: cache any string result that does not describe an error."""
+    return isinstance(result, str) and not result.strip().lower().startswith(ERROR_PREFIXES)
+
+
+def default_key(*args, **kwargs) -> str:
+    """Build a cache key from the call arguments, ignoring case and surrounding whitespace."""
+    parts = [str(arg).strip().lower() for arg in args]
+    parts += [f"{name}={str(value).strip().lower()}" for name, value in sorted(kwargs.items())]
+    return "|".join(parts)
+
+
+class InFlight:
+    """
+    A call that concurrent identical requests wait on instead of fetching again.
+
+    The leader sets `value` or `error` and then `event`; the others call `wait`.
+    """
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def wait(self, what):
+        """Wait for the call within the current query's budget; return its value or raise its error."""
+        if not self.event.wait(budget.clip(None)):
+            raise budget.BudgetExceeded(f"The query ran out of time waiting for {what}.")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class ToolCache:
+    """
+    Bounded in-process LRU with TTLs, request coalescing and an optional SQLite backing store.
+    """
+
+    def __init__(self, name, ttl, max_entries=256, disk_path=DISK_PATH):
+        """
+        Args:
+            name (str): Tool name, used for metrics and the on-disk namespace.
+            ttl (float): Seconds a result stays valid.
+            max_entries (int): Maximum results kept in memory.
+            disk_path (str): Optional SQLite file that survives restarts.
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if disk_path:
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS tool_cache (
+                        tool TEXT,
+                        key TEXT,
+                        value TEXT,
+                        expires_at REAL,
+                        PRIMARY KEY (tool, key)
+                    )
+                    """
+                )
+
+    def call(self, func, key, *args, should_cache=is_cacheable, **kwargs):
+        """Return the cached result for `key`, or run `func` once for all concurrent callers."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = InFlight()
+                leader = True
+                self.misses += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            return pending.wait(f"a {self.name} call")
+
+        try:
+            value = func(*args, **kwargs)
+            pending.value = value
+            # A result cut short by the query's deadline may be incomplete
+            current = budget.current()
+            if should_cache(value) and not (current is not None and current.expired):
+                with self._lock:
+                    self._store(key, value)
+            return value
+        except Exception as e:
+            pending.error = e
+            self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            pending.event.set()
+
+    def clear(self):
+        """Drop all cached results for this tool."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM tool_cache WHERE tool = ?", (self.name,))
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters of this cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "size": len(self._entries),
+        }
+
+    def _lookup(self, key):
+        """Find a live result in memory, then on disk. Caller holds the lock."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return True, value
+            del self._entries[key]
+
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM tool_cache WHERE tool = ? AND key = ?",
+                (self.name, key),
+            ).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                return True, value
+
+        return False, None
+
+    def _store(self, key, value):
+        """Save a fresh result in memory and on disk. Caller holds the lock."""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+
+        if self._conn is not None:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tool_cache (tool, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (self.name, key, json.dumps(value), expires_at),
+                    )
+            except Exception as e:
+                logging.error(f"Error writing {self.name} cache entry to disk: {e}")
+
+    def _remember(self, key, value, expires_at):
+        """Insert into the in-memory LRU, evicting the least recently used entries."""
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def ttl_cache(name, ttl, max_entries=256, key=default_key, should_cache=is_cacheable, disk_path=DISK_PATH):
+    """
+    Decorate a tool function with a registered `ToolCache`.
+
+    The wrapped function exposes the cache as `.cache` and the original as `.uncached`.
+    """
+    cache = ToolCache(name, ttl, max_entries=max_entries, disk_path=disk_path)
+    CACHE_REGISTRY[name] = cache
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.call(func, key(*args, **kwargs), *args, should_cache=should_cache, **kwargs)
+
+        wrapper.cache = cache
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+def cached_tool(tool, ttl, **options):
+    """Wrap the `func` of an existing LangChain `Tool` with a cache named after the tool."""
+    tool.func = ttl_cache(tool.name, ttl, **options)(tool.func)
+    return tool
+
+
+def cache_stats() -> dict:
+    """Return the counters of every registered tool cache."""
+    return {name: cache.stats() for name, cache in CACHE_REGISTRY.items()}
+
+
+def render_metrics() -> str:
+    """Render the counters of every registered tool cache in the Prometheus text format."""
+    lines = []
+    for metric in ("hits", "misses", "coalesced", "errors", "size"):
+        kind = "gauge" if metric == "size" else "counter"
+        full_name = f"tool_cache_{metric}" if metric == "size" else f"tool_cache_{metric}_total"
+        lines.append(f"# TYPE {full_name} {kind}")
+        for name, stats in cache_stats().items():
+            lines.append(f'{full_name}{{tool="{name}"}} {stats[metric]}')
+    return "\n".join(lines) + "\n"
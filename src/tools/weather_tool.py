@@ -1,8 +1,15 @@
 import os
+import re
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from langchain.tools import Tool
+from tools import http_client
+from tools.batching import register_batch
+from tools.gazetteer import Location, get_gazetteer, normalize_name
+from tools.keyword_matcher import register_intent
+from tools.tool_cache import ttl_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,39 +18,139 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
 
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+# Observations per location stay valid for 10 minutes
+WEATHER_TTL = 600
+# Cities fetched at the same time for a multi-city query
+MAX_PARALLEL_CITIES = 8
+
+# Keywords that route a query to this tool
+TRIGGER_KEYWORDS = ["weather", "temperature", "forecast"]
+register_intent("weather", TRIGGER_KEYWORDS)
+
+# Place named after "in", "for" or "at" when the gazetteer does not know it
+_PLACE_PHRASE = re.compile(r"\b(?:in|for|at)\s+(?P<place>[^\W\d_][\w .'-]*?)\s*[?.!؟]*\s*$", re.IGNORECASE)
+
+
+def _observation_key(location) -> str:
+    """Cache key: the grid cell of a gazetteer location, or the normalized free-form name."""
+    return location.bucket if isinstance(location, Location) else f"name:{normalize_name(location)}"
+
+
+@ttl_cache("WeatherTool", ttl=WEATHER_TTL, key=_observation_key, should_cache=lambda value: isinstance(value, dict))
+def fetch_observation(location) -> dict:
+    """
+    Fetch the current observation of a gazetteer location or a free-form place name.
+
+    Concurrent requests for the same location share one upstream call.
+
+    Returns:
+        dict: `{"description": str, "temp": float}`.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
+        ValueError: If the response has an unexpected format.
+    """
+    params = {"appid": API_KEY, "units": "metric"}
+    if isinstance(location, Location):
+        params.update(lat=location.lat, lon=location.lon)
+    else:
+        params["q"] = location
+    logging.info(f"Fetching weather data for: {location}")
+
+    response = http_client.get(WEATHER_URL, tool="WeatherTool", params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    if "weather" not in data or "main" not in data:
+        raise ValueError(f"Unexpected response format: {data}")
+    return {"description": data["weather"][0]["description"], "temp": data["main"]["temp"]}
+
+
+def resolve_locations(text: str):
+    """Return the gazetteer locations named in `text`, or the cleaned text itself if none are known."""
+    locations = get_gazetteer().find(text)
+    if locations:
+        return locations
+    place = text.strip().strip("?.!؟").strip()
+    return [place] if place else []
+
+
+def extract_place(query: str):
+    """
+    Find the place a weather question is about.
+
+    Known cities anywhere in the query are preferred; otherwise the phrase after "in", "for"
+    or "at" is used. Returns None when the query names no place.
+    """
+    locations = get_gazetteer().find(query)
+    if locations:
+        return ", ".join(location.name for location in locations)
+    match = _PLACE_PHRASE.search(query)
+    return match.group("place").strip() if match else None
+
+
+def _weather_line(location) -> str:
+    """Describe the current weather at one location."""
+    place = location.name if isinstance(location, Location) else location
+    try:
+        observation = fetch_observation(location)
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Error fetching weather data for {place}: {e}")
+        return f"Failed to retrieve weather data for {place}."
+    except ValueError as e:
+        logging.warning(str(e))
+        return "An error occurred while fetching data."
+
+    logging.info(f"Weather data retrieved successfully for {place}.")
+    return f"Weather in {place}: {observation['description']}, Temperature: {observation['temp']}°C."
+
+
+def _weather_lines(locations):
+    """Describe several locations, fetching them concurrently."""
+    if len(locations) == 1:
+        return [_weather_line(locations[0])]
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_CITIES, len(locations))) as pool:
+        return list(pool.map(_weather_line, locations))
+
+
 def get_weather(city: str) -> str:
-    """Fetch weather information for a given city."""
+    """Fetch weather information for a given city, or several cities named in the input."""
     if not API_KEY:
         logging.error("API_KEY is missing. Please check the .env file.")
         return "API_KEY is missing. Please check the .env file."
 
-    url = (
-        f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={API_KEY}&units=metric"
-    )
-    logging.info(f"Fetching weather data for city: {city}")
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        if "weather" in data and "main" in data:
-            weather_desc = data["weather"][0]["description"]
-            temp = data["main"]["temp"]
-            logging.info(f"Weather data retrieved successfully for {city}.")
-            return f"Weather in {city}: {weather_desc}, Temperature: {temp}°C."
-        
-        logging.warning(f"Unexpected response format: {data}")
-        return "An error occurred while fetching data."
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching weather data: {e}")
-        return "Failed to retrieve weather data."
+    locations = resolve_locations(city)
+    if not locations:
+        return "Please name a city to get its weather."
+    return "\n".join(_weather_lines(locations))
+
+
+def get_weathers(inputs):
+    """
+    Answer many WeatherTool calls at once, fetching every distinct location once.
+
+    :param inputs: Tool inputs, one per call.
+    :return: Dict mapping each input to the tool's answer for it.
+    """
+    if not API_KEY:
+        return {text: "API_KEY is missing. Please check the .env file." for text in inputs}
+
+    per_input = {text: resolve_locations(text) for text in inputs}
+    unique = list(dict.fromkeys(location for locations in per_input.values() for location in locations))
+    lines = dict(zip(unique, _weather_lines(unique))) if unique else {}
+    return {
+        text: "\n".join(lines[location] for location in locations)
+        for text, locations in per_input.items() if locations
+    }
+
+register_batch("WeatherTool", get_weathers)
 
 # Define the weather tool
 weather_tool = Tool(
     name="WeatherTool",
     func=get_weather,
-    description="Fetches weather information for a given city.",
+    description="Fetches weather information for a given city, or several cities separated by commas.",
     return_direct=True,
 )
 
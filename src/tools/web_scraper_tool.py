@@ -1,28 +1,39 @@
 import logging
 import requests
-from bs4 import BeautifulSoup
 from langchain.tools import Tool
+from tools.executors import CPU_BOUND, register_workload, tool_work
+from tools.html_extract import byte_budget, extract_paragraph_text, fetch_html
+from tools.tool_cache import ttl_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Characters of page text the tool returns
+MAX_CHARS = 5000
+
+# Parsing the page is the heavy part of a scrape
+register_workload("WebScraper", CPU_BOUND)
+
+
+@tool_work("WebScraper")
+def parse_page_text(html: str) -> str:
+    """Return the paragraph text of a downloaded page, up to the tool's output limit."""
+    return extract_paragraph_text([html], MAX_CHARS)
+
+@ttl_cache("WebScraper", ttl=3600)
 def scrape_webpage(url: str) -> str:
     """
     Extracts and returns the main text content from a webpage.
     """
     logging.info(f"Scraping webpage: {url}")
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        logging.info("Successfully fetched webpage content.")
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        paragraphs = soup.find_all("p")
-        text_content = "\n".join([p.get_text() for p in paragraphs if p.get_text()])
+        # Download on this thread, so concurrent calls are not limited by the pool size, and only
+        # as much of the page as the output limit needs; the parse goes to a worker process
+        html = fetch_html(url, tool="WebScraper", max_bytes=byte_budget(MAX_CHARS))
+        text_content = parse_page_text(html)
 
         logging.info("Successfully extracted text from webpage.")
-        return text_content[:5000] + "..." if len(text_content) > 5000 else text_content
+        return text_content[:MAX_CHARS] + "..." if len(text_content) > MAX_CHARS else text_content
     
     except requests.exceptions.RequestException as e:
         logging.error(f"HTTP error while scraping webpage: {e}")
@@ -0,0 +1,33 @@
+import pytest
+
+from agent.agent import Agent
+from agent.log_writer import LogWriter
+from agent.response_cache import ResponseCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Chat history database of the test."""
+    return str(tmp_path / "chat.db")
+
+
+@pytest.fixture
+def make_agent(db_path):
+    """
+    Build `Agent`s over the test database, with their own log writer.
+
+    Responses are not cached unless `cache=True`; other keyword arguments go to `Agent`.
+    Agents still open at the end of the test are closed.
+    """
+    agents = []
+
+    def make(tools, cache=False, **options):
+        if cache:
+            options["response_cache"] = ResponseCache(db_path)
+        agent = Agent(tools=tools, db_path=db_path, log_writer=LogWriter(db_path), cache_responses=cache, **options)
+        agents.append(agent)
+        return agent
+
+    yield make
+    for agent in agents:
+        agent.log_writer.close()
@@ -0,0 +1,99 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from agent import analytics
+from agent.database import init_db
+from agent.log_writer import LogWriter
+
+HOUR = 3600
+START = 1_717_000_000 // HOUR * HOUR
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "chat.db")
+    init_db(path)
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO tools (name) VALUES (?)", [("WeatherTool",), ("StockPrice",)])
+        rows = [(START + i * 60, "q", "a", 1, float(i + 1)) for i in range(100)]
+        rows += [(START + HOUR + i * 60, "q", "a", 2, 500.0) for i in range(10)]
+        conn.executemany("INSERT INTO chat_log (ts, question, answer, tool_id, latency_ms) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO error_log (ts, error_message, tool_id) VALUES (?, 'boom', ?)",
+                         [(START + 10, 2), (START + 20, None)])
+    return path
+
+
+def test_usage_per_hour_and_day(db):
+    assert analytics.tool_usage(db) == [
+        (START, "WeatherTool", 60), (START + HOUR, "StockPrice", 10), (START + HOUR, "WeatherTool", 40),
+    ]
+    day = START // 86400 * 86400
+    daily = analytics.tool_usage(db, period=86400)
+    assert {name: count for start, name, count in daily if start == day}["WeatherTool"] >= 60
+    assert analytics.tool_usage(db, since=START + HOUR, until=START + 2 * HOUR)[0] == (START + HOUR, "StockPrice", 10)
+
+
+def test_error_rates(db):
+    rates = analytics.error_rates(db)
+    assert rates["StockPrice"] == {"questions": 10, "errors": 1, "error_rate": 1 / 11}
+    assert rates[None]["errors"] == 1
+    assert rates["WeatherTool"]["error_rate"] == 0.0
+
+
+def test_latency_percentiles_match_raw_data_within_bucket_width(db):
+    latency = analytics.latency_percentiles(db, percentiles=(50, 95, 99))
+    weather = latency["WeatherTool"]
+    assert weather["count"] == 100 and weather["mean_ms"] == pytest.approx(50.5)
+    assert weather["p50_ms"] == pytest.approx(50, rel=0.1)
+    assert weather["p95_ms"] == pytest.approx(95, rel=0.1)
+    assert latency["StockPrice"]["p50_ms"] == pytest.approx(500, rel=0.1)
+
+
+def test_refresh_recomputes_from_raw_rows(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM hourly_tool_stats")
+        conn.execute("DELETE FROM daily_latency_hist")
+    analytics.refresh(db, since=0)
+    assert analytics.error_rates(db)["StockPrice"]["questions"] == 10
+    assert analytics.latency_percentiles(db)["WeatherTool"]["count"] == 100
+
+
+def test_refresh_after_retention_keeps_the_partial_day(db):
+    # Retention removed the first hour's raw rows; its rollups are all that is left of them
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM chat_log WHERE ts < ?", (START + HOUR,))
+        conn.execute("DELETE FROM error_log")
+    analytics.refresh(db)
+
+    latency = analytics.latency_percentiles(db)
+    assert latency["WeatherTool"]["count"] == 100
+    assert latency["WeatherTool"]["p50_ms"] == pytest.approx(50, rel=0.1)
+
+
+def test_latency_without_a_histogram_is_skipped(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM daily_latency_hist WHERE tool_id = 2")
+    assert set(analytics.latency_percentiles(db)) == {"WeatherTool"}
+
+
+def test_log_writer_rows_feed_rollups(tmp_path):
+    path = str(tmp_path / "chat.db")
+    init_db(path)
+    writer = LogWriter(path)
+    writer.log_interaction("weather in Berlin", "Sunny", "WeatherTool", 120.0)
+    writer.log_error("AAPL", "timeout")
+    writer.close()
+
+    assert analytics.latency_percentiles(path)["WeatherTool"]["count"] == 1
+    assert analytics.error_rates(path)[None]["errors"] == 1
+
+
+def test_export_columns(db):
+    columns = analytics.export_columns(db, since=START + HOUR)
+    assert len(columns["id"]) == 50
+    assert columns["ts"].dtype == np.int64
+    assert columns["latency_ms"].dtype == np.float64
+    assert columns["tool_names"][2] == "StockPrice"
+    assert np.count_nonzero(columns["tool_id"] == 2) == 10
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from tools.browser_pool import BrowserPool, LeaseTimeout
+
+
+class FakeDriver:
+    """Stand-in WebDriver that records navigation."""
+
+    def __init__(self):
+        self.visited = []
+        self.quit_called = False
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_pool_reuses_browsers_and_recycles_after_max_pages():
+    drivers = []
+
+    def factory():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    pool = BrowserPool(size=1, max_pages=3, factory=factory)
+    for i in range(7):
+        with pool.lease() as driver:
+            driver.get(f"http://localhost/{i}")
+
+    assert pool.launched == 3
+    assert drivers[0].quit_called and drivers[1].quit_called
+    assert drivers[0].visited == ["http://localhost/0", "about:blank", "http://localhost/1", "about:blank",
+                                  "http://localhost/2"]
+
+
+def test_pool_discards_browser_after_error():
+    pool = BrowserPool(size=1, factory=FakeDriver)
+    with pytest.raises(ValueError):
+        with pool.lease() as driver:
+            raise ValueError("page crashed")
+
+    assert driver.quit_called
+    with pool.lease() as replacement:
+        assert replacement is not driver
+
+
+def test_lease_times_out_when_all_browsers_are_busy():
+    pool = BrowserPool(size=1, factory=FakeDriver)
+    leased = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.lease():
+            leased.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    leased.wait(5)
+
+    started = time.monotonic()
+    with pytest.raises(LeaseTimeout):
+        with pool.lease(timeout=0.1):
+            pass
+    assert time.monotonic() - started < 1
+
+    release.set()
+    holder.join()
+    with pool.lease(timeout=1):
+        pass
+    assert pool.launched == 1
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import pytest
+from langchain.tools import Tool
+from langchain_core.language_models import FakeListLLM
+
+from agent import budget
+from agent.budget import EXHAUSTED_MESSAGE, Budget, BudgetExceeded
+from tools import http_client
+
+LOOKUP_FOREVER = ["Let me look again.\nAction: Lookup\nAction Input: Berlin"] * 10
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _agent(make_agent, responses, tool_func, **options):
+    tools = [Tool(name="Lookup", func=tool_func, description="Looks something up.")]
+    return make_agent(tools, cache=True, use_router=False, llm=FakeListLLM(responses=responses), **options)
+
+
+def test_budget_clips_timeouts_and_counts_steps():
+    clock = FakeClock()
+    current = Budget(timeout=10, max_steps=2, clock=clock)
+    assert current.clip(5) == 5
+    assert current.clip(None) == 10
+
+    clock.now += 8
+    assert current.clip(5) == 2
+    current.step()
+    current.step()
+    with pytest.raises(BudgetExceeded):
+        current.step()
+
+    clock.now += 2
+    assert current.expired
+    with pytest.raises(BudgetExceeded):
+        current.clip(5)
+
+
+def test_http_timeouts_follow_the_current_budget():
+    assert http_client.timeout_for("WeatherTool") == 5
+    with budget.use(Budget(timeout=1.5)):
+        assert http_client.timeout_for("WeatherTool") <= 1.5
+    with budget.use(Budget(timeout=0)), pytest.raises(BudgetExceeded):
+        http_client.timeout_for("WeatherTool")
+
+
+def test_step_budget_returns_the_last_observation(make_agent):
+    calls = []
+    agent = _agent(make_agent, LOOKUP_FOREVER, lambda text: calls.append(text) or f"Result {len(calls)}")
+
+    assert agent.process("look it up", max_steps=3) == "Result 3"
+    assert len(calls) == 3
+    # Partial answers are not cached
+    assert agent.response_cache.get("look it up") is None
+    agent.close()
+
+
+def test_deadline_stops_slow_runs(make_agent):
+    def slow(text):
+        time.sleep(0.2)
+        return "Still searching"
+
+    agent = _agent(make_agent, LOOKUP_FOREVER, slow, timeout=0.3)
+    started = time.perf_counter()
+    assert agent.process("look it up") == "Still searching"
+    assert time.perf_counter() - started < 1.0
+    agent.close()
+
+
+def test_async_deadline_without_any_observation(make_agent):
+    def slow(text):
+        time.sleep(0.5)
+        return "Too late"
+
+    agent = _agent(make_agent, LOOKUP_FOREVER, slow)
+    assert asyncio.run(agent.aprocess("look it up", timeout=0.1)) == EXHAUSTED_MESSAGE
+    agent.close()
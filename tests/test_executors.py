@@ -0,0 +1,102 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools import executors
+
+
+@executors.cpu_bound
+def worker_pid(value):
+    return os.getpid(), value * 2
+
+
+@executors.cpu_bound
+def fail(message):
+    raise ValueError(message)
+
+
+@executors.tool_work("TestTool")
+def tool_pid():
+    return os.getpid()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(executors, "CPU_WORKERS", 2)
+    monkeypatch.setattr(executors, "WARM_IMPORTS", ["tools.html_extract"])
+    yield
+    executors.shutdown()
+
+
+def test_cpu_bound_functions_run_in_warm_worker_processes(pool):
+    results = [worker_pid(i) for i in range(4)]
+    assert [value for _, value in results] == [0, 2, 4, 6]
+    assert os.getpid() not in {pid for pid, _ in results}
+    with pytest.raises(ValueError, match="bad page"):
+        fail("bad page")
+
+
+def test_disabled_pool_runs_inline(monkeypatch):
+    monkeypatch.setattr(executors, "CPU_WORKERS", 0)
+    assert worker_pid(1) == (os.getpid(), 2)
+    assert executors.get_cpu_pool() is None
+
+
+def test_declared_workload_chooses_where_tool_work_runs(pool, monkeypatch):
+    monkeypatch.setattr(executors, "_WORKLOADS", {})
+    monkeypatch.setattr(executors, "WORKLOAD_OVERRIDES", {})
+    assert executors.get_workload("TestTool") == executors.IO_BOUND
+    assert tool_pid() == os.getpid()
+
+    executors.register_workload("TestTool", executors.CPU_BOUND)
+    assert tool_pid() != os.getpid()
+
+    monkeypatch.setattr(executors, "WORKLOAD_OVERRIDES", executors._parse_workloads("TestTool=io, Other=gpu"))
+    assert executors.WORKLOAD_OVERRIDES == {"TestTool": executors.IO_BOUND}
+    assert tool_pid() == os.getpid()
+    with pytest.raises(ValueError):
+        executors.register_workload("TestTool", "gpu")
+
+
+def test_web_scraper_downloads_outside_the_pool(monkeypatch):
+    web_scraper_tool = pytest.importorskip("tools.web_scraper_tool")
+    monkeypatch.setattr(executors, "CPU_WORKERS", 1)
+
+    def slow_fetch(url, tool=None, max_bytes=None):
+        time.sleep(0.3)
+        return f"<p>{url}</p>"
+
+    monkeypatch.setattr(web_scraper_tool, "fetch_html", slow_fetch)
+    executors.start(wait=True)
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as threads:
+            pages = list(threads.map(web_scraper_tool.scrape_webpage.uncached, ["a", "b", "c", "d"]))
+        elapsed = time.perf_counter() - started
+    finally:
+        executors.shutdown()
+
+    assert pages == ["a", "b", "c", "d"]
+    # Four downloads overlap even though a single worker process parses the pages
+    assert elapsed < 0.9
+
+
+def test_web_scraper_downloads_only_what_its_output_limit_needs(monkeypatch):
+    web_scraper_tool = pytest.importorskip("tools.web_scraper_tool")
+    from tools import html_extract
+
+    monkeypatch.setattr(executors, "CPU_WORKERS", 0)
+    requested = []
+
+    def fetch(url, tool=None, max_bytes=None):
+        requested.append(max_bytes)
+        return "<p>" + "x" * 6000 + "</p>"
+
+    monkeypatch.setattr(web_scraper_tool, "fetch_html", fetch)
+    text = web_scraper_tool.scrape_webpage.uncached("a")
+
+    assert text == "x" * web_scraper_tool.MAX_CHARS + "..."
+    assert requested == [html_extract.byte_budget(web_scraper_tool.MAX_CHARS)]
+    assert requested[0] < html_extract.MAX_DOWNLOAD_BYTES
@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+from agent.database import init_db
+from agent.history_search import search_history, to_fts_query
+
+NOW = 1_717_000_000
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "chat.db")
+    init_db(path)
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO tools (name) VALUES (?)", [("WeatherTool",), ("BloodPressureSearch",)])
+        conn.executemany(
+            "INSERT INTO chat_log (ts, question, answer, tool_id) VALUES (?, ?, ?, ?)",
+            [
+                (NOW - 7200, "What's the weather in Berlin?", "Weather in Berlin: light rain, 12°C.", 1),
+                (NOW - 3600, "weather in Cairo", "Weather in Cairo: clear sky, 31°C.", 1),
+                (NOW, "normal blood pressure for adults", "Around 120/80 mmHg is considered normal.", 2),
+            ],
+        )
+    return path
+
+
+def test_query_quotes_terms_and_prefixes_last():
+    assert to_fts_query('weather "Berl*') == '"weather" "Berl"*'
+    assert to_fts_query("AND weather OR") == '"AND" "weather" "OR"'
+    assert to_fts_query("  ?! ") is None
+
+
+def test_search_ranks_and_highlights(db):
+    hits = search_history(db, "berlin weather")
+    assert [hit.id for hit in hits] == [1]
+    assert hits[0].tool == "WeatherTool"
+    assert "[Berlin]" in hits[0].question and "[Berlin]" in hits[0].answer
+
+    assert [hit.id for hit in search_history(db, "weath*")] in ([1, 2], [2, 1])
+    assert search_history(db, "مرحبا") == []
+
+
+def test_filters_by_tool_and_time(db):
+    assert search_history(db, "weather", tool="BloodPressureSearch") == []
+    assert [hit.id for hit in search_history(db, "weather", since=NOW - 3600)] == [2]
+    assert [hit.id for hit in search_history(db, "weather", until=NOW - 3600)] == [1]
+
+
+def test_index_follows_inserts_updates_and_deletes(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO chat_log (ts, question, answer) VALUES (?, 'price of AAPL', 'about 190 USD')", (NOW,))
+        conn.execute("UPDATE chat_log SET answer = 'Snow in Cairo' WHERE id = 2")
+        conn.execute("DELETE FROM chat_log WHERE id = 1")
+
+    assert [hit.id for hit in search_history(db, "aapl")] == [4]
+    assert [hit.id for hit in search_history(db, "snow")] == [2]
+    assert search_history(db, "berlin") == []
+
+
+def test_missing_index_is_reported(tmp_path):
+    path = str(tmp_path / "plain.db")
+    sqlite3.connect(path).close()
+    with pytest.raises(RuntimeError, match="chat_fts"):
+        search_history(path, "weather")
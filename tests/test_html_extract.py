@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from tools.html_extract import ParagraphExtractor, _decoded_chunks, extract_paragraph_text
+
+bs4 = pytest.importorskip("bs4")
+
+PAGES = [
+    "<html><body><p>First &amp; <b>bold</b></p><div>skip</div><p>Second</p></body></html>",
+    "<p>Outer <p>inner</p> tail</p><p></p><p>last</p>",
+    "<p>one<p>two<p>three",
+    "<p>text <script>var x = 1;</script>after</p><style>p {}</style>",
+    "<p>café &#169; &lt;tag&gt;</p>\n<p>  spaced  </p>",
+    # An ancestor's end tag closes the paragraphs left open inside it
+    "<div><p>Hello</div><div>Footer nav links</div>",
+    "<table><tr><td><p>cell</td><td>next cell</td></tr></table>",
+    "<ul><li><p>item<span>one</li><li>two</li></ul>",
+    "<p>a<span>b<p>c</span>d</p>e",
+    # End tags of elements that are not open, and void elements, change nothing
+    "<p>a</div>b<br>c</br>d<img/>e</p>",
+    # Whitespace-only text is collapsed outside <pre>
+    "<p>x<b>\n   </b><i> </i>y</p><pre><p>  <b>\n  </b></p></pre><p>a\n  <!-- note -->\n  b</p>",
+]
+
+
+def _reference(html):
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    return "\n".join([p.get_text() for p in soup.find_all("p") if p.get_text()])
+
+
+def _chunks(html, size=7):
+    return [html[i:i + size] for i in range(0, len(html), size)]
+
+
+@pytest.mark.parametrize("html", PAGES)
+def test_matches_beautifulsoup_for_small_pages(html):
+    assert extract_paragraph_text(_chunks(html), max_chars=5000) == _reference(html)
+
+
+def test_stops_reading_once_budget_is_reached():
+    html = "".join(f"<p>Paragraph number {i} with some filler text.</p>" for i in range(10000))
+    consumed = []
+
+    def chunks():
+        for chunk in _chunks(html, 1024):
+            consumed.append(chunk)
+            yield chunk
+
+    text = extract_paragraph_text(chunks(), max_chars=1000)
+    assert len(text) > 1000
+    assert text[:1000] == _reference(html)[:1000]
+    assert len(consumed) < 5
+
+
+def test_unclosed_paragraph_prefix_is_final():
+    parser = ParagraphExtractor(max_chars=10)
+    parser.feed("<p>" + "x" * 20)
+    assert parser.done
+
+
+def test_download_stops_reading_at_its_deadline():
+    class SlowResponse:
+        encoding = "utf-8"
+        url = "https://example.com/slow"
+        read = 0
+
+        def iter_content(self, chunk_size):
+            while True:
+                self.read += 1
+                time.sleep(0.05)
+                yield b"<p>more</p>"
+
+    response = SlowResponse()
+    html = "".join(_decoded_chunks(response, max_bytes=10 ** 6, deadline=time.monotonic() + 0.3))
+    assert html.startswith("<p>more</p>")
+    assert response.read < 10
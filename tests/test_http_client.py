@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tools import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    failures_left = 0
+
+    def do_GET(self):
+        _Handler.connections.add(self.client_address)
+        if _Handler.failures_left > 0:
+            _Handler.failures_left -= 1
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _Handler.connections = set()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def test_session_reuses_connections_and_retries():
+    server, url = _serve()
+    session = http_client.create_session()
+    try:
+        for _ in range(5):
+            assert session.get(url, timeout=2).text == "ok"
+        assert len(_Handler.connections) == 1
+
+        _Handler.failures_left = 2
+        assert session.get(url, timeout=2).status_code == 200
+    finally:
+        server.shutdown()
+
+
+def test_async_client_retries_and_limits_per_host():
+    server, url = _serve()
+    _Handler.failures_left = 1
+
+    async def fetch_all():
+        async with http_client.AsyncHttpClient(pool_size=2) as client:
+            responses = await asyncio.gather(*[client.get(url) for _ in range(6)])
+        return [response.status_code for response in responses]
+
+    try:
+        assert asyncio.run(fetch_all()) == [200] * 6
+        assert len(_Handler.connections) <= 3
+    finally:
+        server.shutdown()
+
+
+def test_timeout_for_prefers_explicit_then_tool():
+    assert http_client.timeout_for("WebScraper", 1) == 1
+    assert http_client.timeout_for("WeatherTool") == http_client.TOOL_TIMEOUTS["WeatherTool"]
+    assert http_client.timeout_for("Unknown") == http_client.DEFAULT_TIMEOUT
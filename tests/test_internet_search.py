@@ -0,0 +1,61 @@
+import time
+
+from agent import budget
+from tools import internet_search_tool
+
+
+def test_fetch_pages_runs_concurrently_and_drops_late_pages(monkeypatch):
+    def fake_extract(url, timeout=None, deadline=None):
+        time.sleep(1.5 if url.endswith("slow") else 0.2)
+        return f"text of {url}"
+
+    monkeypatch.setattr(internet_search_tool, "extract_text_from_url", fake_extract)
+    links = [f"https://example.com/{i}" for i in range(10)] + ["https://example.com/slow"]
+
+    started = time.monotonic()
+    pages = internet_search_tool.fetch_pages(links, deadline=0.8)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.2
+    assert len(pages) == 10
+    assert "https://example.com/slow" not in pages
+    assert pages["https://example.com/3"] == "text of https://example.com/3"
+
+
+def test_page_downloads_see_the_query_budget_and_deadline(monkeypatch):
+    seen = []
+
+    def fake_extract(url, timeout=None, deadline=None):
+        seen.append((budget.current(), deadline))
+        return "text"
+
+    monkeypatch.setattr(internet_search_tool, "extract_text_from_url", fake_extract)
+    query_budget = budget.Budget(timeout=30)
+    with budget.use(query_budget):
+        started = time.monotonic()
+        internet_search_tool.fetch_pages(["https://example.com/a", "https://example.com/b"], deadline=2)
+
+    assert len(seen) == 2
+    for current, deadline in seen:
+        assert current is query_budget
+        assert started < deadline <= time.monotonic() + 2
+
+
+def test_serpapi_timeout_is_cut_to_the_query_budget(monkeypatch):
+    timeouts = []
+
+    class FakeSearch:
+        def __init__(self, params):
+            self.timeout = 60000
+
+        def get_dict(self):
+            timeouts.append(self.timeout)
+            return {"organic_results": []}
+
+    monkeypatch.setattr(internet_search_tool, "GoogleSearch", FakeSearch)
+    internet_search_tool.google_search({"q": "anything"})
+    with budget.use(budget.Budget(timeout=2)):
+        internet_search_tool.google_search({"q": "anything"})
+
+    assert timeouts[0] == internet_search_tool.SERPAPI_TIMEOUT
+    assert timeouts[1] <= 2
@@ -0,0 +1,41 @@
+import pytest
+
+from tools.keyword_matcher import KeywordMatcher, is_greeting
+
+INTENTS = {
+    "weather": ["weather", "temperature", "forecast"],
+    "stock": ["stock", "price", "share"],
+    "blood_pressure": ["blood pressure", "hypertension", "hypotension", "ضغط الدم", "ارتفاع الضغط", "انخفاض الضغط"],
+    "nested": ["pressure"],
+}
+
+
+def _scan(query):
+    """The per-keyword substring scan the matcher replaces."""
+    query = query.lower()
+    return {intent for intent, keywords in INTENTS.items() if any(keyword in query for keyword in keywords)}
+
+
+@pytest.mark.parametrize("query", [
+    "What's the weather forecast in Berlin?",
+    "AAPL share price and TEMPERATURE",
+    "symptoms of high blood pressure",
+    "ما هي أسباب ارتفاع الضغط",
+    "shareholders of weathered stocks",
+    "nothing relevant here",
+    "",
+])
+def test_matcher_finds_the_same_intents_as_a_keyword_scan(query):
+    assert KeywordMatcher(INTENTS).match(query) == _scan(query)
+
+
+def test_greeting_lexicon():
+    assert is_greeting("Hello there!")
+    assert is_greeting("مرحبا، كيف حالك")
+    assert not is_greeting("this is a great stock")
+    assert not is_greeting("which hills are highest")
+
+
+def test_matcher_finds_keywords_hidden_inside_earlier_matches():
+    matcher = KeywordMatcher({"weather": ["forecast"], "stock": ["stock", "castle"]})
+    assert matcher.match("forecastle") == {"weather", "stock"}
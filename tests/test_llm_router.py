@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from model.llm_router import Backend, CircuitBreaker, NoBackendAvailable, RouterLLM, classify_step
+
+PREAMBLE = "Use this format:\nAction Input: the input\nObservation: the result\n\nBegin!\n\n"
+
+
+class FakeLLM:
+    """Local backend that streams a fixed reply, optionally slowly or failing."""
+
+    def __init__(self, reply="ok", delay=0.0, fail=False):
+        self.reply = reply
+        self.delay = delay
+        self.fail = fail
+        self.prompts = []
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def stream(self, prompt, stop=None):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise ConnectionError("backend down")
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        yield from self.reply.split(" ")
+
+    async def astream(self, prompt, stop=None):
+        for token in self.stream(prompt, stop):
+            yield token
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_outstanding_requests_spreads_concurrent_steps():
+    first, second = FakeLLM(delay=0.1), FakeLLM(delay=0.1)
+    router = RouterLLM(backends=[Backend("a", first), Backend("b", second)])
+
+    threads = [threading.Thread(target=router.invoke, args=("Question: hi\nThought:",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(first.prompts) == len(second.prompts) == 2
+    assert router.stats()["a"]["outstanding"] == 0
+
+
+def test_steps_are_routed_by_type():
+    fast, big = FakeLLM("pick WeatherTool"), FakeLLM("It is sunny")
+    router = RouterLLM(backends=[Backend("fast", fast, roles=["tool"]), Backend("big", big, roles=["final"])])
+
+    tool_prompt = PREAMBLE + "Question: weather in Berlin?\nThought:"
+    final_prompt = tool_prompt + " check\nAction: WeatherTool\nAction Input: Berlin\nObservation: Sunny\nThought:"
+
+    assert classify_step(tool_prompt) == "tool"
+    assert classify_step(final_prompt) == "final"
+    assert router.invoke(tool_prompt) == "pickWeatherTool"
+    assert router.invoke(final_prompt) == "Itissunny"
+    assert fast.prompts == [tool_prompt]
+    assert big.prompts == [final_prompt]
+
+
+def test_failing_backend_is_retried_elsewhere_and_circuit_opens():
+    clock = FakeClock()
+    down, up = FakeLLM(fail=True), FakeLLM("fine")
+    router = RouterLLM(backends=[
+        Backend("down", down, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)),
+        Backend("up", up),
+    ])
+
+    # Ties go to the backend with fewer requests, so both get tried until the circuit opens
+    results = [router.invoke("Question: q\nThought:") for _ in range(4)]
+    assert results == ["fine"] * 4
+    assert router.stats()["down"]["state"] == CircuitBreaker.OPEN
+    assert len(down.prompts) == 2
+
+    router.invoke("Question: q\nThought:")
+    assert len(down.prompts) == 2
+
+    # After the reset timeout one probe is let through; the recovered backend closes its circuit
+    clock.now = 11
+    down.fail = False
+    for _ in range(3):
+        router.invoke("Question: q\nThought:")
+    assert len(down.prompts) >= 3
+    assert router.stats()["down"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_no_available_backend_raises_and_health_check_recovers():
+    healthy = {"ok": False}
+
+    def health_check():
+        if not healthy["ok"]:
+            raise ConnectionError("unreachable")
+
+    backend = FakeLLM("back")
+    router = RouterLLM(backends=[Backend("only", backend, health_check=health_check)])
+
+    router.check_health()
+    assert router.stats()["only"]["state"] == CircuitBreaker.OPEN
+    with pytest.raises(NoBackendAvailable):
+        router.invoke("Question: q\nThought:")
+
+    healthy["ok"] = True
+    router.check_health()
+    assert router.invoke("Question: q\nThought:") == "back"
+
+
+def test_async_calls_use_the_same_balancing():
+    first, second = FakeLLM("one"), FakeLLM("two")
+    router = RouterLLM(backends=[Backend("a", first), Backend("b", second)])
+
+    async def run():
+        return await asyncio.gather(*[router.ainvoke("Question: q\nThought:") for _ in range(4)])
+
+    assert sorted(asyncio.run(run())) == ["one", "one", "two", "two"]
@@ -0,0 +1,37 @@
+import sqlite3
+
+from agent.database import init_db
+from agent.log_writer import LogWriter
+
+
+def test_log_writer_batches_rows(tmp_path):
+    db_path = str(tmp_path / "chat_history.db")
+    init_db(db_path)
+    writer = LogWriter(db_path, flush_interval=60, batch_size=1000)
+
+    writer.log_interaction("weather in Berlin", "Sunny", "WeatherTool")
+    writer.log_interaction("weather in Paris", "Rainy", "WeatherTool")
+    writer.log_error("AAPL", "timeout", "WeatherTool")
+    writer.log_error("???", "parse error")
+    assert writer.flush(timeout=5)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(DISTINCT tool_id) FROM chat_log").fetchone()[0] == 1
+        errors = conn.execute("SELECT query, tool_id FROM error_log ORDER BY id").fetchall()
+        assert errors[0][1] is not None and errors[1] == ("???", None)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    writer.close()
+
+
+def test_log_writer_close_commits_pending(tmp_path):
+    db_path = str(tmp_path / "chat_history.db")
+    init_db(db_path)
+    writer = LogWriter(db_path, flush_interval=60, batch_size=1000)
+
+    writer.log_interaction("hello", "Hi!", "GeneralResponse")
+    writer.close()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM chat_log").fetchone()[0] == 1
@@ -0,0 +1,119 @@
+import asyncio
+import sqlite3
+import threading
+
+from langchain.tools import Tool
+from langchain_core.language_models import FakeListLLM
+
+from agent.database import init_db
+from agent.log_writer import LogWriter
+from agent.memory import ConversationMemory, estimate_tokens
+
+
+class RecordingLLM(FakeListLLM):
+    """Fake LLM that keeps the prompts it was given."""
+
+    prompts: list = []
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(prompt)
+        return super()._call(prompt, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def _log_turns(writer, memory, session_id, count, start=0):
+    for i in range(start, start + count):
+        question, answer = f"question {i}", f"answer {i}"
+        writer.log_interaction(question, answer, "LLM", session_id=session_id)
+        memory.add(session_id, question, answer)
+
+
+def test_old_turns_are_summarized_and_context_stays_within_budget(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "chat.db"), turns=2, max_tokens=120, summary_tokens=40)
+    for i in range(50):
+        memory.add("s1", f"question {i}", f"answer {i} " + "word " * 200)
+
+    context = memory.context("s1")
+    assert "User: question 49" in context and "User: question 48" in context
+    assert "User: question 47" not in context
+    assert "- question 47 -> answer 47" in context
+    assert estimate_tokens(context) <= 120
+    assert memory.context("other") == ""
+
+
+def test_sessions_load_lazily_from_the_chat_log(tmp_path):
+    db_path = str(tmp_path / "chat.db")
+    init_db(db_path)
+    writer = LogWriter(db_path)
+    _log_turns(writer, ConversationMemory(db_path, writer, turns=2), "s1", 5)
+    writer.log_interaction("unrelated", "answer", "LLM", session_id="s2")
+    writer.flush()
+
+    with sqlite3.connect(db_path) as conn:
+        through = conn.execute("SELECT through_id FROM session_summaries WHERE session_id = 's1'").fetchone()[0]
+        assert conn.execute("SELECT question FROM chat_log WHERE id = ?", (through,)).fetchone()[0] == "question 2"
+
+    # A new process sees the stored summary and the turns after it
+    reloaded = ConversationMemory(db_path, writer, turns=2)
+    context = reloaded.context("s1")
+    assert "- question 2 -> answer 2" in context
+    assert "User: question 3" in context and "User: question 4" in context
+    assert "unrelated" not in context
+    writer.close()
+
+
+def test_follow_up_questions_see_the_conversation(make_agent, db_path):
+    llm = RecordingLLM(responses=[
+        "I know this.\nFinal Answer: Berlin is the capital of Germany.",
+        "I know this.\nFinal Answer: About 3.7 million people.",
+        "I know this.\nFinal Answer: Berlin is the capital of Germany.",
+    ])
+    tools = [Tool(name="Lookup", func=lambda text: text, description="Looks something up.")]
+    agent = make_agent(tools, cache=True, use_router=False, llm=llm)
+
+    assert agent.process("What is the capital of Germany?", session_id="s1") == "Berlin is the capital of Germany."
+    assert agent.process("How many people live there?", session_id="s1") == "About 3.7 million people."
+    assert "Berlin is the capital of Germany." in llm.prompts[1]
+    assert "Recent turns" not in llm.prompts[0]
+    # Only the self-contained first turn is cached
+    assert agent.response_cache.get("How many people live there?") is None
+    assert agent.process("What is the capital of Germany?") == "Berlin is the capital of Germany."
+    agent.close()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT session_id FROM chat_log ORDER BY id").fetchall() == [("s1",), ("s1",), (None,)]
+
+
+def test_async_runs_keep_memory_work_off_the_event_loop(make_agent, db_path):
+    threads = []
+
+    def summarize(summary, question, answer):
+        threads.append(threading.get_ident())
+        return f"{summary}\n{question}"
+
+    llm = FakeListLLM(responses=["I know this.\nFinal Answer: Fine."] * 4)
+    tools = [Tool(name="Lookup", func=lambda text: text, description="Looks something up.")]
+    memory = ConversationMemory(db_path, turns=1, summarizer=summarize)
+    agent = make_agent(tools, use_router=False, llm=llm, memory=memory)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        await agent.aprocess("first", session_id="s1")
+        await agent.aprocess("second", session_id="s1")
+        async for _ in agent.astream("third", session_id="s1"):
+            pass
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 2
+    assert loop_thread not in threads
+    agent.close()
+
+
+def test_loading_a_session_does_not_wait_forever_for_the_log_writer(tmp_path):
+    class StuckWriter:
+        def flush(self, timeout=None):
+            assert timeout is not None
+            return False
+
+    memory = ConversationMemory(str(tmp_path / "chat.db"), StuckWriter())
+    assert memory.context("s1") == ""
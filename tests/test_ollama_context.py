@@ -0,0 +1,134 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from model.ollama_model import OllamaHandler
+from model.prompt_context import PromptContextCache, PromptEvalStats
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    """
+    Minimal /api/generate: one token per character of the context, 1 ms per evaluated token.
+
+    A request with a context only evaluates its new prompt, like Ollama's prefix cache.
+    """
+
+    requests = []
+    completions = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubOllama.requests.append(body)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        if not body.get("prompt"):
+            self._line({"model": body["model"], "response": "", "done": True, "done_reason": "load"})
+            return
+
+        completion = StubOllama.completions.pop(0)
+        for token in completion.split(" "):
+            self._line({"model": body["model"], "response": token + " ", "done": False})
+        text = "".join(chr(token) for token in body.get("context") or []) + body["prompt"] + completion + " "
+        evaluated = len(body["prompt"])
+        self._line({
+            "model": body["model"], "response": "", "done": True,
+            "context": [ord(char) for char in text],
+            "prompt_eval_count": evaluated, "prompt_eval_duration": evaluated * 1_000_000,
+        })
+
+    def _line(self, payload):
+        self.wfile.write((json.dumps(payload) + "\n").encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_url():
+    StubOllama.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_steps_of_one_query_reuse_the_previous_context(ollama_url):
+    StubOllama.completions = ["I should check.", "It is sunny."]
+    handler = OllamaHandler(base_url=ollama_url, reuse_context=True, keep_alive="-1", num_ctx=8192)
+    preamble = "You can use these tools: " + "WeatherTool describes the weather. " * 20 + "\nThought:"
+    tokens = []
+
+    first = handler.generate_with_context(preamble, stop=["\nObservation:"], on_token=tokens.append)
+    second_prompt = preamble + first + "\nObservation: Sunny\nThought:"
+    second = handler.generate_with_context(second_prompt, stop=["\nObservation:"])
+
+    assert first == "I should check. "
+    assert second == "It is sunny. "
+    assert tokens == ["I ", "should ", "check. "]
+
+    full, reused = StubOllama.requests
+    assert full["prompt"] == preamble and "context" not in full
+    assert full["keep_alive"] == -1
+    assert full["options"]["num_ctx"] == 8192
+    assert full["options"]["stop"] == ["\nObservation:"]
+    assert reused["prompt"] == "\nObservation: Sunny\nThought:"
+    assert reused["raw"] is True
+    assert "".join(chr(token) for token in reused["context"]) == preamble + first
+
+    stats = handler.prompt_stats.summary()
+    assert stats["steps"] == 2
+    assert stats["reused_steps"] == 1
+    assert stats["reused_tokens"] == len(preamble + first)
+    assert stats["estimated_saved_ms"] == pytest.approx(len(preamble + first))
+
+
+def test_unrelated_prompt_sends_the_full_prompt(ollama_url):
+    StubOllama.completions = ["One.", "Two."]
+    handler = OllamaHandler(base_url=ollama_url, reuse_context=True)
+
+    handler.generate_with_context("First question\nThought:")
+    handler.generate_with_context("Second question\nThought:")
+
+    assert all("context" not in request for request in StubOllama.requests)
+    assert handler.prompt_stats.summary()["reused_steps"] == 0
+
+
+def test_warm_up_loads_the_model_with_keep_alive(ollama_url):
+    handler = OllamaHandler(base_url=ollama_url, keep_alive="1h")
+
+    assert handler.warm_up() is True
+    (request,) = StubOllama.requests
+    assert request["keep_alive"] == "1h"
+    assert not request.get("prompt")
+    assert handler.llm.keep_alive == "1h"
+
+
+def test_context_cache_returns_longest_prefix_and_evicts():
+    cache = PromptContextCache(max_entries=2)
+    cache.store("abc", [1])
+    cache.store("abcdef", [2])
+
+    assert cache.lookup("abcdefgh") == ("abcdef", [2])
+    assert cache.lookup("abcdef") == ("abc", [1])
+    assert cache.lookup("xyz") == ("", None)
+
+    cache.store("xyz", [3])
+    assert cache.lookup("abcdefgh") == ("abc", [1])
+
+
+def test_prompt_eval_stats_keep_running_totals():
+    stats = PromptEvalStats()
+    for _ in range(1000):
+        stats.record(0, 100, 2_000_000)
+        stats.record(80, 20, 400_000)
+
+    summary = stats.summary()
+    assert summary["steps"] == 2000 and summary["reused_steps"] == 1000
+    assert summary["prompt_eval_tokens"] == 120_000
+    assert summary["estimated_saved_ms"] == pytest.approx(80 * 20_000 * 1000 / 1e6)
+    stats.clear()
+    assert stats.summary()["steps"] == 0
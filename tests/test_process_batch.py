@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+import time
+
+from langchain.tools import Tool
+
+from tools import batching
+
+QUOTES = {"AAPL": "AAPL is 1.00 USD.", "MSFT": "MSFT is 2.00 USD."}
+
+
+class CountingExecutor:
+    """Stand-in for the LangChain executor that answers slowly and fails on demand."""
+
+    def __init__(self):
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, query, config=None):
+        with self._lock:
+            self.calls.append(query)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self._lock:
+            self.running -= 1
+        if "boom" in query:
+            raise RuntimeError("model crashed")
+        return {"output": query.upper()}
+
+
+def _agent(make_agent, monkeypatch, batch_calls):
+    def batch(tickers):
+        batch_calls.append(tickers)
+        return {ticker: QUOTES[ticker] for ticker in tickers}
+
+    monkeypatch.setitem(batching._HANDLERS, "StockPrice", batch)
+    tool = Tool(name="StockPrice", func=lambda ticker: QUOTES[ticker], description="Quotes a ticker.")
+    agent = make_agent([tool])
+    agent.agent = CountingExecutor()
+    return agent
+
+
+def test_process_batch_dedupes_runs_concurrently_and_keeps_order(make_agent, db_path, monkeypatch):
+    agent = _agent(make_agent, monkeypatch, [])
+    queries = [f"question {i % 10}" for i in range(30)] + ["boom please"]
+
+    results = list(agent.process_batch(queries, max_concurrency=5))
+    agent.close()
+
+    assert [index for index, _ in results] == list(range(31))
+    assert results[12] == (12, "QUESTION 2")
+    assert len(agent.agent.calls) == 11
+    assert agent.agent.peak == 5
+    assert results[-1][1].startswith("An error occurred")
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT query, error_message FROM error_log").fetchall() == [
+            ("boom please", "model crashed")
+        ]
+        assert conn.execute("SELECT COUNT(*) FROM chat_log").fetchone()[0] == 10
+
+
+def test_process_batch_groups_tool_calls_of_the_same_kind(make_agent, monkeypatch):
+    batch_calls = []
+    agent = _agent(make_agent, monkeypatch, batch_calls)
+
+    results = dict(agent.process_batch(["$AAPL", "$MSFT", "$AAPL", "what is up?"], ordered=False))
+    agent.close()
+
+    assert batch_calls == [["AAPL", "MSFT"]]
+    assert results == {0: "AAPL is 1.00 USD.", 1: "MSFT is 2.00 USD.", 2: "AAPL is 1.00 USD.", 3: "WHAT IS UP?"}
+    assert agent.agent.calls == ["what is up?"]
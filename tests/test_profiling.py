@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from langchain.tools import Tool
+from langchain_core.language_models import FakeListLLM
+
+from agent import profiling
+
+
+def test_profiled_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", False)
+
+    def func(text):
+        return text
+
+    assert profiling.profiled("noop")(func) is func
+    assert profiling.write_reports() is None
+
+
+def test_profiled_records_spans_with_payload_sizes(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    recorder = profiling.SpanRecorder()
+    monkeypatch.setattr(profiling, "RECORDER", recorder)
+
+    @profiling.profiled("tool:Echo", "tool", payload=True)
+    def echo(text):
+        return text * 2
+
+    @profiling.profiled("tool:AsyncEcho", "tool", payload=True)
+    async def async_echo(text):
+        return text
+
+    assert echo("abc") == "abcabc"
+    assert echo("de") == "dede"
+    assert asyncio.run(async_echo("xyz")) == "xyz"
+
+    rows = {row["name"]: row for row in recorder.summary()}
+    assert rows["tool:Echo"]["count"] == 2
+    assert rows["tool:Echo"]["input_chars"] == 5
+    assert rows["tool:Echo"]["output_chars"] == 10
+    assert rows["tool:AsyncEcho"]["count"] == 1
+    assert "tool:Echo" in recorder.summary_table()
+
+
+def test_span_records_errors_and_reports_are_written(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    recorder = profiling.SpanRecorder()
+    monkeypatch.setattr(profiling, "RECORDER", recorder)
+
+    try:
+        with profiling.span("log_writer.write", "sqlite", rows=3):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    summary_path, trace_path = profiling.write_reports(str(tmp_path))
+    with open(trace_path, encoding="utf-8") as trace_file:
+        trace = json.load(trace_file)
+
+    (event,) = trace["traceEvents"]
+    assert event["ph"] == "X"
+    assert event["name"] == "log_writer.write"
+    assert event["args"] == {"rows": 3, "error": "ValueError"}
+    assert "log_writer.write" in open(summary_path, encoding="utf-8").read()
+
+
+def test_recorder_is_a_bounded_ring_buffer():
+    recorder = profiling.SpanRecorder(maxlen=2)
+    for index in range(5):
+        recorder.record(f"span{index}", "app", 0, 1000)
+
+    assert [span["name"] for span in recorder.snapshot()] == ["span3", "span4"]
+
+
+def test_agent_runs_record_llm_spans(monkeypatch, make_agent):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    recorder = profiling.SpanRecorder()
+    monkeypatch.setattr(profiling, "RECORDER", recorder)
+    tool = Tool(name="Lookup", func=lambda text: f"Found {text}", description="Looks something up.")
+    agent = make_agent([tool], use_router=False, llm=FakeListLLM(responses=[
+        "Let me look.\nAction: Lookup\nAction Input: Berlin",
+        "I know this.\nFinal Answer: Found Berlin.",
+    ]))
+
+    assert agent.process("look up Berlin") == "Found Berlin."
+    assert asyncio.run(agent.aprocess("look up Paris")) == "Found Berlin."
+
+    rows = {row["name"]: row for row in recorder.summary()}
+    assert rows["llm"]["count"] == 4
+    assert rows["llm"]["prompt_chars"] > 0
@@ -0,0 +1,57 @@
+import time
+
+from langchain.tools import Tool
+from langchain_core.language_models import FakeListLLM
+
+from agent.response_cache import ResponseCache, normalize_query
+
+
+def test_normalize_query_ignores_filler_words_and_punctuation():
+    assert normalize_query("What's the weather in Berlin?") == normalize_query("weather in berlin")
+    assert normalize_query("stock price of AAPL") != normalize_query("stock price of MSFT")
+
+
+def test_response_cache_ttl_lru_and_persistence(tmp_path):
+    db_path = str(tmp_path / "chat_history.db")
+    cache = ResponseCache(db_path, max_entries=2, ttls={"StockPrice": 0.05})
+
+    cache.put("weather in Berlin", "Sunny, 20°C", "WeatherTool")
+    cache.put("AAPL stock price", "190 USD", "StockPrice")
+    assert cache.get("what's the weather in berlin?").response == "Sunny, 20°C"
+
+    time.sleep(0.1)
+    assert cache.get("AAPL stock price") is None
+
+    cache.put("weather in Paris", "Rainy", "WeatherTool")
+    cache.put("weather in Rome", "Clear", "WeatherTool")
+    assert cache.get("weather in Berlin") is None
+    assert len(cache) == 2
+
+    restored = ResponseCache(db_path)
+    assert restored.get("Weather in Rome").tool_name == "WeatherTool"
+
+
+def test_response_cache_similarity_tier():
+    vectors = {"weather in berlin": [1.0, 0.0], "berlin weather forecast": [0.99, 0.05], "aapl": [0.0, 1.0]}
+    cache = ResponseCache(persist=False, embedder=lambda text: vectors.get(text, [0.5, 0.5]))
+
+    cache.put("weather in Berlin", "Sunny", "WeatherTool")
+    assert cache.get("Berlin weather forecast").response == "Sunny"
+    assert cache.get("AAPL") is None
+
+
+def test_failed_tool_outputs_are_not_cached(make_agent):
+    calls = []
+
+    def weather(city):
+        calls.append(city)
+        return f"Failed to retrieve weather data for {city}."
+
+    tool = Tool(name="WeatherTool", func=weather, description="Weather in a city.", return_direct=True)
+    agent = make_agent([tool], cache=True, use_router=False,
+                       llm=FakeListLLM(responses=["Checking.\nAction: WeatherTool\nAction Input: Berlin"] * 2))
+
+    assert agent.process("weather in Berlin") == "Failed to retrieve weather data for Berlin."
+    assert agent.process("weather in Berlin") == "Failed to retrieve weather data for Berlin."
+    assert calls == ["Berlin", "Berlin"]
+    assert agent.response_cache.get("weather in Berlin") is None
@@ -0,0 +1,74 @@
+import sqlite3
+
+from agent.database import SCHEMA_VERSION, init_db
+from agent.retention import compact
+
+DAY = 86400
+NOW = 1_717_000_000
+
+
+def _legacy_db(path):
+    """A database as created before epoch timestamps: TEXT timestamps, no indexes."""
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE tools (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, description TEXT);
+            CREATE TABLE chat_log (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, question TEXT,
+                                   answer TEXT, tool_id INTEGER);
+            CREATE TABLE error_log (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, error_message TEXT,
+                                    query TEXT, tool_id INTEGER);
+            INSERT INTO tools (name) VALUES ('WeatherTool');
+            INSERT INTO chat_log (timestamp, question, answer, tool_id)
+                VALUES ('2024-01-02 10:00:00', 'weather in Berlin', 'Sunny', 1);
+            """
+        )
+
+
+def test_migration_adds_epoch_timestamps_and_indexes(tmp_path):
+    path = str(tmp_path / "chat.db")
+    _legacy_db(path)
+    init_db(path)
+    init_db(path)
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        ts = conn.execute("SELECT ts FROM chat_log").fetchone()[0]
+        assert abs(ts - 1704189600) <= 14 * 3600
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_chat_log_ts", "idx_chat_log_tool_ts", "idx_error_log_ts", "idx_routing_log_ts"} <= indexes
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM chat_log WHERE ts > 0").fetchall()
+        assert "idx_chat_log_ts" in str(plan)
+
+
+def test_compaction_rolls_up_archives_and_vacuums(tmp_path):
+    path, archive = str(tmp_path / "chat.db"), str(tmp_path / "archive.db")
+    init_db(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO tools (name) VALUES ('WeatherTool')")
+        old = [(NOW - 200 * DAY + i, "q" * 2000, "a" * 2000, 1) for i in range(300)]
+        conn.executemany("INSERT INTO chat_log (ts, question, answer, tool_id) VALUES (?, ?, ?, ?)", old)
+        conn.execute("INSERT INTO chat_log (ts, question, answer, tool_id) VALUES (?, 'new', 'kept', 1)", (NOW,))
+        conn.execute("INSERT INTO error_log (ts, error_message, query) VALUES (?, 'timeout', 'q')", (NOW - 200 * DAY,))
+        conn.execute("INSERT INTO routing_log (ts, query, rule, tool_id, confidence, routed) "
+                     "VALUES (?, 'AAPL', 'ticker_only', 1, 0.9, 1)", (NOW - 200 * DAY,))
+        conn.execute("INSERT INTO tool_calls (chat_id, step, ts, tool_id, input, output_chars, latency_ms) "
+                     "VALUES (1, 0, ?, 1, 'Berlin', 40, 250.0)", (NOW - 200 * DAY,))
+
+    result = compact(path, retention_days=90, archive_path=archive, now=NOW)
+
+    assert result["removed"] == {"chat_log": 300, "error_log": 1, "routing_log": 1, "tool_calls": 1}
+    assert result["pages_freed"] > 0
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT question FROM chat_log").fetchall() == [("new",)]
+        stats = conn.execute("SELECT tool_id, questions, errors, routed FROM daily_tool_stats ORDER BY tool_id")
+        assert stats.fetchall() == [(0, 0, 1, 0), (1, 300, 0, 1)]
+    with sqlite3.connect(archive) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM chat_log").fetchone()[0] == 300
+        assert conn.execute("SELECT input FROM tool_calls").fetchall() == [("Berlin",)]
+        assert conn.execute("SELECT name FROM tools").fetchall() == [("WeatherTool",)]
+
+    # A second pass has nothing left to remove and does not double count
+    assert compact(path, retention_days=90, archive_path=archive, now=NOW)["removed"]["chat_log"] == 0
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT SUM(questions) FROM daily_tool_stats").fetchone()[0] == 300
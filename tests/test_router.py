@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from langchain.tools import Tool
+from langchain_core.language_models import FakeListLLM
+
+from agent.router import GREETING_RESPONSE, RuleRouter
+
+TOOLS = ["WeatherTool", "StockPrice", "InternetSearch"]
+
+
+@pytest.mark.parametrize("query, tool, tool_input", [
+    ("What's the weather in Berlin?", "WeatherTool", "Berlin"),
+    ("temperature for New York", "WeatherTool", "New York"),
+    ("weather in Berlin tomorrow", "WeatherTool", "Berlin"),
+    ("What's the forecast for São Paulo this weekend?", "WeatherTool", "São Paulo"),
+    ("weather in Paris, right now", "WeatherTool", "Paris"),
+    ("$AAPL", "StockPrice", "AAPL"),
+    ("stock price of MSFT?", "StockPrice", "MSFT"),
+])
+def test_router_sends_obvious_intents_to_tools(query, tool, tool_input):
+    route = RuleRouter(TOOLS).route(query)
+    assert (route.tool_name, route.tool_input) == (tool, tool_input)
+
+
+@pytest.mark.parametrize("query", ["Hello!", "hi there", "مرحبا"])
+def test_router_answers_greetings_directly(query):
+    route = RuleRouter(TOOLS).route(query)
+    assert route.tool_name is None and route.response == GREETING_RESPONSE
+
+
+@pytest.mark.parametrize("query", [
+    "Will it rain tomorrow? what's the weather",
+    "compare the stock of AAPL and MSFT",
+    "explain hypertension symptoms",
+    "hello, can you summarize this article for me",
+    "HELP",
+    "WHY?",
+    "OK",
+    "AAPL",
+    "What is the temperature at which water boils?",
+    "Is the weather good for running?",
+    "forecast for inflation in 2025",
+])
+def test_router_leaves_ambiguous_queries_to_the_agent(query):
+    assert RuleRouter(TOOLS).route(query) is None
+
+
+def test_router_skips_tools_that_are_not_loaded():
+    router = RuleRouter(["InternetSearch"])
+    assert router.classify("weather in Paris").confidence >= router.threshold
+    assert router.route("weather in Paris") is None
+
+
+def test_agent_answers_when_the_routed_tool_fails(make_agent):
+    weather = Tool(name="WeatherTool", func=lambda city: f"Failed to retrieve weather data for {city}.",
+                   description="Weather in a city.")
+    agent = make_agent([weather], llm=FakeListLLM(responses=["I know this.\nFinal Answer: No weather data today."]))
+
+    assert agent.process("weather in Berlin") == "No weather data today."
+    assert asyncio.run(agent.aprocess("weather in Paris")) == "No weather data today."
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from server import AgentServer
+
+
+class SlowAgent:
+    """Stand-in agent that records how many queries run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def aprocess(self, query):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        return query.upper()
+
+
+async def _request(port, method, path, payload=b""):
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+    return await _send_raw(port, head + payload)
+
+
+async def _send_raw(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+def test_server_limits_concurrency_and_applies_backpressure():
+    async def scenario():
+        agent = SlowAgent()
+        server = AgentServer(agent, port=0, max_concurrency=4, max_pending=10)
+        port = await server.start()
+
+        payload = json.dumps({"query": "hi"}).encode()
+        results = await asyncio.gather(*[_request(port, "POST", "/query", payload) for _ in range(30)])
+        statuses = [status for status, _ in results]
+        await server.stop()
+        return agent, statuses, results
+
+    agent, statuses, results = asyncio.run(scenario())
+    assert agent.peak == 4
+    assert statuses.count(200) == 10
+    assert statuses.count(503) == 20
+    assert json.loads(results[statuses.index(200)][1]) == {"response": "HI"}
+
+
+def test_server_streams_batch_results():
+    async def scenario():
+        server = AgentServer(SlowAgent(), port=0, max_concurrency=8)
+        port = await server.start()
+        lines = "\n".join(json.dumps({"query": q}) for q in ["a", "b", "c"]).encode()
+        status, body = await _request(port, "POST", "/batch", lines)
+        await server.stop()
+        return status, body
+
+    status, body = asyncio.run(scenario())
+    results = sorted((json.loads(line) for line in body.decode().splitlines()), key=lambda r: r["index"])
+    assert status == 200
+    assert [r["response"] for r in results] == ["A", "B", "C"]
+
+
+def test_server_rejects_malformed_and_oversized_requests():
+    async def scenario():
+        agent = SlowAgent()
+        server = AgentServer(agent, port=0, max_body_bytes=64)
+        port = await server.start()
+        results = [
+            await _send_raw(port, b"GARBAGE\r\n\r\n"),
+            await _send_raw(port, b"POST /query HTTP/1.1\r\nContent-Length: abc\r\n\r\n"),
+            await _send_raw(port, b"POST /query HTTP/1.1\r\nContent-Length: -5\r\n\r\n"),
+            # The oversized body is never sent; the server answers from the headers alone
+            await _send_raw(port, b"POST /query HTTP/1.1\r\nContent-Length: 100000\r\n\r\n"),
+            await _request(port, "POST", "/batch", b'{"query": "caf\xe9"}'),
+            await _request(port, "POST", "/query", json.dumps({"query": "ok"}).encode()),
+        ]
+        await server.stop()
+        return agent, results
+
+    agent, results = asyncio.run(scenario())
+    assert [status for status, _ in results] == [400, 400, 400, 413, 400, 200]
+    assert "error" in json.loads(results[3][1])
+    assert agent.peak == 1
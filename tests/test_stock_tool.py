@@ -0,0 +1,135 @@
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from tools import stock_tool
+
+# Daily bars as returned by `yf.download(["AAPL", "MSFT", "ZZZZ"], period="5d", group_by="ticker")`
+RECORDED_BARS = {
+    "AAPL": [(189.10, 190.25), (190.30, 191.45)],
+    "MSFT": [(410.00, 412.50), (412.00, 415.75)],
+    "ZZZZ": [(None, None), (None, None)],
+}
+
+
+def recorded_download(tickers, **kwargs):
+    """Replay the recorded response for the requested tickers."""
+    index = pd.to_datetime(["2024-05-02", "2024-05-03"])
+    frames = {
+        ticker: pd.DataFrame(RECORDED_BARS[ticker], index=index, columns=["Open", "Close"], dtype=float)
+        for ticker in tickers
+    }
+    return pd.concat(frames, axis=1)
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(list(tickers))
+        return recorded_download(tickers, **kwargs)
+
+    monkeypatch.setattr(stock_tool.yf, "download", download)
+    monkeypatch.setattr(stock_tool, "QUOTES", stock_tool.QuoteCache())
+    return calls
+
+
+def test_many_tickers_are_fetched_in_one_request(downloads):
+    answer = stock_tool.get_stock_price("aapl, 'MSFT' ZZZZ")
+
+    assert downloads == [["AAPL", "MSFT", "ZZZZ"]]
+    assert answer.splitlines() == [
+        "The current price of AAPL is 191.45 USD.",
+        "The current price of MSFT is 415.75 USD.",
+        "No available data for ZZZZ. The ticker might be invalid or delisted, or the market might be closed.",
+    ]
+
+
+def test_quotes_are_served_from_the_cache(downloads):
+    stock_tool.get_stock_price("AAPL")
+    assert stock_tool.get_stock_price("AAPL, MSFT").splitlines()[0] == "The current price of AAPL is 191.45 USD."
+
+    assert downloads == [["AAPL"], ["MSFT"]]
+    assert stock_tool.QUOTES.hits == 1
+
+
+def test_symbols_without_data_are_cached_briefly(downloads, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(stock_tool, "QUOTES", stock_tool.QuoteCache(clock=lambda: now[0], no_data_ttl=30))
+    stock_tool.get_stock_price("ZZZZ")
+    assert stock_tool.get_stock_price("ZZZZ").startswith("No available data for ZZZZ")
+    now[0] += 31
+    stock_tool.get_stock_price("ZZZZ")
+
+    assert downloads == [["ZZZZ"], ["ZZZZ"]]
+
+
+def test_concurrent_requests_share_one_download(monkeypatch):
+    calls = []
+    started, release = threading.Event(), threading.Event()
+
+    def download(tickers, **kwargs):
+        calls.append(list(tickers))
+        started.set()
+        release.wait(5)
+        return recorded_download(tickers, **kwargs)
+
+    monkeypatch.setattr(stock_tool.yf, "download", download)
+    monkeypatch.setattr(stock_tool, "QUOTES", stock_tool.QuoteCache())
+    answers = []
+    first = threading.Thread(target=lambda: answers.append(stock_tool.get_stock_price("AAPL")))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: answers.append(stock_tool.get_stock_price("AAPL, MSFT")))
+    second.start()
+    for _ in range(500):
+        if stock_tool.QUOTES.coalesced:
+            break
+        second.join(0.01)
+    release.set()
+    first.join()
+    second.join()
+
+    assert calls == [["AAPL"], ["MSFT"]]
+    assert sorted(answers)[0] == "The current price of AAPL is 191.45 USD."
+    assert sorted(answers)[1].splitlines()[0] == "The current price of AAPL is 191.45 USD."
+
+
+def test_parse_tickers_skips_words_that_are_not_symbols():
+    assert stock_tool.parse_tickers("AAPL stock") == ["AAPL"]
+    assert stock_tool.parse_tickers("What is the share price of $msft?") == ["MSFT"]
+    assert stock_tool.parse_tickers("'BRK-B', SAP.DE ^GSPC") == ["BRK-B", "SAP.DE", "^GSPC"]
+    assert stock_tool.get_stock_price("stock price") == "Please provide a stock ticker symbol (e.g., AAPL)."
+
+
+def test_batch_handler_answers_each_input(downloads):
+    answers = stock_tool.get_stock_prices(["AAPL", "msft", "AAPL, MSFT"])
+
+    assert downloads == [["AAPL", "MSFT"]]
+    assert answers["msft"] == "The current price of MSFT is 415.75 USD."
+    assert len(answers["AAPL, MSFT"].splitlines()) == 2
+
+
+def test_quote_ttl_follows_market_hours():
+    # 14:00 UTC on a Wednesday is 10:00 in New York; Saturday is closed
+    assert stock_tool.market_is_open(datetime(2024, 5, 1, 14, 0, tzinfo=timezone.utc))
+    assert not stock_tool.market_is_open(datetime(2024, 5, 4, 14, 0, tzinfo=timezone.utc))
+    assert stock_tool.quote_ttl(datetime(2024, 5, 1, 14, 0, tzinfo=timezone.utc)) == stock_tool.QUOTE_TTL_OPEN
+    assert stock_tool.quote_ttl(datetime(2024, 5, 1, 22, 0, tzinfo=timezone.utc)) == stock_tool.QUOTE_TTL_CLOSED
+    # 09:15 in New York: the quote expires at the 09:30 open, not an hour later
+    assert stock_tool.quote_ttl(datetime(2024, 5, 1, 13, 15, tzinfo=timezone.utc)) == 15 * 60
+    # Friday after the close: the next open is Monday
+    assert stock_tool.seconds_until_open(datetime(2024, 5, 3, 21, 0, tzinfo=timezone.utc)) == (2 * 24 + 16.5) * 3600
+
+
+def test_quote_cache_expires_entries():
+    now = [1000.0]
+    cache = stock_tool.QuoteCache(clock=lambda: now[0], ttl=lambda: 60)
+    cache.put("AAPL", 191.45)
+
+    assert cache.get("AAPL") == 191.45
+    now[0] += 61
+    assert cache.get("AAPL") is None
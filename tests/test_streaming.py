@@ -0,0 +1,132 @@
+import asyncio
+import json
+import uuid
+
+from langchain.tools import Tool
+
+from agent.streaming import StreamingCallbackHandler, render
+from model.ollama_model import OllamaHandler
+from server import AgentServer
+
+REACT_STEPS = [
+    ["Thought: I should check", " the weather.\nAction: WeatherTool\nAction Input: Berlin"],
+    ["Thought: I now know", " the final answer\nFinal", " Ans", "wer: It is", " sunny", " in Berlin."],
+]
+
+
+class ScriptedExecutor:
+    """Stand-in for the LangChain executor that replays ReAct steps through the callbacks."""
+
+    def _replay(self, handler):
+        for index, tokens in enumerate(REACT_STEPS):
+            run_id = uuid.uuid4()
+            handler.on_llm_start({}, ["prompt"], run_id=run_id)
+            for token in tokens:
+                handler.on_llm_new_token(token, run_id=run_id)
+            handler.on_llm_end(None, run_id=run_id)
+            if index == 0:
+                tool_run = uuid.uuid4()
+                handler.on_tool_start({"name": "WeatherTool"}, "Berlin", run_id=tool_run)
+                handler.on_tool_end("Sunny, 21C", run_id=tool_run)
+        return {"input": "weather?", "output": "It is sunny in Berlin."}
+
+    def invoke(self, query, config=None):
+        return self._replay(config["callbacks"][0])
+
+    async def ainvoke(self, query, config=None):
+        await asyncio.sleep(0)
+        return self._replay(config["callbacks"][0])
+
+
+def _agent(make_agent):
+    tool = Tool(name="WeatherTool", func=lambda city: "Sunny, 21C", description="Weather in a city.")
+    agent = make_agent([tool])
+    agent.agent = ScriptedExecutor()
+    return agent
+
+
+def test_handler_separates_thoughts_from_final_answer_tokens():
+    events = []
+    ScriptedExecutor()._replay(StreamingCallbackHandler(events.append))
+
+    tokens = [event.text for event in events if event.kind == "token"]
+    thoughts = "".join(event.text for event in events if event.kind == "thought")
+    assert "".join(tokens) == "It is sunny in Berlin."
+    assert len(tokens) == 3
+    assert "Final Answer:" not in thoughts
+    assert thoughts.startswith("Thought: I should check the weather.")
+    assert [(event.kind, event.tool) for event in events if event.kind.startswith("tool")] == [
+        ("tool_start", "WeatherTool"), ("tool_end", "WeatherTool"),
+    ]
+
+
+def test_agent_stream_yields_events_then_final(make_agent):
+    agent = _agent(make_agent)
+    events = list(agent.stream("How is the sky?"))
+    agent.close()
+
+    kinds = [event.kind for event in events]
+    assert kinds.index("tool_start") < kinds.index("token") < kinds.index("final")
+    assert events[-1].kind == "final"
+    assert events[-1].text == "It is sunny in Berlin."
+
+
+def test_agent_astream_matches_stream(make_agent):
+    agent = _agent(make_agent)
+
+    async def collect():
+        return [event async for event in agent.astream("How is the sky?")]
+
+    events = asyncio.run(collect())
+    agent.close()
+    assert "".join(event.text for event in events if event.kind == "token") == "It is sunny in Berlin."
+    assert events[-1].kind == "final"
+
+
+def test_render_prints_tokens_incrementally(make_agent, capsys):
+    agent = _agent(make_agent)
+    response = render(agent.stream("How is the sky?"))
+    agent.close()
+
+    out = capsys.readouterr().out
+    assert response == "It is sunny in Berlin."
+    assert "[WeatherTool] Berlin" in out
+    assert out.count("It is sunny in Berlin.") == 1
+
+
+def test_server_streams_agent_events(make_agent):
+    agent = _agent(make_agent)
+
+    async def scenario():
+        server = AgentServer(agent, port=0)
+        port = await server.start()
+        payload = json.dumps({"query": "How is the sky?"}).encode()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"POST /stream HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+            + payload
+        )
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        await server.stop()
+        return raw
+
+    raw = asyncio.run(scenario())
+    agent.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    events = [json.loads(line) for line in body.decode().splitlines()]
+    assert b"application/x-ndjson" in head
+    assert events[-1] == {"type": "final", "text": "It is sunny in Berlin."}
+    assert {"type": "tool_start", "text": "Berlin", "tool": "WeatherTool"} in events
+
+
+def test_ollama_handler_streams_tokens():
+    class FakeLLM:
+        def stream(self, prompt, stop=None):
+            yield from ["Hel", "lo"]
+
+    handler = OllamaHandler()
+    object.__setattr__(handler, "llm", FakeLLM())
+    assert [chunk.text for chunk in handler._stream("Hi")] == ["Hel", "lo"]
+    assert list(handler.stream("Hi")) == ["Hel", "lo"]
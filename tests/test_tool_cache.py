@@ -0,0 +1,65 @@
+import threading
+import time
+
+from tools.tool_cache import ToolCache, render_metrics, ttl_cache
+
+
+def test_ttl_cache_hits_and_expires():
+    calls = []
+
+    @ttl_cache("TestExpiry", ttl=0.05)
+    def lookup(city):
+        calls.append(city)
+        return f"Weather in {city}"
+
+    assert lookup("Berlin") == lookup(" berlin ") == "Weather in Berlin"
+    assert len(calls) == 1
+    time.sleep(0.1)
+    lookup("Berlin")
+    assert len(calls) == 2
+    assert lookup.cache.stats()["hits"] == 1
+    assert 'tool_cache_hits_total{tool="TestExpiry"} 1' in render_metrics()
+
+
+def test_ttl_cache_skips_errors_and_evicts_lru():
+    @ttl_cache("TestErrors", ttl=60, max_entries=2)
+    def lookup(value):
+        return "Error: upstream down" if value == "bad" else value
+
+    lookup("bad")
+    lookup("bad")
+    assert lookup.cache.stats()["misses"] == 2
+
+    for value in ("a", "b", "c"):
+        lookup(value)
+    assert lookup.cache.stats()["size"] == 2
+
+
+def test_concurrent_identical_calls_are_coalesced():
+    calls = []
+    release = threading.Event()
+
+    @ttl_cache("TestCoalesce", ttl=60)
+    def slow(value):
+        calls.append(value)
+        release.wait(5)
+        return value
+
+    threads = [threading.Thread(target=slow, args=("AAPL",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["AAPL"]
+    assert slow.cache.stats()["coalesced"] == 7
+
+
+def test_disk_backing_store_survives_new_cache(tmp_path):
+    disk_path = str(tmp_path / "tool_cache.db")
+    ToolCache("Disk", ttl=60, disk_path=disk_path).call(lambda: "cached", "key")
+
+    restored = ToolCache("Disk", ttl=60, disk_path=disk_path)
+    assert restored.call(lambda: "fresh", "key") == "cached"
@@ -0,0 +1,61 @@
+import sqlite3
+import time
+
+from langchain.tools import Tool
+from langchain_core.language_models import FakeListLLM
+
+from agent import analytics
+from agent.tool_calls import NO_TOOL
+
+
+def _slow_weather(city):
+    time.sleep(0.02)
+    return f"Sunny in {city}"
+
+
+def _agent(make_agent, responses):
+    tools = [
+        Tool(name="WeatherTool", func=_slow_weather, description="Weather in a city."),
+        Tool(name="StockPrice", func=lambda ticker: f"{ticker} is 1.00 USD.", description="Quotes a ticker."),
+    ]
+    return make_agent(tools, use_router=False, llm=FakeListLLM(responses=responses))
+
+
+def _rows(db_path, sql):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_every_tool_call_is_logged_with_its_wall_time(make_agent, db_path):
+    agent = _agent(make_agent, [
+        "I need the weather.\nAction: WeatherTool\nAction Input: Berlin",
+        "And the stock.\nAction: StockPrice\nAction Input: AAPL",
+        "I now know the final answer.\nFinal Answer: Sunny, and AAPL is 1.00 USD.",
+    ])
+    assert agent.process("weather in Berlin and AAPL?") == "Sunny, and AAPL is 1.00 USD."
+    agent.close()
+
+    assert _rows(db_path, "SELECT t.name, c.latency_ms > 0 FROM chat_log c JOIN tools t ON t.id = c.tool_id") == [
+        ("StockPrice", 1)
+    ]
+    calls = _rows(db_path, """
+        SELECT k.chat_id, k.step, t.name, k.input, k.output_chars, k.latency_ms, k.error
+        FROM tool_calls k JOIN tools t ON t.id = k.tool_id ORDER BY k.step
+    """)
+    assert [call[:5] for call in calls] == [
+        (1, 0, "WeatherTool", "Berlin", len("Sunny in Berlin")),
+        (1, 1, "StockPrice", "AAPL", len("AAPL is 1.00 USD.")),
+    ]
+    assert calls[0][5] >= 20 and calls[0][6] is None
+
+    stats = analytics.tool_call_stats(db_path)
+    assert stats["WeatherTool"]["calls"] == 1 and stats["WeatherTool"]["mean_ms"] >= 20
+
+
+def test_direct_answers_are_attributed_to_the_model(make_agent, db_path):
+    agent = _agent(make_agent, ["I know this.\nFinal Answer: Hello!"])
+    assert agent.process("hi there") == "Hello!"
+    agent.close()
+
+    assert _rows(db_path, "SELECT t.name FROM chat_log c JOIN tools t ON t.id = c.tool_id") == [(NO_TOOL,)]
+    assert _rows(db_path, "SELECT COUNT(*) FROM tool_calls") == [(0,)]
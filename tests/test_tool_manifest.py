@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+from tools.manifest import build_manifest, lazy_tool
+
+TOOL_SOURCE = '''
+import json
+from langchain.tools import Tool
+
+IMPORTED = True
+
+def echo(text):
+    return text.upper()
+
+sample_tool = Tool(
+    name="Sample",
+    func=echo,
+    description="{description}",
+    return_direct=True,
+)
+'''
+
+
+def _write_tool(directory, description):
+    path = directory / "sample_tool.py"
+    path.write_text(TOOL_SOURCE.format(description=description), encoding="utf-8")
+    return path
+
+
+def test_manifest_is_cached_and_invalidated_by_mtime(tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    path = _write_tool(tmp_path, "First description")
+
+    entry = build_manifest(str(tmp_path), manifest_path)["sample_tool.py"]
+    assert (entry["name"], entry["description"], entry["lazy"]) == ("Sample", "First description", True)
+    assert os.path.exists(manifest_path)
+
+    _write_tool(tmp_path, "Second description")
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    assert build_manifest(str(tmp_path), manifest_path)["sample_tool.py"]["description"] == "Second description"
+
+
+def test_lazy_tool_imports_module_on_first_call(tmp_path, monkeypatch):
+    _write_tool(tmp_path, "Echo")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    entry = dict(build_manifest(str(tmp_path), str(tmp_path / "manifest.json"))["sample_tool.py"],
+                 module="sample_tool")
+
+    tool = lazy_tool(entry)
+    assert tool.name == "Sample" and tool.return_direct
+    assert "sample_tool" not in sys.modules
+
+    assert tool.run("hi") == "HI"
+    assert sys.modules["sample_tool"].IMPORTED
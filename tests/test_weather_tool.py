@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from tools import weather_tool
+from tools.gazetteer import Gazetteer, Location, get_gazetteer, normalize_name
+
+# Recorded OpenWeatherMap responses by (lat, lon) or city name
+RECORDED = {
+    (52.52, 13.405): {"weather": [{"description": "clear sky"}], "main": {"temp": 21.3}},
+    (48.8566, 2.3522): {"weather": [{"description": "light rain"}], "main": {"temp": 14.0}},
+    (40.7128, -74.006): {"weather": [{"description": "haze"}], "main": {"temp": 27.5}},
+    "Springfield": {"weather": [{"description": "overcast clouds"}], "main": {"temp": 9.1}},
+}
+
+
+class RecordedResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    def get(url, tool=None, params=None, **kwargs):
+        calls.append(params)
+        time.sleep(0.05)
+        key = params["q"] if "q" in params else (params["lat"], params["lon"])
+        return RecordedResponse(RECORDED[key])
+
+    monkeypatch.setattr(weather_tool.http_client, "get", get)
+    monkeypatch.setattr(weather_tool, "API_KEY", "test-key")
+    weather_tool.fetch_observation.cache.clear()
+    yield calls
+    weather_tool.fetch_observation.cache.clear()
+
+
+def test_gazetteer_normalizes_names_and_aliases():
+    gazetteer = get_gazetteer()
+    assert normalize_name("  São   Paulo! ") == "sao paulo"
+    assert gazetteer.lookup("MÜNCHEN").name == "Munich"
+    assert gazetteer.lookup("paris, fr").name == "Paris"
+    assert gazetteer.lookup("القاهرة").name == "Cairo"
+    assert gazetteer.lookup("أبو ظبي") == gazetteer.lookup("ابو ظبي")
+    assert [location.name for location in gazetteer.find("weather in New York and berlin?")] == ["New York", "Berlin"]
+
+
+def test_aliases_of_one_city_share_a_cached_observation(upstream):
+    assert weather_tool.get_weather("New York") == "Weather in New York: haze, Temperature: 27.5°C."
+    assert weather_tool.get_weather("nyc") == "Weather in New York: haze, Temperature: 27.5°C."
+    assert len(upstream) == 1
+    assert upstream[0]["lat"] == 40.7128 and "q" not in upstream[0]
+
+
+def test_several_cities_in_one_query(upstream):
+    answer = weather_tool.get_weather("Berlin, Paris")
+    assert answer.splitlines() == [
+        "Weather in Berlin: clear sky, Temperature: 21.3°C.",
+        "Weather in Paris: light rain, Temperature: 14.0°C.",
+    ]
+
+
+def test_concurrent_requests_for_a_city_share_one_upstream_call(upstream):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(weather_tool.get_weather("berlin"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(upstream) == 1
+    assert set(results) == {"Weather in Berlin: clear sky, Temperature: 21.3°C."}
+
+
+def test_unknown_places_fall_back_to_the_name(upstream):
+    assert weather_tool.get_weather("Springfield?") == "Weather in Springfield: overcast clouds, Temperature: 9.1°C."
+    assert upstream[0]["q"] == "Springfield"
+
+
+def test_batch_handler_fetches_each_city_once(upstream):
+    answers = weather_tool.get_weathers(["Berlin", "Paris", "berlin, paris"])
+    assert len(upstream) == 2
+    assert answers["berlin, paris"] == answers["Berlin"] + "\n" + answers["Paris"]
+
+
+@pytest.mark.parametrize("query, place", [
+    ("what is the weather in paris today", "Paris"),
+    ("weather berlin", "Berlin"),
+    ("temperature for Springfield?", "Springfield"),
+    ("what's the weather like", None),
+])
+def test_extract_place_does_not_guess_the_last_word(query, place):
+    assert weather_tool.extract_place(query) == place
+
+
+def test_buckets_group_nearby_locations():
+    gazetteer = Gazetteer([(Location("A", "XX", 10.01, 20.02), []), (Location("B", "XX", 10.03, 20.04), [])])
+    assert gazetteer.lookup("a").bucket == gazetteer.lookup("b").bucket